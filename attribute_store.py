@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Attribute Store
+Keeps each layer's attribute table (no geometry) in a SQLite database next
+to the metadata database, with an indexed, normalized key column per join
+field, so geometry-free joins never open the layer file
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+from join_keys import normalize_keys
+
+logger = logging.getLogger(__name__)
+
+ATTRIBUTE_STORE_DB = 'gis_attributes.db'
+
+# Feature ID column of every stored table (the layer FID)
+STORED_FID = '_fid'
+
+# Prefix of the normalized, indexed key column kept for each join field
+KEY_PREFIX = '_key_'
+
+# Keys per batch when loading a CSV's keys into a temporary lookup table
+KEY_INSERT_ROWS = 50_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attribute_layers (
+    layer TEXT PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    feature_count INTEGER NOT NULL,
+    source_mtime REAL NOT NULL,
+    key_fields TEXT NOT NULL,
+    column_map TEXT NOT NULL
+)
+"""
+
+
+def attribute_store_path(metadata_db: str) -> Path:
+    """The attribute store that sits next to a metadata database"""
+    return Path(metadata_db).with_name(ATTRIBUTE_STORE_DB)
+
+
+def _table_name(layer: str) -> str:
+    return 'attrs_' + re.sub(r'\W', '_', layer)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_columns(columns) -> Dict[str, str]:
+    """{column: SQL column name}, unique case-insensitively as SQLite requires
+
+    A column whose name repeats an earlier one but for case ('name' and
+    'NAME') gets a numeric suffix, as does one named like STORED_FID.
+    """
+    used = {STORED_FID.lower()}
+    names = {}
+    for column in columns:
+        name, n = str(column), 1
+        while name.lower() in used:
+            n += 1
+            name = f'{column}_{n}'
+        used.add(name.lower())
+        names[column] = name
+    return names
+
+
+def save_attribute_table(db_path, layer: str, path: str, table: pd.DataFrame,
+                         key_types: Dict[str, str]):
+    """Store a layer's attributes (FIDs in the index) with an indexed key column per join field
+
+    key_types ({field: join_keys key type}) comes from the layer key index;
+    key columns hold normalize_keys output, so joins skip normalization.
+    Column names (see _sql_columns) and dtypes are kept in the catalog so
+    reads give back the layer's own.
+    """
+    names = _sql_columns(table.columns)
+    column_map = {column: {'column': names[column], 'dtype': str(table[column].dtype)}
+                  for column in table.columns}
+    stored = table.rename(columns=names).rename_axis(STORED_FID).reset_index()
+    key_fields = {}
+    for field, key_type in key_types.items():
+        keys, repairs = normalize_keys(stored[names[field]], key_type)
+        stored[KEY_PREFIX + names[field]] = keys
+        key_fields[field] = {'key_type': key_type, 'repairs': repairs}
+
+    table_name = _table_name(layer)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(_SCHEMA)
+        if 'column_map' not in [row[1] for row in conn.execute("PRAGMA table_info(attribute_layers)")]:
+            # A catalog from before column maps; the inventory refills it layer by layer
+            conn.execute("DROP TABLE attribute_layers")
+            conn.execute(_SCHEMA)
+        stored.to_sql(table_name, conn, if_exists='replace', index=False, chunksize=KEY_INSERT_ROWS)
+        for field in key_fields:
+            column = KEY_PREFIX + names[field]
+            conn.execute(f"CREATE INDEX {_quote(f'{table_name}_{column}')} "
+                         f"ON {_quote(table_name)} ({_quote(column)})")
+        conn.execute("INSERT OR REPLACE INTO attribute_layers VALUES (?, ?, ?, ?, ?, ?)",
+                     (layer, table_name, len(stored), Path(path).stat().st_mtime, json.dumps(key_fields),
+                      json.dumps(column_map)))
+        conn.commit()
+    finally:
+        conn.close()
+    logger.info(f"Stored {len(stored):,} attribute rows of {layer} ({len(key_fields)} indexed join fields)")
+
+
+def stored_layer(db_path, layer: str, path: str) -> Optional[Dict]:
+    """Catalog entry of a layer ({'table_name', 'feature_count', 'key_fields', 'column_map'}), or None
+
+    Missing stores, missing layers and tables older than the layer file all
+    give None.
+    """
+    if not Path(db_path).exists() or not Path(path).exists():
+        return None
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("SELECT table_name, feature_count, source_mtime, key_fields, column_map "
+                           "FROM attribute_layers WHERE layer = ?", (layer,)).fetchone()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    if row is None or row[2] != Path(path).stat().st_mtime:
+        return None
+    return {'table_name': row[0], 'feature_count': row[1], 'key_fields': json.loads(row[3]),
+            'column_map': json.loads(row[4])}
+
+
+def read_stored_attributes(db_path, entry: Dict, geo_field: str,
+                           columns: Optional[List[str]] = None, keys=None) -> pd.DataFrame:
+    """Stored attributes with geo_field already normalized, in FID order
+
+    Columns come back under the layer's names and dtypes. With keys, only
+    features whose normalized geo_field is among them are read, through the
+    key column's index.
+    """
+    column_map = entry['column_map']
+    if columns:
+        columns = [geo_field] + [col for col in columns if col != geo_field]
+    wanted = [col for col in (columns or column_map) if col in column_map]
+    names = {column_map[col]['column']: col for col in wanted}
+    table = _quote(entry['table_name'])
+    key_column = _quote(KEY_PREFIX + column_map[geo_field]['column'])
+    select = ', '.join(f"t.{key_column} AS {_quote(name)}" if col == geo_field else f"t.{_quote(name)}"
+                       for name, col in names.items())
+
+    conn = sqlite3.connect(db_path)
+    try:
+        if keys is None:
+            query = f"SELECT {select} FROM {table} t ORDER BY t.{_quote(STORED_FID)}"
+        else:
+            conn.execute("CREATE TEMP TABLE csv_keys (key TEXT PRIMARY KEY)")
+            key_rows = [(key,) for key in pd.unique(pd.Series(keys).dropna().astype(str))]
+            for start in range(0, len(key_rows), KEY_INSERT_ROWS):
+                conn.executemany("INSERT INTO csv_keys VALUES (?)", key_rows[start:start + KEY_INSERT_ROWS])
+            query = (f"SELECT {select} FROM csv_keys k JOIN {table} t ON t.{key_column} = k.key "
+                     f"ORDER BY t.{_quote(STORED_FID)}")
+        frame = pd.read_sql_query(query, conn)
+    finally:
+        conn.close()
+    frame = frame.rename(columns=names)
+    # SQLite keeps only integers, reals and text; the key column holds normalize_keys strings
+    frame = frame.astype({col: column_map[col]['dtype'] for col in wanted if col != geo_field})
+    frame[geo_field] = frame[geo_field].astype('string')
+    return frame
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Cache Snapshot
+Persists the API server's warm caches (compressed responses, key indexes and
+spatial indexes) to a versioned, memory-mapped snapshot on local disk
+"""
+
+import json
+import logging
+import mmap
+import os
+import time
+import zlib
+from array import array
+from pathlib import Path
+
+from content_hash import file_sha256
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+
+def source_signature(path, previous=None):
+    """mtime/size/hash of a source file, reusing a previous hash when unchanged"""
+    stat = Path(path).stat()
+    signature = {'mtime': stat.st_mtime, 'size': stat.st_size}
+    if previous and previous.get('mtime') == stat.st_mtime and previous.get('size') == stat.st_size:
+        signature['sha256'] = previous['sha256']
+    else:
+        signature['sha256'] = file_sha256(path)
+    return signature
+
+
+def source_is_current(path, signature):
+    """Check a recorded signature against the file on disk
+
+    Matching mtime and size is accepted as-is; a touched file of the same size
+    (e.g. after a fresh checkout) is accepted only if its hash still matches.
+    """
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return False
+    if stat.st_size != signature['size']:
+        return False
+    if stat.st_mtime == signature['mtime']:
+        return True
+    return file_sha256(path) == signature['sha256']
+
+
+class BBoxIndex:
+    """Read-only sequence of (minx, miny, maxx, maxy) tuples over packed doubles"""
+
+    def __init__(self, buffer):
+        self.values = memoryview(buffer).cast('d')
+
+    def __len__(self):
+        return len(self.values) // 4
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return tuple(self.values[index * 4:index * 4 + 4])
+
+    def __iter__(self):
+        values = self.values
+        for start in range(0, len(values), 4):
+            yield tuple(values[start:start + 4])
+
+
+def save_snapshot(snapshot_dir, sources, responses, spatial_indexes, key_indexes, previous=None):
+    """Write a new snapshot and atomically switch the manifest to it
+
+    sources:          {dataset: path}
+    responses:        {(dataset, key): gzip bytes}
+    spatial_indexes:  {dataset: sequence of bbox tuples}
+    key_indexes:      {dataset: {field: {key: [feature indices]}}}
+    previous:         manifest of the snapshot being replaced (hash reuse)
+    """
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    previous_sources = (previous or {}).get('sources', {})
+
+    signatures = {}
+    for dataset, path in sources.items():
+        if Path(path).exists():
+            signatures[dataset] = source_signature(path, previous_sources.get(dataset))
+
+    data_name = f'snapshot-{int(time.time() * 1000)}.bin'
+    entries = []
+    offset = 0
+
+    with open(snapshot_dir / f'{data_name}.tmp', 'wb') as f:
+        def write_entry(blob, **entry):
+            nonlocal offset
+            # Keep every entry 8-byte aligned so packed doubles can be cast in place
+            padding = -offset % 8
+            f.write(b'\0' * padding)
+            offset += padding
+            f.write(blob)
+            entries.append(dict(entry, offset=offset, length=len(blob)))
+            offset += len(blob)
+
+        for (dataset, key), blob in responses.items():
+            if dataset in signatures:
+                write_entry(blob, kind='response', dataset=dataset, key=key)
+
+        for dataset, bboxes in spatial_indexes.items():
+            if dataset in signatures:
+                packed = array('d', [value for bbox in bboxes for value in bbox])
+                write_entry(packed.tobytes(), kind='spatial_index', dataset=dataset)
+
+        for dataset, fields in key_indexes.items():
+            if dataset not in signatures:
+                continue
+            for field, index in fields.items():
+                blob = zlib.compress(json.dumps(index, separators=(',', ':')).encode('utf-8'))
+                write_entry(blob, kind='key_index', dataset=dataset, field=field)
+
+    os.replace(snapshot_dir / f'{data_name}.tmp', snapshot_dir / data_name)
+
+    manifest = {
+        'version': SNAPSHOT_VERSION,
+        'created': time.time(),
+        'data_file': data_name,
+        'sources': signatures,
+        'entries': entries
+    }
+    manifest_tmp = snapshot_dir / f'{MANIFEST_NAME}.tmp'
+    manifest_tmp.write_text(json.dumps(manifest, indent=1))
+    os.replace(manifest_tmp, snapshot_dir / MANIFEST_NAME)
+
+    # Older data files stay readable by processes that still map them (POSIX)
+    for stale in snapshot_dir.glob('snapshot-*.bin'):
+        if stale.name != data_name:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+    logger.info(f"Saved cache snapshot with {len(entries)} entries ({offset / 1024 / 1024:.1f} MB)")
+    return manifest
+
+
+class Snapshot:
+    """A loaded snapshot; entries are served straight from the memory map"""
+
+    def __init__(self, manifest, data_map, sources):
+        self.manifest = manifest
+        self.map = data_map
+        self.sources = sources
+        self.entries = {}
+        for entry in manifest['entries']:
+            if entry['kind'] == 'response':
+                key = ('response', entry['dataset'], entry['key'])
+            elif entry['kind'] == 'spatial_index':
+                key = ('spatial_index', entry['dataset'])
+            else:
+                key = ('key_index', entry['dataset'], entry['field'])
+            self.entries[key] = entry
+
+    @classmethod
+    def load(cls, snapshot_dir, sources):
+        """Open a snapshot, keeping only datasets whose sources are unchanged"""
+        snapshot_dir = Path(snapshot_dir)
+        try:
+            manifest = json.loads((snapshot_dir / MANIFEST_NAME).read_text())
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(manifest, dict) or manifest.get('version') != SNAPSHOT_VERSION:
+            version = manifest.get('version') if isinstance(manifest, dict) else None
+            logger.info(f"Ignoring snapshot version {version}")
+            return None
+        if not all(key in manifest for key in ('data_file', 'sources', 'entries')):
+            logger.warning(f"Ignoring incomplete snapshot manifest in {snapshot_dir}")
+            return None
+
+        valid = {dataset for dataset, signature in manifest['sources'].items()
+                 if dataset in sources and source_is_current(sources[dataset], signature)}
+        stale = set(manifest['sources']) - valid
+        if stale:
+            logger.info(f"Snapshot entries dropped for changed sources: {sorted(stale)}")
+
+        manifest['sources'] = {d: s for d, s in manifest['sources'].items() if d in valid}
+        for dataset, signature in manifest['sources'].items():
+            # A touched-but-identical file is current under its new mtime
+            signature['mtime'] = Path(sources[dataset]).stat().st_mtime
+        manifest['entries'] = [e for e in manifest['entries'] if e['dataset'] in valid]
+
+        data_map = None
+        data_file = snapshot_dir / manifest['data_file']
+        if manifest['entries']:
+            try:
+                with open(data_file, 'rb') as f:
+                    data_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not map snapshot data {data_file}: {e}")
+                return None
+            # A truncated data file would otherwise serve short, corrupt blobs
+            end = max(e['offset'] + e['length'] for e in manifest['entries'])
+            if len(data_map) < end:
+                logger.warning(f"Snapshot data {data_file} is truncated "
+                               f"({len(data_map):,} of {end:,} bytes)")
+                data_map.close()
+                return None
+
+        logger.info(f"Loaded cache snapshot with {len(manifest['entries'])} entries")
+        return cls(manifest, data_map, sources)
+
+    def _is_current(self, dataset):
+        signature = self.manifest['sources'].get(dataset)
+        if not signature:
+            return False
+        try:
+            return Path(self.sources[dataset]).stat().st_mtime == signature['mtime']
+        except OSError:
+            return False
+
+    def _blob(self, entry):
+        return self.map[entry['offset']:entry['offset'] + entry['length']]
+
+    def response(self, dataset, key):
+        """Compressed response bytes, or None"""
+        entry = self.entries.get(('response', dataset, key))
+        if entry is None or not self._is_current(dataset):
+            return None
+        return self._blob(entry)
+
+    def responses(self):
+        """All still-current responses as {(dataset, key): bytes}"""
+        return {(e['dataset'], e['key']): self._blob(e)
+                for e in self.manifest['entries']
+                if e['kind'] == 'response' and self._is_current(e['dataset'])}
+
+    def spatial_index(self, dataset, feature_count):
+        """Zero-copy bbox index for a dataset, or None if it doesn't fit"""
+        entry = self.entries.get(('spatial_index', dataset))
+        if entry is None or not self._is_current(dataset):
+            return None
+        index = BBoxIndex(memoryview(self.map)[entry['offset']:entry['offset'] + entry['length']])
+        return index if len(index) == feature_count else None
+
+    def spatial_indexes(self):
+        """All still-current bbox indexes as {dataset: BBoxIndex}"""
+        return {e['dataset']: BBoxIndex(memoryview(self.map)[e['offset']:e['offset'] + e['length']])
+                for e in self.manifest['entries']
+                if e['kind'] == 'spatial_index' and self._is_current(e['dataset'])}
+
+    def key_indexes(self, dataset):
+        """{field: {key: [feature indices]}} for a dataset"""
+        if not self._is_current(dataset):
+            return {}
+        return {e['field']: json.loads(zlib.decompress(self._blob(e)))
+                for e in self.manifest['entries']
+                if e['kind'] == 'key_index' and e['dataset'] == dataset}
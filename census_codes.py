@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Census Codes
+State FIPS/abbreviation/name lookups shared by the join tools
+"""
+
+from __future__ import annotations
+
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+# (FIPS, USPS abbreviation, name)
+STATES = [
+    ('01', 'AL', 'Alabama'), ('02', 'AK', 'Alaska'), ('04', 'AZ', 'Arizona'),
+    ('05', 'AR', 'Arkansas'), ('06', 'CA', 'California'), ('08', 'CO', 'Colorado'),
+    ('09', 'CT', 'Connecticut'), ('10', 'DE', 'Delaware'), ('11', 'DC', 'District of Columbia'),
+    ('12', 'FL', 'Florida'), ('13', 'GA', 'Georgia'), ('15', 'HI', 'Hawaii'),
+    ('16', 'ID', 'Idaho'), ('17', 'IL', 'Illinois'), ('18', 'IN', 'Indiana'),
+    ('19', 'IA', 'Iowa'), ('20', 'KS', 'Kansas'), ('21', 'KY', 'Kentucky'),
+    ('22', 'LA', 'Louisiana'), ('23', 'ME', 'Maine'), ('24', 'MD', 'Maryland'),
+    ('25', 'MA', 'Massachusetts'), ('26', 'MI', 'Michigan'), ('27', 'MN', 'Minnesota'),
+    ('28', 'MS', 'Mississippi'), ('29', 'MO', 'Missouri'), ('30', 'MT', 'Montana'),
+    ('31', 'NE', 'Nebraska'), ('32', 'NV', 'Nevada'), ('33', 'NH', 'New Hampshire'),
+    ('34', 'NJ', 'New Jersey'), ('35', 'NM', 'New Mexico'), ('36', 'NY', 'New York'),
+    ('37', 'NC', 'North Carolina'), ('38', 'ND', 'North Dakota'), ('39', 'OH', 'Ohio'),
+    ('40', 'OK', 'Oklahoma'), ('41', 'OR', 'Oregon'), ('42', 'PA', 'Pennsylvania'),
+    ('44', 'RI', 'Rhode Island'), ('45', 'SC', 'South Carolina'), ('46', 'SD', 'South Dakota'),
+    ('47', 'TN', 'Tennessee'), ('48', 'TX', 'Texas'), ('49', 'UT', 'Utah'),
+    ('50', 'VT', 'Vermont'), ('51', 'VA', 'Virginia'), ('53', 'WA', 'Washington'),
+    ('54', 'WV', 'West Virginia'), ('55', 'WI', 'Wisconsin'), ('56', 'WY', 'Wyoming'),
+    ('60', 'AS', 'American Samoa'), ('66', 'GU', 'Guam'), ('69', 'MP', 'Northern Mariana Islands'),
+    ('72', 'PR', 'Puerto Rico'), ('78', 'VI', 'U.S. Virgin Islands')
+]
+
+STATE_FIPS_BY_ABBR = {abbr: fips for fips, abbr, _ in STATES}
+STATE_FIPS_BY_NAME = {name.upper(): fips for fips, _, name in STATES}
+STATE_NAME_BY_FIPS = {fips: name for fips, _, name in STATES}
+
+# Every accepted spelling (upper case) -> 2-digit FIPS
+STATE_FIPS_LOOKUP = {}
+for _fips, _abbr, _name in STATES:
+    STATE_FIPS_LOOKUP.update({
+        _fips: _fips,
+        str(int(_fips)): _fips,
+        _abbr: _fips,
+        _name.upper(): _fips
+    })
+STATE_FIPS_LOOKUP.update({'WASHINGTON DC': '11', 'WASHINGTON D.C.': '11', 'D.C.': '11',
+                          'VIRGIN ISLANDS': '78', 'US VIRGIN ISLANDS': '78'})
+
+
+def state_to_fips(values: pd.Series) -> pd.Series:
+    """Map state FIPS codes, abbreviations or names to 2-digit FIPS (NA if unknown)"""
+    text = values.astype('string').str.strip().str.upper().str.replace(r'\.0$', '', regex=True)
+    return text.map(STATE_FIPS_LOOKUP).astype('string')
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Composite Join Keys
+Normalizes several key columns (state + county name, state + place name ...)
+and hashes them into one uint64 key per row, so multi-column joins run as a
+single vectorized hash merge
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import List, Optional, Tuple
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+from join_keys import detect_key_type, normalize_keys
+from name_matching import NameMatcher, normalize_names, split_state
+
+logger = logging.getLogger(__name__)
+
+# Separates the component fields of a composite key ('STATE,NAME')
+COMPOSITE_SEPARATOR = ','
+
+# Column holding the hashed composite key while joining
+COMPOSITE_KEY = '_composite_key'
+
+
+def split_key_fields(field: str) -> List[str]:
+    """Component fields of a (possibly composite) join field"""
+    return [part.strip() for part in str(field).split(COMPOSITE_SEPARATOR) if part.strip()]
+
+
+def is_composite(field: str) -> bool:
+    return len(split_key_fields(field)) > 1
+
+
+def component_key_types(frame: pd.DataFrame, fields: List[str]) -> List[str]:
+    """join_keys key type of each component, detected from the layer's values"""
+    return [detect_key_type(frame[field], field) for field in fields]
+
+
+def normalize_component(values: pd.Series, key_type: str) -> pd.Series:
+    """One component normalized for hashing: names like name_matching, codes like join_keys"""
+    if key_type == 'name':
+        stripped, _ = split_state(values)
+        return normalize_names(stripped)
+    normalized, _ = normalize_keys(values, key_type)
+    return normalized
+
+
+def composite_keys(frame: pd.DataFrame, fields: List[str], key_types: List[str]) -> pd.Series:
+    """Hash of every row's normalized components (UInt64; NA when any component is missing)"""
+    parts = pd.DataFrame({str(i): normalize_component(frame[field], key_type).to_numpy()
+                          for i, (field, key_type) in enumerate(zip(fields, key_types))})
+    hashes = pd.util.hash_pandas_object(parts, index=False).to_numpy()
+    missing = parts.isna().any(axis=1).to_numpy() | (parts == '').any(axis=1).to_numpy()
+    return pd.Series(pd.arrays.IntegerArray(hashes, missing), index=frame.index)
+
+
+def fuzzy_components(key_types: List[str]) -> Optional[Tuple[int, Optional[int]]]:
+    """(name position, state position or None) when unmatched composites can be fuzzy-matched
+
+    That takes exactly one name component, plus at most one state component
+    to block the name matches by.
+    """
+    names = [i for i, key_type in enumerate(key_types) if key_type == 'name']
+    states = [i for i, key_type in enumerate(key_types) if key_type == 'state']
+    if len(names) != 1 or len(states) + 1 != len(key_types):
+        return None
+    return names[0], states[0] if states else None
+
+
+def match_leftovers(leftovers: pd.DataFrame, geo_df: pd.DataFrame, geo_keys: pd.Series,
+                    csv_fields: List[str], geo_fields: List[str], positions: Tuple[int, Optional[int]],
+                    threshold: int = 80) -> Tuple[pd.DataFrame, int]:
+    """Fuzzy-match CSV rows whose composite found no exact partner
+
+    Returns (the matched rows with COMPOSITE_KEY set to the key of the layer
+    feature they matched, rows rejected as ambiguous). A match that names
+    several features, such as a name shared across states with no state to
+    narrow it down, is ambiguous and left unmatched.
+    """
+    name, state = positions
+    matcher = NameMatcher(geo_df[geo_fields[name]],
+                          geo_df[geo_fields[state]] if state is not None else None,
+                          threshold=threshold)
+    match_keys = matcher.match(leftovers[csv_fields[name]],
+                               leftovers[csv_fields[state]] if state is not None else None)
+    lookup = matcher.lookup_table()
+    features = lookup['key'].value_counts()
+    ambiguous = match_keys.isin(features.index[features > 1]).to_numpy()
+    if ambiguous.any():
+        logger.warning(f"{int(ambiguous.sum()):,} CSV rows match several layer features by name; "
+                       f"left unmatched")
+    matched = leftovers[~ambiguous].assign(_match_key=match_keys[~ambiguous].to_numpy()).merge(
+        lookup, left_on='_match_key', right_on='key', how='inner')
+    matched[COMPOSITE_KEY] = geo_keys.to_numpy()[matched['row'].to_numpy()]
+    return matched.drop(columns=['_match_key', 'key', 'row']), int(ambiguous.sum())
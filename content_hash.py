@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Content Hashing
+SHA-256 helpers shared by the job queue, the server's cache snapshot and the
+joiner's result cache
+"""
+
+import hashlib
+import json
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    """Stream a file through SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_key(kind, spec, payload=b''):
+    """Content address: same kind, spec and input -> same key"""
+    digest = hashlib.sha256()
+    digest.update(kind.encode('utf-8'))
+    digest.update(json.dumps(spec, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(hashlib.sha256(payload).digest())
+    return digest.hexdigest()[:24]
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Areal-Interpolation Crosswalks
+Overlays two layers once (intersection areas computed across a process pool),
+stores source -> target allocation weights as a sparse COO matrix on disk, and
+reapplies them to any CSV with np.bincount
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+gpd = lazy_import('geopandas')
+shapely = lazy_import('shapely')
+
+from spatial_join import locate_points
+
+logger = logging.getLogger(__name__)
+
+# Equal-area CRS for intersection areas (global, so any catalog layer works)
+AREA_CRS = 'EPSG:6933'
+
+# Candidate polygon pairs intersected per worker task
+OVERLAY_CHUNK_PAIRS = 5000
+
+# How a source unit's value is split among the target units it overlaps
+WEIGHT_METHODS = ['area', 'population']
+
+# Per-worker geometry arrays, set once by _init_worker
+_worker_source = None
+_worker_target = None
+
+
+def _init_worker(source_wkb, target_wkb):
+    global _worker_source, _worker_target
+    _worker_source = shapely.from_wkb(source_wkb)
+    _worker_target = shapely.from_wkb(target_wkb)
+
+
+def _intersection_areas(pairs):
+    rows, cols = pairs
+    return shapely.area(shapely.intersection(_worker_source[rows], _worker_target[cols]))
+
+
+def overlay_areas(source: np.ndarray, target: np.ndarray, workers: Optional[int] = None):
+    """Intersection area of every overlapping (source, target) polygon pair
+
+    Candidate pairs come from an STRtree; their intersections are computed
+    in chunks across a process pool. Geometries must be in an equal-area
+    CRS. Returns (source rows, target cols, areas) for areas > 0.
+    """
+    rows, cols = shapely.STRtree(target).query(source, predicate='intersects')
+    workers = workers or os.cpu_count() or 1
+    chunks = [(rows[start:start + OVERLAY_CHUNK_PAIRS], cols[start:start + OVERLAY_CHUNK_PAIRS])
+              for start in range(0, len(rows), OVERLAY_CHUNK_PAIRS)]
+
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(shapely.to_wkb(source), shapely.to_wkb(target))) as pool:
+            areas = np.concatenate(list(pool.map(_intersection_areas, chunks)))
+    else:
+        areas = shapely.area(shapely.intersection(source[rows], target[cols]))
+
+    keep = areas > 0
+    logger.info(f"Overlay: {int(keep.sum()):,} overlapping pairs from {len(rows):,} candidates")
+    return rows[keep], cols[keep], areas[keep]
+
+
+def _population_pairs(source_wgs84: np.ndarray, target_wgs84: np.ndarray,
+                      weight_layer: gpd.GeoDataFrame, weight_field: str):
+    """Population per (source, target) pair from a finer layer's representative points"""
+    points = weight_layer.to_crs(4326).geometry.representative_point()
+    lon, lat = points.x.to_numpy(), points.y.to_numpy()
+    population = pd.to_numeric(weight_layer[weight_field], errors='coerce').fillna(0).to_numpy()
+
+    in_source = locate_points(shapely.STRtree(source_wgs84), lon, lat)
+    in_target = locate_points(shapely.STRtree(target_wgs84), lon, lat)
+    source_totals = np.bincount(in_source[in_source >= 0], weights=population[in_source >= 0],
+                                minlength=len(source_wgs84))
+
+    both = (in_source >= 0) & (in_target >= 0)
+    pairs = pd.DataFrame({'row': in_source[both], 'col': in_target[both], 'population': population[both]})
+    pairs = pairs.groupby(['row', 'col'], as_index=False)['population'].sum()
+    return pairs, source_totals
+
+
+class Crosswalk:
+    """Sparse source -> target allocation weights
+
+    weights[i] is the share of source unit rows[i] that falls in target unit
+    cols[i]; source_size holds each source unit's total area or population
+    (the denominator of those shares, used to average rates). Keys are
+    normalized as source_key_type (join_keys) on the source side.
+    """
+
+    def __init__(self, source_keys, target_keys, rows, cols, weights, source_size,
+                 method: str = 'area', source_key_type: str = 'name'):
+        self.source_keys = pd.Index(np.asarray(source_keys, dtype=object))
+        self.target_keys = np.asarray(target_keys, dtype=object)
+        self.rows = np.asarray(rows, dtype='int64')
+        self.cols = np.asarray(cols, dtype='int64')
+        self.weights = np.asarray(weights, dtype='float64')
+        self.source_size = np.asarray(source_size, dtype='float64')
+        self.method = method
+        self.source_key_type = source_key_type
+
+    @classmethod
+    def build(cls, source: gpd.GeoDataFrame, source_keys: pd.Series,
+              target: gpd.GeoDataFrame, target_keys: pd.Series,
+              method: str = 'area', weight_layer: Optional[gpd.GeoDataFrame] = None,
+              weight_field: Optional[str] = None, workers: Optional[int] = None,
+              source_key_type: str = 'name') -> 'Crosswalk':
+        """Overlay two layers and compute allocation weights
+
+        'area' splits each source unit by intersection area. 'population'
+        splits it by the weight_field totals of a finer weight_layer's units
+        (located by representative point); source units with no population
+        fall back to area shares.
+        """
+        if method not in WEIGHT_METHODS:
+            raise ValueError(f"Unknown crosswalk method '{method}' (expected one of {WEIGHT_METHODS})")
+        if method == 'population' and (weight_layer is None or not weight_field):
+            raise ValueError("Population weights need a weight layer and weight field")
+
+        source_area = source.geometry.to_crs(AREA_CRS).values
+        target_area = target.geometry.to_crs(AREA_CRS).values
+        rows, cols, measure = overlay_areas(source_area, target_area, workers)
+        size = np.nan_to_num(shapely.area(source_area))  # empty or broken geometries -> 0
+
+        if method == 'population':
+            pairs, population = _population_pairs(source.geometry.to_crs(4326).values,
+                                                  target.geometry.to_crs(4326).values,
+                                                  weight_layer, weight_field)
+            populated = population > 0
+            area_pairs = ~populated[rows]
+            rows = np.concatenate([rows[area_pairs], pairs['row'].to_numpy()])
+            cols = np.concatenate([cols[area_pairs], pairs['col'].to_numpy()])
+            measure = np.concatenate([measure[area_pairs], pairs['population'].to_numpy()])
+            size = np.where(populated, population, size)
+            logger.info(f"Population weights for {int(populated.sum()):,} of {len(size):,} source units")
+
+        # Features sharing a key (multi-part units) become one unit
+        source_codes, source_unique = pd.factorize(source_keys)
+        target_codes, target_unique = pd.factorize(target_keys)
+        keep = (source_codes[rows] >= 0) & (target_codes[cols] >= 0)
+        pairs = pd.DataFrame({'row': source_codes[rows][keep], 'col': target_codes[cols][keep],
+                              'measure': measure[keep]}).groupby(['row', 'col'], as_index=False).sum()
+        keyed = source_codes >= 0
+        size = np.bincount(source_codes[keyed], weights=size[keyed], minlength=len(source_unique))
+
+        rows, cols = pairs['row'].to_numpy(), pairs['col'].to_numpy()
+        weights = pairs['measure'].to_numpy() / np.where(size > 0, size, 1)[rows]
+        return cls(source_unique, target_unique, rows, cols, np.minimum(weights, 1.0), size,
+                   method, source_key_type)
+
+    def save(self, path):
+        """Write the crosswalk as a compressed .npz"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, source_keys=self.source_keys.to_numpy().astype(str),
+                            target_keys=self.target_keys.astype(str), rows=self.rows,
+                            cols=self.cols, weights=self.weights,
+                            source_size=self.source_size, method=self.method,
+                            source_key_type=self.source_key_type)
+
+    @classmethod
+    def load(cls, path) -> 'Crosswalk':
+        data = np.load(path, allow_pickle=False)
+        return cls(data['source_keys'], data['target_keys'], data['rows'], data['cols'],
+                   data['weights'], data['source_size'], str(data['method']),
+                   str(data['source_key_type']))
+
+    def apply(self, df: pd.DataFrame, key_field: str, columns: Iterable[str],
+              intensive: Iterable[str] = (), target_field: Optional[str] = None) -> pd.DataFrame:
+        """Allocate source-keyed CSV values to target units
+
+        Counts (columns) are split by weight and summed per target; intensive
+        columns (rates, medians) become averages weighted by each source
+        unit's overlapping area or population. Returns one row per target
+        unit that received data, keyed by target_field (default key_field).
+        """
+        columns, intensive = list(columns), list(intensive)
+        values = df[[key_field] + columns].copy()
+        for column in columns:
+            values[column] = pd.to_numeric(values[column], errors='coerce')
+        per_source = values.groupby(key_field)[columns].agg(
+            {column: 'mean' if column in intensive else 'sum' for column in columns})
+
+        positions = self.source_keys.get_indexer(per_source.index)
+        known = positions >= 0
+        if not known.all():
+            logger.info(f"Crosswalk: {int((~known).sum()):,} CSV keys not in the source layer")
+
+        result = {}
+        share = self.weights * self.source_size[self.rows]
+        n_target = len(self.target_keys)
+        covered = np.zeros(n_target, dtype=bool)
+        for column in columns:
+            source_values = np.full(len(self.source_keys), np.nan)
+            source_values[positions[known]] = per_source[column].to_numpy(dtype='float64')[known]
+            x = source_values[self.rows]
+            has = ~np.isnan(x)
+            if column in intensive:
+                totals = np.bincount(self.cols[has], weights=(share * x)[has], minlength=n_target)
+                denominators = np.bincount(self.cols[has], weights=share[has], minlength=n_target)
+                result[column] = totals / np.where(denominators > 0, denominators, np.nan)
+            else:
+                result[column] = np.bincount(self.cols[has], weights=(self.weights * x)[has],
+                                             minlength=n_target)
+            covered |= np.bincount(self.cols[has], minlength=n_target) > 0
+
+        allocated = pd.DataFrame(result)
+        allocated.insert(0, target_field or key_field, pd.array(self.target_keys, dtype='string'))
+        return allocated[covered].reset_index(drop=True)
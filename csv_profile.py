@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth CSV Profiler
+Counts rows with a memory-mapped newline scan and profiles columns from a
+random sample: key-type confidence, null rate and distinct-value estimates
+"""
+
+from __future__ import annotations
+
+import io
+import itertools
+import logging
+import math
+import mmap
+import random
+from pathlib import Path
+from typing import Dict, Tuple
+
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+from census_codes import STATE_FIPS_LOOKUP
+from join_keys import clean_keys
+
+logger = logging.getLogger(__name__)
+
+# Files up to this size are parsed completely (exact counts, exact sample)
+FULL_READ_MB = 32
+
+# Rows in a profiling sample (a uniform reservoir sample for larger files)
+SAMPLE_ROWS = 5000
+
+# Bytes scanned per step when counting newlines
+_SCAN_BYTES = 64 * 1024 * 1024
+
+# Value patterns scored for every column, in tie-break order
+PATTERNS = ['state_fips', 'county_fips', 'zip', 'tract', 'block_group', 'state', 'numeric', 'name']
+
+
+def count_rows(path) -> int:
+    """Data rows in a CSV (newlines minus the header) via a memory-mapped scan
+
+    Quoted fields that contain newlines are counted as extra rows.
+    """
+    with open(path, 'rb') as f:
+        size = Path(path).stat().st_size
+        if size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = sum(mm[start:start + _SCAN_BYTES].count(b'\n')
+                        for start in range(0, size, _SCAN_BYTES))
+            if mm[size - 1:size] != b'\n':
+                lines += 1
+    return max(lines - 1, 0)
+
+
+def reservoir_lines(lines, size: int, rng: random.Random):
+    """Uniform random sample of size items from an iterator, in their original order
+
+    Algorithm L: after the reservoir fills, a geometric skip count decides
+    which item replaces a reservoir slot next, so most items cost only an
+    iteration step.
+    """
+    reservoir = list(enumerate(itertools.islice(lines, size)))
+    if len(reservoir) < size:
+        return [line for _, line in reservoir]
+
+    def uniform():
+        return rng.random() or 1e-300  # log(0) is undefined
+
+    weight = math.exp(math.log(uniform()) / size)
+    next_index = size + int(math.log(uniform()) / math.log(1 - weight))
+    for index, line in enumerate(lines, start=size):
+        if index == next_index:
+            reservoir[rng.randrange(size)] = (index, line)
+            weight *= math.exp(math.log(uniform()) / size)
+            next_index += int(math.log(uniform()) / math.log(1 - weight)) + 1
+    return [line for _, line in sorted(reservoir)]
+
+
+def sample_rows(path, sample_rows: int = SAMPLE_ROWS, seed: int = 0) -> Tuple[pd.DataFrame, bool]:
+    """Read a uniform random sample of rows as strings
+
+    Small files are read completely. Larger files are streamed once as raw
+    lines into a reservoir sample, so only sample_rows lines are ever
+    parsed, and sorted files (e.g. by GEOID) are sampled evenly. Quoted
+    fields containing newlines can break a sampled record; such lines are
+    skipped. Returns (sample, sample_is_whole_file).
+    """
+    path = Path(path)
+    if path.stat().st_size <= FULL_READ_MB * 1024 * 1024:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[''])
+        if len(df) > sample_rows:
+            return df.sample(sample_rows, random_state=seed).sort_index(), False
+        return df, True
+
+    with open(path, 'rb') as f:
+        header = f.readline()
+        lines = reservoir_lines(f, sample_rows, random.Random(seed))
+
+    data = header + b''.join(line if line.endswith(b'\n') else line + b'\n' for line in lines)
+    df = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, na_values=[''],
+                     on_bad_lines='skip', encoding_errors='replace')
+    return df, False
+
+
+def distinct_estimate(values: pd.Series, population: float, exact: bool) -> int:
+    """Distinct values in the full column, from a sample (bias-corrected Chao1)"""
+    counts = values.value_counts()
+    if exact or len(values) == 0:
+        return int(len(counts))
+    singletons = int((counts == 1).sum())
+    doubletons = int((counts == 2).sum())
+    estimate = len(counts) + singletons * (singletons - 1) / (2 * (doubletons + 1))
+    return int(min(round(estimate), round(population)))
+
+
+def column_profiles(df: pd.DataFrame, total_rows: int, exact: bool = False) -> Dict[str, Dict]:
+    """Per-column type confidence, null rate and distinct estimate for a sample"""
+    profiles = {}
+    for column in df.columns:
+        raw = df[column].astype('string')
+        nulls = raw.isna() | (raw.str.strip() == '')
+        values = raw[~nulls]
+        cleaned, _ = clean_keys(values)
+
+        digits = cleaned.str.fullmatch(r'\d+').fillna(False)
+        lengths = cleaned.str.len()
+        rates = {
+            'state_fips': digits & lengths.between(1, 2),
+            'county_fips': digits & lengths.between(4, 5),
+            'zip': cleaned.str.fullmatch(r'\d{3,5}(-?\d{4})?').fillna(False),  # 3-4 digits: lost zeros
+            'tract': digits & lengths.between(10, 11),
+            'block_group': digits & (lengths == 12),
+            'state': ~digits & cleaned.str.upper().isin(STATE_FIPS_LOOKUP.keys()),
+            'numeric': pd.to_numeric(values, errors='coerce').notna(),
+            'name': cleaned.str.contains(r'[A-Za-z]{3}').fillna(False)
+        }
+        rates = {pattern: round(float(match.mean()), 3) if len(values) else 0.0
+                 for pattern, match in rates.items()}
+        inferred = max(PATTERNS, key=lambda pattern: (rates[pattern], -PATTERNS.index(pattern)))
+
+        null_rate = float(nulls.mean()) if len(raw) else 0.0
+        profiles[column] = {
+            'inferred_type': inferred if rates[inferred] > 0 else 'empty',
+            'confidence': rates[inferred],
+            'pattern_rates': {pattern: rate for pattern, rate in rates.items() if rate},
+            'null_rate': round(null_rate, 4),
+            'distinct_estimate': distinct_estimate(values, total_rows * (1 - null_rate), exact),
+            'sample': values.head(3).tolist()
+        }
+    return profiles
@@ -4,73 +4,321 @@ ChloraPleth CSV-to-Shapefile Join Tool
 Joins CSV data to geospatial layers using various geographic identifiers
 """
 
-import pandas as pd
-import geopandas as gpd
+from __future__ import annotations
+
+import ast
 import sqlite3
 from pathlib import Path
 import logging
+import os
+import threading
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from collections import Counter, OrderedDict
+from contextlib import contextmanager, nullcontext
+from itertools import groupby
 from typing import Dict, List, Tuple, Optional
 import re
-from fuzzywuzzy import fuzz, process
 import json
 
+from lazy_imports import lazy_import
+
+# Heavy libraries load on first use, so metadata commands start quickly
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+gpd = lazy_import('geopandas')
+
+from attribute_store import attribute_store_path, read_stored_attributes, stored_layer
+from composite_keys import (COMPOSITE_KEY, component_key_types, composite_keys, fuzzy_components,
+                            is_composite, match_leftovers, split_key_fields)
+from crosswalk import Crosswalk
+from frame_memory import frame_bytes, optimize_frame
+from csv_profile import column_profiles, count_rows, sample_rows
+from join_keys import (KEY_WIDTHS, detect_key_type, is_rollup, key_widths, log_repairs, may_roll_up,
+                       normalize_keys, rollup_keys, width_key_type)
+from layer_keys import (COMPATIBLE_KEY_TYPES, build_key_index, load_key_indexes, rank_join_fields,
+                        save_key_index)
+from name_matching import NameMatcher, detect_csv_state_field, detect_state_field
+from result_cache import JoinResultCache, changed_keys, key_digests, layer_signature
+from out_of_core import (OUT_OF_CORE_MEMORY_MB, KeyLookup, BatchWriter, batch_features, layer_batches,
+                         read_sample)
+from partitioned_join import (NO_STATE, PARTITION_KEY_TYPES, combine_stats, join_partition,
+                              partition_csv, state_prefix)
+from stage_timer import StageTimer, print_timings
+from spatial_join import POINT_CHUNK_ROWS, PointLocator, detect_point_fields
+
+pyogrio = lazy_import('pyogrio', optional=True)  # geopandas falls back to fiona
+pyarrow = lazy_import('pyarrow', optional=True)  # GeoParquet export unavailable
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Memory budget for layers kept between joins (per process)
+LAYER_CACHE_MB = 1024
+
+# Helper columns used while joining (never present in results)
+FEATURE_ID = '_feature_id'
+CSV_ROW_ID = '_csv_row'
+JOIN_INDICATOR = '_join_match'
+
+# Rows per chunk when streaming a CSV for aggregation
+CSV_CHUNK_ROWS = 250_000
+
+# Aggregations supported when streaming a CSV, and how partials combine
+AGGREGATIONS = ['sum', 'count', 'mean', 'min', 'max', 'weighted_mean']
+_PARTIAL_COMBINE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max',
+                    'wsum': 'sum', 'weight': 'sum'}
+_PARTIAL_STATS = {'mean': ['sum', 'count'], 'weighted_mean': ['wsum', 'weight']}
+
+# Export formats and their file extensions
+EXPORT_FORMATS = {
+    'geojson': '.geojson',
+    'shapefile': '.shp',
+    'csv': '.csv',
+    'gpkg': '.gpkg',
+    'geoparquet': '.parquet',
+    'flatgeobuf': '.fgb'
+}
+
+# Files that make up one shapefile (counted together in export benchmarks)
+SHAPEFILE_PARTS = ['.shp', '.shx', '.dbf', '.prj', '.cpg']
+
+# Parallel output writers in batch mode
+BATCH_WRITERS = 4
+
+# Per-job options accepted in a batch manifest (besides csv/layer/fields/output)
+BATCH_OPTIONS = ['format', 'fuzzy', 'matched_only', 'geo_columns', 'aggregate', 'chunksize', 'weight_field']
+
+# Joined rows buffered before each append to a partitioned join's GPKG
+PARTITION_APPEND_ROWS = 200_000
+
+# Largest share of a CSV's keys that may change for an incremental re-join
+INCREMENTAL_MAX_CHANGED = 0.5
+
+# Cached headers of scanned layers (used without a metadata database), under the data directory
+LAYER_SCAN_CACHE = '.layer_scan.json'
+
+# Stored crosswalks (overlay allocation weights), under the data directory
+CROSSWALK_DIR = 'crosswalks'
+
+# Distinct sampled values per CSV column checked against layer key sets
+KEY_SAMPLE_VALUES = 2000
+
+# Share of sampled values that must match a key pattern
+KEY_CONFIDENCE = 0.8
+
+# Layer fields that hold place names (eligible for fuzzy matching)
+NAME_FIELDS = ['NAME', 'NAMELSAD', 'BASENAME', 'COUNTY']
+
+class LayerCache:
+    """Process-wide LRU cache of loaded layers, keyed by path and mtime
+    
+    Callers get shallow copies: the cached frame's columns are shared, and
+    assigning a column on the copy (as join-field preparation does) replaces
+    it in the copy only, so the cached frame is never mutated.
+    
+    Layers pinned with pin() are kept regardless of the budget until
+    unpinned; the budget is then enforced again.
+    """
+    
+    def __init__(self, max_mb=LAYER_CACHE_MB):
+        self.max_bytes = max_mb * 1024 * 1024
+        self.entries = OrderedDict()  # (path, variant) -> (mtime, frame, nbytes)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.pinned = Counter()  # resolved path -> pin count
+        self.lock = threading.Lock()
+    
+    frame_bytes = staticmethod(frame_bytes)
+    
+    def get(self, path, loader=None, variant=()):
+        """Return a copy-on-write view of a layer, loading it on a miss"""
+        path = str(Path(path).resolve())
+        mtime = os.path.getmtime(path)
+        key = (path, variant)
+        
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached and cached[0] == mtime:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return cached[1].copy(deep=False)
+            self.misses += 1
+        
+        frame = loader() if loader else gpd.read_file(path)
+        nbytes = self.frame_bytes(frame)
+        
+        with self.lock:
+            stale = self.entries.pop(key, None)
+            if stale:
+                self.total_bytes -= stale[2]
+            if nbytes <= self.max_bytes or path in self.pinned:
+                self.entries[key] = (mtime, frame, nbytes)
+                self.total_bytes += nbytes
+                self._evict()
+            else:
+                logger.info(f"{Path(path).name} ({nbytes / 1024 / 1024:.0f} MB) exceeds the "
+                            f"layer cache budget; not cached")
+        
+        return frame.copy(deep=False)
+    
+    def _evict(self):
+        """Drop least recently used unpinned layers until the budget holds (lock held)"""
+        while self.total_bytes > self.max_bytes:
+            evicted_key = next((key for key in self.entries if key[0] not in self.pinned), None)
+            if evicted_key is None:
+                return
+            _, _, evicted_bytes = self.entries.pop(evicted_key)
+            self.total_bytes -= evicted_bytes
+            logger.info(f"Evicted {Path(evicted_key[0]).name} from layer cache")
+    
+    @contextmanager
+    def pin(self, path):
+        """Keep a layer cached while the block runs, even beyond the budget"""
+        path = str(Path(path).resolve())
+        with self.lock:
+            self.pinned[path] += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.pinned[path] -= 1
+                if not self.pinned[path]:
+                    del self.pinned[path]
+                self._evict()
+    
+    def clear(self):
+        """Drop all cached layers"""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+    
+    def stats(self) -> Dict:
+        """Cache occupancy and hit counts"""
+        with self.lock:
+            return {
+                'layers': len(self.entries),
+                'size_mb': round(self.total_bytes / 1024 / 1024, 1),
+                'budget_mb': round(self.max_bytes / 1024 / 1024, 1),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+layer_cache = LayerCache()
+
 class CSVShapefileJoiner:
     """Main class for joining CSV data to geospatial layers"""
     
     def __init__(self, data_dir="data", metadata_db="gis_metadata.db"):
         self.data_dir = Path(data_dir)
         self.metadata_db = metadata_db
-        self.available_layers = self.load_available_layers()
-        
+        self.attribute_store = attribute_store_path(metadata_db)
+        self._key_indexes = None
+        self.result_cache = JoinResultCache()
+        self._available_layers = None
+
+    @property
+    def available_layers(self) -> Dict:
+        """Layer catalog, read on first use"""
+        if self._available_layers is None:
+            self._available_layers = self.load_available_layers()
+        return self._available_layers
+
+    @available_layers.setter
+    def available_layers(self, layers: Dict):
+        self._available_layers = layers
+
     def load_available_layers(self) -> Dict:
         """Load available geospatial layers from metadata database"""
+        if not Path(self.metadata_db).exists():
+            logger.warning(f"No metadata database at {self.metadata_db}")
+            return self.scan_data_directory()
         try:
             conn = sqlite3.connect(self.metadata_db)
-            query = "SELECT * FROM gis_inventory"
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-            
+            try:
+                rows = conn.execute("SELECT filename, path, type, geography_level, record_count, "
+                                    "crs, join_fields, coverage_area FROM gis_inventory").fetchall()
+            finally:
+                conn.close()
+
             layers = {}
-            for _, row in df.iterrows():
-                layers[row['filename']] = {
-                    'path': row['path'],
-                    'type': row['type'],
-                    'geography_level': row['geography_level'],
-                    'record_count': row['record_count'],
-                    'crs': row['crs'],
-                    'join_fields': eval(row['join_fields']) if row['join_fields'] != 'nan' else [],
-                    'coverage_area': row['coverage_area']
+            for filename, path, layer_type, level, records, crs, join_fields, coverage in rows:
+                layers[filename] = {
+                    'path': path,
+                    'type': layer_type,
+                    'geography_level': level,
+                    'record_count': records,
+                    'crs': crs,
+                    'join_fields': (ast.literal_eval(join_fields)
+                                    if join_fields and join_fields not in ('nan', 'None') else []),
+                    'coverage_area': coverage
                 }
-            
+
             logger.info(f"Loaded {len(layers)} available layers")
             return layers
-            
+
         except Exception as e:
             logger.warning(f"Could not load metadata: {e}")
             return self.scan_data_directory()
-    
+
     def scan_data_directory(self) -> Dict:
-        """Fallback: scan data directory for available layers"""
-        layers = {}
-        for file_path in self.data_dir.glob('*.json'):
+        """Fallback: scan data directory for available layers
+
+        Each layer's header (fields, CRS, feature count) is cached in
+        LAYER_SCAN_CACHE and re-read only when the file's size or mtime
+        changes.
+        """
+        cache_path = self.data_dir / LAYER_SCAN_CACHE
+        try:
+            cached = json.loads(cache_path.read_text())
+        except (OSError, ValueError):
+            cached = {}
+
+        layers, scanned = {}, {}
+        for file_path in sorted(self.data_dir.glob('*.json')):
+            if file_path.name == LAYER_SCAN_CACHE:
+                continue
+            stat = file_path.stat()
+            entry = cached.get(file_path.name)
+            if not entry or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime:
+                try:
+                    entry = {'size': stat.st_size, 'mtime': stat.st_mtime, **self._read_layer_header(file_path)}
+                except Exception as e:
+                    logger.warning(f"Could not read {file_path}: {e}")
+                    continue
+            scanned[file_path.name] = entry
+            layers[file_path.name] = {
+                'path': str(file_path),
+                'type': self.detect_layer_type(file_path.name),
+                'geography_level': self.detect_geography_level(file_path.name),
+                'record_count': entry['record_count'],
+                'columns': entry['columns'],
+                'crs': entry['crs']
+            }
+
+        if scanned != cached:
             try:
-                gdf = gpd.read_file(file_path, rows=1)  # Just read first row for metadata
-                layers[file_path.name] = {
-                    'path': str(file_path),
-                    'type': self.detect_layer_type(file_path.name),
-                    'geography_level': self.detect_geography_level(file_path.name),
-                    'columns': list(gdf.columns),
-                    'crs': str(gdf.crs)
-                }
-            except Exception as e:
-                logger.warning(f"Could not read {file_path}: {e}")
-        
+                cache_path.write_text(json.dumps(scanned, indent=2))
+            except OSError as e:
+                logger.warning(f"Could not cache layer scan: {e}")
         return layers
-    
+
+    @staticmethod
+    def _read_layer_header(file_path: Path) -> Dict:
+        """Fields, CRS and feature count of a layer, without reading its features"""
+        if pyogrio is not None:
+            info = pyogrio.read_info(file_path)
+            columns = list(info['fields'])
+            if info['geometry_type']:
+                columns.append('geometry')
+            return {'columns': columns, 'crs': str(info['crs']), 'record_count': int(info['features'])}
+        gdf = gpd.read_file(file_path, rows=1)  # Just read first row for metadata
+        return {'columns': list(gdf.columns), 'crs': str(gdf.crs), 'record_count': None}
+
     def detect_layer_type(self, filename):
         """Detect layer type from filename"""
         name = filename.lower()
@@ -99,31 +347,51 @@ class CSVShapefileJoiner:
         else:
             return 'Unknown'
     
+    def layer_summaries(self) -> List[Dict]:
+        """One summary row per available layer (plain dicts; pandas is not needed)"""
+        return [{
+            'Layer': filename,
+            'Type': info.get('type') or 'Unknown',
+            'Geography': info.get('geography_level') or 'Unknown',
+            'Records': info.get('record_count') if info.get('record_count') is not None else 'Unknown',
+            'Coverage': info.get('coverage_area') or 'Unknown'
+        } for filename, info in self.available_layers.items()]
+
     def list_available_layers(self) -> pd.DataFrame:
         """Return a DataFrame of available layers"""
-        data = []
-        for filename, info in self.available_layers.items():
-            data.append({
-                'Layer': filename,
-                'Type': info.get('type', 'Unknown'),
-                'Geography': info.get('geography_level', 'Unknown'),
-                'Records': info.get('record_count', 'Unknown'),
-                'Coverage': info.get('coverage_area', 'Unknown')
-            })
-        
-        return pd.DataFrame(data)
+        return pd.DataFrame(self.layer_summaries())
     
     def analyze_csv(self, csv_path: str) -> Dict:
-        """Analyze CSV file to identify potential join fields"""
+        """Analyze CSV file to identify potential join fields
+        
+        Rows are counted with a memory-mapped newline scan and columns are
+        profiled from a random sample, so large files are never fully parsed.
+        """
         try:
-            df = pd.read_csv(csv_path, nrows=10)  # Read sample
+            total_rows = count_rows(csv_path)
+            df, exact = sample_rows(csv_path)
+            if exact:
+                total_rows = len(df)
+            profiles = column_profiles(df, total_rows, exact)
             
             analysis = {
                 'filename': Path(csv_path).name,
-                'total_rows': len(pd.read_csv(csv_path)),  # Get actual count
+                'total_rows': total_rows,
+                'total_rows_exact': exact,
+                'sampled_rows': len(df),
                 'columns': list(df.columns),
-                'potential_joins': self.identify_join_columns(df),
-                'sample_data': df.head(3).to_dict('records')
+                'column_profiles': profiles,
+                'potential_joins': self.identify_join_columns(df, profiles),
+                'sample_data': df.head(3).to_dict('records'),
+                'key_samples': {
+                    col: {'type': profile['inferred_type'],
+                          'values': df[col].dropna().unique()[:KEY_SAMPLE_VALUES].tolist(),
+                          'confidence': profile['confidence'],
+                          'distinct': profile['distinct_estimate'],
+                          'rows': total_rows}
+                    for col, profile in profiles.items()
+                    if profile['inferred_type'] in COMPATIBLE_KEY_TYPES
+                }
             }
             
             return analysis
@@ -132,8 +400,15 @@ class CSVShapefileJoiner:
             logger.error(f"Error analyzing CSV {csv_path}: {e}")
             return None
     
-    def identify_join_columns(self, df: pd.DataFrame) -> Dict:
-        """Identify columns that could be used for joining"""
+    def identify_join_columns(self, df: pd.DataFrame, profiles: Optional[Dict] = None) -> Dict:
+        """Identify columns that could be used for joining
+        
+        Column names give the hint; the share of sampled values matching
+        the key pattern (profiles[column]['pattern_rates']) confirms it.
+        """
+        if profiles is None:
+            profiles = column_profiles(df, len(df), exact=True)
+        
         join_fields = {
             'fips': [],
             'zip': [],
@@ -141,160 +416,324 @@ class CSVShapefileJoiner:
             'state': []
         }
         
+        def add(join_type, col, field_type, pattern):
+            join_fields[join_type].append({
+                'column': col,
+                'type': field_type,
+                'confidence': profiles[col]['pattern_rates'].get(pattern, 0.0),
+                'sample': profiles[col]['sample']
+            })
+        
         for col in df.columns:
             col_lower = col.lower()
-            sample_vals = df[col].dropna().astype(str).head(5).tolist()
+            rates = profiles[col]['pattern_rates']
             
             # Check for FIPS patterns
             if any(keyword in col_lower for keyword in ['fips', 'geoid', 'county']):
-                if any(len(str(val)) == 5 and str(val).isdigit() for val in sample_vals):
-                    join_fields['fips'].append({
-                        'column': col,
-                        'type': 'County FIPS',
-                        'sample': sample_vals[:3]
-                    })
-                elif any(len(str(val)) == 2 and str(val).isdigit() for val in sample_vals):
-                    join_fields['fips'].append({
-                        'column': col,
-                        'type': 'State FIPS',
-                        'sample': sample_vals[:3]
-                    })
+                if rates.get('county_fips', 0) >= KEY_CONFIDENCE:
+                    add('fips', col, 'County FIPS', 'county_fips')
+                elif rates.get('state_fips', 0) >= KEY_CONFIDENCE:
+                    add('fips', col, 'State FIPS', 'state_fips')
             
             # Check for ZIP patterns
             if any(keyword in col_lower for keyword in ['zip', 'postal', 'zcta']):
-                if any(len(str(val)) == 5 and str(val).isdigit() for val in sample_vals):
-                    join_fields['zip'].append({
-                        'column': col,
-                        'type': 'ZIP Code',
-                        'sample': sample_vals[:3]
-                    })
+                if rates.get('zip', 0) >= KEY_CONFIDENCE:
+                    add('zip', col, 'ZIP Code', 'zip')
             
             # Check for name patterns
             if any(keyword in col_lower for keyword in ['name', 'county', 'place', 'city']):
-                if any(isinstance(val, str) and len(val) > 2 for val in sample_vals):
-                    join_fields['name'].append({
-                        'column': col,
-                        'type': 'Location Name',
-                        'sample': sample_vals[:3]
-                    })
+                if rates.get('name', 0) >= 0.5:
+                    add('name', col, 'Location Name', 'name')
             
             # Check for state patterns
-            if any(keyword in col_lower for keyword in ['state', 'st']):
-                join_fields['state'].append({
-                    'column': col,
-                    'type': 'State',
-                    'sample': sample_vals[:3]
-                })
+            if re.search(r'state|(^|_)st($|_)', col_lower):
+                if max(rates.get('state', 0), rates.get('state_fips', 0)) >= KEY_CONFIDENCE:
+                    add('state', col, 'State', 'state' if rates.get('state', 0) else 'state_fips')
         
         return join_fields
     
+    def layer_key_indexes(self) -> Dict[str, Dict]:
+        """Persisted key sets for every available layer, building missing ones"""
+        if self._key_indexes is None:
+            paths = {name: info['path'] for name, info in self.available_layers.items()}
+            indexes = load_key_indexes(self.metadata_db, paths)
+            for layer_name, path in paths.items():
+                if layer_name in indexes:
+                    continue
+                try:
+                    indexes[layer_name] = build_key_index(path)
+                    save_key_index(self.metadata_db, layer_name, path, indexes[layer_name])
+                    logger.info(f"Indexed join keys for {layer_name}")
+                except Exception as e:
+                    logger.warning(f"Could not index join keys for {layer_name}: {e}")
+            self._key_indexes = indexes
+        return self._key_indexes
+    
     def suggest_best_join(self, csv_analysis: Dict) -> List[Dict]:
-        """Suggest the best join options based on CSV analysis"""
-        suggestions = []
-        
-        for layer_name, layer_info in self.available_layers.items():
-            geography = layer_info.get('geography_level', 'Unknown')
-            
-            # Score potential matches
-            score = 0
-            join_options = []
-            
-            # Check for FIPS matches
-            if csv_analysis['potential_joins']['fips']:
-                for csv_field in csv_analysis['potential_joins']['fips']:
-                    if geography == 'County' and csv_field['type'] == 'County FIPS':
-                        score += 10
-                        join_options.append({
-                            'csv_field': csv_field['column'],
-                            'geo_field': 'GEOID',
-                            'type': 'FIPS',
-                            'confidence': 'High'
-                        })
-                    elif geography == 'State' and csv_field['type'] == 'State FIPS':
-                        score += 10
-                        join_options.append({
-                            'csv_field': csv_field['column'],
-                            'geo_field': 'STATEFP',
-                            'type': 'FIPS',
-                            'confidence': 'High'
-                        })
-            
-            # Check for ZIP matches
-            if csv_analysis['potential_joins']['zip'] and geography == 'ZIP Code':
-                for csv_field in csv_analysis['potential_joins']['zip']:
-                    score += 9
-                    join_options.append({
-                        'csv_field': csv_field['column'],
-                        'geo_field': 'GEOID10',
-                        'type': 'ZIP',
-                        'confidence': 'High'
-                    })
-            
-            # Check for name matches (lower confidence)
-            if csv_analysis['potential_joins']['name']:
-                for csv_field in csv_analysis['potential_joins']['name']:
-                    if geography == 'County':
-                        score += 5
-                        join_options.append({
-                            'csv_field': csv_field['column'],
-                            'geo_field': 'NAME',
-                            'type': 'Name',
-                            'confidence': 'Medium'
-                        })
-            
-            if score > 0:
-                suggestions.append({
-                    'layer': layer_name,
-                    'geography': geography,
-                    'coverage': layer_info.get('coverage_area', 'Unknown'),
-                    'score': score,
-                    'join_options': join_options
+        """Suggest the best join options based on CSV analysis
+        
+        Layers and fields are ranked by score: the share of the CSV column's
+        sampled values found in each layer field's key set, weighted by the
+        column's profile confidence and name (see rank_join_fields).
+        """
+        ranked = rank_join_fields(csv_analysis.get('key_samples', {}), self.layer_key_indexes())
+        
+        suggestions = {}
+        for match in ranked:
+            layer_name = match['layer']
+            layer_info = self.available_layers[layer_name]
+            suggestion = suggestions.setdefault(layer_name, {
+                'layer': layer_name,
+                'geography': layer_info.get('geography_level', 'Unknown'),
+                'coverage': layer_info.get('coverage_area', 'Unknown'),
+                'score': round(match['score'] * 100),
+                'join_options': []
+            })
+            if len(suggestion['join_options']) < 3:
+                overlap = match['overlap']
+                suggestion['join_options'].append({
+                    'csv_field': match['csv_field'],
+                    'geo_field': match['geo_field'],
+                    'type': match['key_type'],
+                    'overlap': overlap,
+                    'confidence': 'High' if overlap >= 0.9 else 'Medium' if overlap >= 0.5 else 'Low'
                 })
         
-        # Sort by score (best matches first)
-        suggestions.sort(key=lambda x: x['score'], reverse=True)
-        return suggestions[:5]  # Return top 5 suggestions
+        # Best score first
+        return sorted(suggestions.values(), key=lambda x: x['score'], reverse=True)[:5]
+    
+    def read_layer_attributes(self, path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Read a layer's attribute table without geometry (phase one of a join)
+        
+        The returned frame carries each feature's FID in FEATURE_ID so that
+        geometry can be fetched later for just the features that matter.
+        """
+        variant = ('attributes', tuple(columns) if columns else None)
+        
+        def load():
+            if pyogrio is not None:
+                df = pyogrio.read_dataframe(path, columns=columns, read_geometry=False,
+                                            fid_as_index=True)
+            else:
+                df = gpd.read_file(path, ignore_geometry=True)
+                if columns:
+                    df = df[columns]
+            return df.rename_axis(FEATURE_ID).reset_index()
+        
+        return layer_cache.get(path, loader=load, variant=variant)
+    
+    def read_layer_geometry(self, path: str, feature_ids) -> gpd.GeoDataFrame:
+        """Read geometry (no attributes) for the given FIDs, indexed by FID"""
+        feature_ids = np.unique(np.asarray(feature_ids, dtype='int64'))
+        if pyogrio is not None:
+            return pyogrio.read_dataframe(path, columns=[], fids=feature_ids, fid_as_index=True)
+        
+        full = layer_cache.get(path)
+        return full[[full.geometry.name]].iloc[feature_ids]
     
     def perform_join(self, csv_path: str, layer_name: str, csv_field: str, 
-                    geo_field: str, fuzzy_match: bool = False) -> gpd.GeoDataFrame:
-        """Perform the actual join between CSV and geospatial layer"""
+                    geo_field: str, fuzzy_match: bool = False, load_geometry: bool = True,
+                    matched_only: bool = False,
+                    geo_columns: Optional[List[str]] = None,
+                    aggregate: Optional[Dict[str, List[str]]] = None,
+                    chunksize: int = CSV_CHUNK_ROWS,
+                    weight_field: Optional[str] = None,
+                    point_fields: Optional[Tuple[str, str]] = None,
+                    workers: Optional[int] = None,
+                    crosswalk: Optional[Crosswalk] = None,
+                    intensive: Optional[List[str]] = None,
+                    optimize_memory: bool = False) -> gpd.GeoDataFrame:
+        """Perform the actual join between CSV and geospatial layer
+        
+        With load_geometry=False (e.g. CSV export) or matched_only=True the join
+        runs in two phases: match statistics are computed from the attribute
+        table alone, and geometry is then read only for matched features, or
+        not at all. geo_columns limits which layer attributes are read.
+        
+        aggregate ({column: [functions]}) streams a record-level CSV in chunks
+        and joins one aggregated row per key (see aggregate_csv).
+        
+        CSV GEOIDs finer than the layer's (block group, tract, county
+        subdivision -> county, state ...) are rolled up by prefix; without
+        aggregate every numeric column is summed.
+        
+        point_fields ((lat_field, lon_field)) makes this a point-in-polygon
+        join: each CSV row is assigned the geo_field of the polygon containing
+        it and rows are aggregated per polygon (record_count at least);
+        csv_field is ignored.
+        
+        crosswalk (see get_crosswalk) joins a CSV keyed by a layer that does
+        not nest in this one (ZIPs onto counties): numeric columns are split
+        by overlay weights, intensive ones (rates) averaged.
+        
+        Comma-separated fields ('STATE,COUNTY_NAME' -> 'STATE,NAME') join on
+        a composite key: the components are normalized and hashed into one
+        key on each side (see composite_join); with fuzzy_match only the
+        composites without an exact partner are name-matched.
+        
+        Geometry-free exact joins on a field indexed in the attribute store
+        (built by the inventory) are answered from the store and never open
+        the layer file; see stored_join.
+        
+        optimize_memory returns a lean frame (see optimize_joined).
+        """
         try:
-            # Load CSV data
-            csv_df = pd.read_csv(csv_path)
-            logger.info(f"Loaded CSV with {len(csv_df)} records")
+            composite = is_composite(geo_field) or is_composite(csv_field)
+            if composite:
+                if len(split_key_fields(geo_field)) != len(split_key_fields(csv_field)):
+                    raise ValueError(f"Composite keys need as many CSV fields as layer fields "
+                                     f"({csv_field} -> {geo_field})")
+                if aggregate or point_fields or crosswalk is not None:
+                    raise ValueError("Composite keys can't be combined with aggregation, "
+                                     "point or crosswalk joins")
             
-            # Load geospatial layer
-            layer_info = self.available_layers[layer_name]
-            geo_df = gpd.read_file(layer_info['path'])
-            logger.info(f"Loaded geospatial layer with {len(geo_df)} features")
+            if not load_geometry and not fuzzy_match and not point_fields and crosswalk is None:
+                stored = stored_layer(self.attribute_store, layer_name, self.available_layers[layer_name]['path'])
+                if stored and geo_field in stored['key_fields']:
+                    joined_df = self.stored_join(csv_path, layer_name, csv_field, geo_field, stored,
+                                                 matched_only=matched_only, geo_columns=geo_columns,
+                                                 aggregate=aggregate, chunksize=chunksize,
+                                                 weight_field=weight_field)
+                    if optimize_memory:
+                        joined_df = self.optimize_joined(joined_df, csv_field, geo_field)
+                    return joined_df
+            
+            # Load geospatial layer (attributes only for a two-phase join)
+            timer = StageTimer()
+            with timer.stage('layer_read') as stage:
+                layer_info = self.available_layers[layer_name]
+                two_phase = matched_only or not load_geometry
+                if two_phase:
+                    columns = None
+                    if geo_columns and not fuzzy_match:  # fuzzy matching may need the state field
+                        key_fields = split_key_fields(geo_field)
+                        columns = key_fields + [col for col in geo_columns if col not in key_fields]
+                    geo_df = self.read_layer_attributes(layer_info['path'], columns)
+                    logger.info(f"Loaded attribute table with {len(geo_df)} features (no geometry)")
+                else:
+                    geo_df = layer_cache.get(layer_info['path'])
+                    logger.info(f"Loaded geospatial layer with {len(geo_df)} features")
+                stage['rows'] = len(geo_df)
             
-            # Prepare join fields
-            csv_df[csv_field] = csv_df[csv_field].astype(str).str.strip()
-            geo_df[geo_field] = geo_df[geo_field].astype(str).str.strip()
+            # Prepare join fields: repair FIPS/ZIP/state keys on both sides
+            key_repairs = {}
+            with timer.stage('key_normalization', rows=len(geo_df)):
+                if composite:
+                    # Components are normalized while hashing (composite_join)
+                    key_type, key_repairs['geographic'] = 'composite', {}
+                else:
+                    key_type = detect_key_type(geo_df[geo_field], geo_field)
+                    geo_df[geo_field], key_repairs['geographic'] = normalize_keys(geo_df[geo_field], key_type)
             
-            if fuzzy_match and geo_field in ['NAME', 'COUNTY']:
+            # Load CSV data (the join key as text, so leading zeros survive)
+            point_stats = csv_key_type = None
+            if point_fields:
+                # Points take the key of the polygon containing them
+                csv_field = geo_field
+                polygons = layer_cache.get(layer_info['path'])
+                polygon_keys, _ = normalize_keys(polygons[geo_field], key_type)
+                with timer.stage('point_location') as stage, \
+                        PointLocator(polygons.geometry, polygon_keys, workers) as locator:
+                    csv_df, key_repairs['csv'], csv_rows = self.aggregate_csv(
+                        csv_path, csv_field, aggregate or {}, key_type, chunksize,
+                        weight_field=weight_field, locator=locator, point_fields=point_fields)
+                    stage['rows'] = csv_rows
+                point_stats = dict(locator.stats)
+            elif crosswalk is not None:
+                # Source-unit values are allocated to this layer's units
+                with timer.stage('csv_read') as stage:
+                    csv_df = pd.read_csv(csv_path, dtype={csv_field: str})
+                    csv_rows = stage['rows'] = len(csv_df)
+                with timer.stage('key_normalization', rows=csv_rows):
+                    csv_df[csv_field], key_repairs['csv'] = normalize_keys(csv_df[csv_field],
+                                                                           crosswalk.source_key_type)
+                with timer.stage('crosswalk', rows=csv_rows):
+                    numeric = csv_df.drop(columns=[csv_field]).apply(pd.to_numeric, errors='coerce')
+                    columns = [col for col in numeric.columns if numeric[col].notna().any()]
+                    csv_df = crosswalk.apply(csv_df, csv_field, columns, intensive or [],
+                                             target_field=geo_field)
+                csv_field = geo_field
+                logger.info(f"Allocated {csv_rows:,} CSV rows to {len(csv_df):,} units by {crosswalk.method}")
+            elif composite:
+                with timer.stage('csv_read') as stage:
+                    csv_df = pd.read_csv(csv_path, dtype={field: str for field in split_key_fields(csv_field)})
+                    csv_rows = stage['rows'] = len(csv_df)
+                key_repairs['csv'] = {}
+            else:
+                # Finer CSV GEOIDs (e.g. tracts against counties) roll up by prefix
+                csv_df, key_repairs['csv'], csv_rows, csv_key_type = self._read_keyed_csv(
+                    csv_path, csv_field, key_type, timer, aggregate, chunksize, weight_field)
+            log_repairs('CSV', key_type, key_repairs['csv'])
+            log_repairs('layer', key_type, key_repairs['geographic'])
+            csv_df[CSV_ROW_ID] = np.arange(len(csv_df))
+            
+            composite_stats = None
+            if composite:
+                # One hash merge on the composite key; leftovers optionally fuzzy-matched
+                with timer.stage('composite_match', rows=len(csv_df)):
+                    joined_df, composite_stats = self.composite_join(csv_df, geo_df, csv_field, geo_field,
+                                                                     fuzzy_match=fuzzy_match, indicator=True)
+            elif fuzzy_match and geo_field in NAME_FIELDS:
                 # Perform fuzzy matching for name fields
-                joined_df = self.fuzzy_join(csv_df, geo_df, csv_field, geo_field)
+                with timer.stage('fuzzy_match', rows=len(csv_df)):
+                    joined_df = self.fuzzy_join(csv_df, geo_df, csv_field, geo_field, indicator=True)
             else:
                 # Perform exact join
-                joined_df = geo_df.merge(csv_df, left_on=geo_field, right_on=csv_field, how='left')
+                with timer.stage('merge', rows=len(csv_df)):
+                    joined_df = geo_df.merge(csv_df, left_on=geo_field, right_on=csv_field,
+                                             how='left', indicator=JOIN_INDICATOR)
             
             # Add join statistics
+            matched = (joined_df[JOIN_INDICATOR] == 'both').to_numpy()
             total_geo = len(geo_df)
             total_csv = len(csv_df)
-            joined_count = len(joined_df.dropna(subset=[csv_field]))
+            joined_count = int(matched.sum())
+            matched_csv = joined_df.loc[matched, CSV_ROW_ID].nunique()
+            joined_df = joined_df.drop(columns=[JOIN_INDICATOR, CSV_ROW_ID])
             
             join_stats = {
                 'total_geographic_features': total_geo,
                 'total_csv_records': total_csv,
                 'successful_joins': joined_count,
                 'join_rate': f"{(joined_count/total_geo)*100:.1f}%",
-                'unmatched_geographic': total_geo - joined_count,
-                'unmatched_csv': total_csv - joined_count
+                'unmatched_geographic': int((~matched).sum()),
+                'unmatched_csv': total_csv - matched_csv,
+                'key_type': key_type,
+                'key_repairs': {side: counts for side, counts in key_repairs.items() if counts}
             }
+            if aggregate or csv_key_type:
+                join_stats['csv_rows_aggregated'] = csv_rows
+            if csv_key_type:
+                join_stats['rollup'] = f"{csv_key_type} -> {key_type}"
+            if composite_stats:
+                join_stats['composite'] = composite_stats
+            if point_stats:
+                join_stats['points'] = point_stats
+            if crosswalk is not None:
+                join_stats['crosswalk'] = {'method': crosswalk.method, 'csv_rows': csv_rows,
+                                           'source_units': len(crosswalk.source_keys)}
+            
+            if two_phase:
+                if matched_only:
+                    joined_df = joined_df[matched].reset_index(drop=True)
+                if load_geometry:
+                    with timer.stage('geometry_read', rows=len(joined_df)):
+                        geometry = self.read_layer_geometry(layer_info['path'], joined_df[FEATURE_ID])
+                    logger.info(f"Loaded geometry for {len(geometry)} features")
+                    joined_df = gpd.GeoDataFrame(
+                        joined_df.drop(columns=[FEATURE_ID]),
+                        geometry=geometry.geometry.reindex(joined_df[FEATURE_ID]).values,
+                        crs=geometry.crs
+                    )
+                else:
+                    joined_df = joined_df.drop(columns=[FEATURE_ID])
             
             # Add statistics as attributes
+            join_stats['timings'] = timer.summary()
             joined_df.attrs['join_stats'] = join_stats
+            if optimize_memory:
+                joined_df = self.optimize_joined(joined_df, csv_field, geo_field,
+                                                 exact=not composite and not (fuzzy_match and geo_field in NAME_FIELDS))
             
             logger.info(f"Join completed: {joined_count}/{total_geo} features matched ({join_stats['join_rate']})")
             
@@ -304,77 +743,800 @@ class CSVShapefileJoiner:
             logger.error(f"Error performing join: {e}")
             raise
     
+    def stored_join(self, csv_path: str, layer_name: str, csv_field: str, geo_field: str,
+                    stored: Dict, matched_only: bool = False,
+                    geo_columns: Optional[List[str]] = None,
+                    aggregate: Optional[Dict[str, List[str]]] = None,
+                    chunksize: int = CSV_CHUNK_ROWS,
+                    weight_field: Optional[str] = None) -> pd.DataFrame:
+        """Geometry-free exact join against a layer's attribute store table
+        
+        Layer keys were normalized when the store was built. With
+        matched_only only the features whose keys occur in the CSV are read,
+        through the key column's index. Returns a DataFrame carrying the
+        same join_stats as perform_join.
+        """
+        timer = StageTimer()
+        key_type = stored['key_fields'][geo_field]['key_type']
+        csv_df, csv_repairs, csv_rows, csv_key_type = self._read_keyed_csv(
+            csv_path, csv_field, key_type, timer, aggregate, chunksize, weight_field)
+        log_repairs('CSV', key_type, csv_repairs)
+        csv_df[CSV_ROW_ID] = np.arange(len(csv_df))
+        
+        with timer.stage('layer_read') as stage:
+            geo_df = read_stored_attributes(self.attribute_store, stored, geo_field, geo_columns,
+                                            keys=csv_df[csv_field] if matched_only else None)
+            stage['rows'] = len(geo_df)
+        logger.info(f"Read {len(geo_df):,} of {stored['feature_count']:,} features of {layer_name} "
+                    f"from the attribute store")
+        
+        with timer.stage('merge', rows=len(csv_df)):
+            joined_df = geo_df.merge(csv_df, left_on=geo_field, right_on=csv_field,
+                                     how='inner' if matched_only else 'left', indicator=JOIN_INDICATOR)
+        matched = (joined_df[JOIN_INDICATOR] == 'both').to_numpy()
+        total_geo = stored['feature_count']
+        joined_count = int(matched.sum())
+        matched_csv = joined_df.loc[matched, CSV_ROW_ID].nunique()
+        joined_df = joined_df.drop(columns=[JOIN_INDICATOR, CSV_ROW_ID])
+        if matched_only and len(geo_df) < total_geo:
+            # perform_join filters a left merge, whose unmatched rows upcast CSV columns (int -> float)
+            upcast = csv_df.drop(columns=[CSV_ROW_ID]).iloc[:0].reindex([0]).dtypes
+            suffixed = {col: col if col == csv_field or col not in geo_df.columns else f'{col}_y'
+                        for col in upcast.index}
+            joined_df = joined_df.astype({suffixed[col]: dtype for col, dtype in upcast.items()})
+        
+        key_repairs = {'csv': csv_repairs, 'geographic': stored['key_fields'][geo_field]['repairs']}
+        join_stats = {
+            'total_geographic_features': total_geo,
+            'total_csv_records': len(csv_df),
+            'successful_joins': joined_count,
+            'join_rate': f"{(joined_count / total_geo) * 100:.1f}%" if total_geo else '0.0%',
+            'unmatched_geographic': total_geo - len(geo_df) if matched_only else int((~matched).sum()),
+            'unmatched_csv': len(csv_df) - matched_csv,
+            'key_type': key_type,
+            'key_repairs': {side: counts for side, counts in key_repairs.items() if counts},
+            'attribute_store': stored['table_name']
+        }
+        if aggregate or csv_key_type:
+            join_stats['csv_rows_aggregated'] = csv_rows
+        if csv_key_type:
+            join_stats['rollup'] = f"{csv_key_type} -> {key_type}"
+        join_stats['timings'] = timer.summary()
+        joined_df.attrs['join_stats'] = join_stats
+        
+        logger.info(f"Join completed: {joined_count}/{total_geo} features matched ({join_stats['join_rate']})")
+        return joined_df
+    
+    def _detect_rollup(self, csv_path: str, csv_field: str, key_type: str,
+                       chunksize: int = CSV_CHUNK_ROWS) -> Optional[str]:
+        """CSV key type when a streamed CSV's GEOIDs are finer than key_type, else None
+        
+        Decided from the first rows unless they may hide a finer level (see
+        may_roll_up); only then is the key column streamed to measure code
+        widths over the whole file, since a file sorted by GEOID may hold
+        only codes that lost a leading zero in its head.
+        """
+        if key_type not in KEY_WIDTHS:
+            return None
+        head = pd.read_csv(csv_path, usecols=[csv_field], dtype=str, nrows=1000)[csv_field]
+        head_type = detect_key_type(head, csv_field)
+        if head_type not in KEY_WIDTHS or head_type == 'zip' or not may_roll_up(head, key_type):
+            return None
+        widths = Counter()
+        for chunk in pd.read_csv(csv_path, usecols=[csv_field], dtype=str, chunksize=chunksize):
+            widths.update(key_widths(chunk[csv_field]))
+        detected = width_key_type(widths, f"CSV {csv_field}")
+        return detected if detected and is_rollup(detected, key_type) else None
+    
+    def _read_keyed_csv(self, csv_path: str, csv_field: str, key_type: str, timer: StageTimer,
+                        aggregate: Optional[Dict[str, List[str]]] = None,
+                        chunksize: int = CSV_CHUNK_ROWS, weight_field: Optional[str] = None):
+        """CSV rows with normalized keys, aggregated per key when asked
+        
+        Returns (frame, repairs, rows read, CSV key type when its GEOIDs were
+        rolled up to key_type, else None). A CSV read whole has its key
+        widths measured in memory; without an aggregate spec a rollup sums
+        every numeric column of the read.
+        """
+        if aggregate:
+            # Reading, key normalization and aggregation run chunk by chunk
+            with timer.stage('key_normalization'):
+                source_key_type = self._detect_rollup(csv_path, csv_field, key_type, chunksize)
+            with timer.stage('csv_read_aggregate') as stage:
+                csv_df, repairs, csv_rows = self.aggregate_csv(
+                    csv_path, csv_field, aggregate, key_type, chunksize,
+                    weight_field=weight_field, source_key_type=source_key_type)
+                stage['rows'] = csv_rows
+            return csv_df, repairs, csv_rows, source_key_type
+        
+        with timer.stage('csv_read') as stage:
+            csv_df = pd.read_csv(csv_path, dtype={csv_field: str})
+            csv_rows = stage['rows'] = len(csv_df)
+        logger.info(f"Loaded CSV with {csv_rows} records")
+        source_key_type = None
+        if key_type in KEY_WIDTHS:
+            detected = detect_key_type(csv_df[csv_field], csv_field)
+            if detected in KEY_WIDTHS and is_rollup(detected, key_type):
+                source_key_type = detected
+        if source_key_type:
+            aggregate = {col: ['sum'] for col in csv_df.columns if col != csv_field
+                         and pd.api.types.is_numeric_dtype(csv_df[col])
+                         and not pd.api.types.is_bool_dtype(csv_df[col])}
+            logger.info(f"Rolling up {source_key_type} GEOIDs to {key_type}")
+            with timer.stage('csv_aggregate', rows=csv_rows):
+                csv_df, repairs, _ = self.aggregate_csv(csv_df, csv_field, aggregate, key_type,
+                                                        source_key_type=source_key_type)
+            return csv_df, repairs, csv_rows, source_key_type
+        with timer.stage('key_normalization', rows=csv_rows):
+            csv_df[csv_field], repairs = normalize_keys(csv_df[csv_field], key_type)
+        return csv_df, repairs, csv_rows, None
+    
+    def cached_join(self, csv_path: str, layer_name: str, csv_field: str, geo_field: str,
+                    fuzzy_match: bool = False, load_geometry: bool = True,
+                    matched_only: bool = False,
+                    geo_columns: Optional[List[str]] = None,
+                    aggregate: Optional[Dict[str, List[str]]] = None,
+                    weight_field: Optional[str] = None,
+                    point_fields: Optional[Tuple[str, str]] = None,
+                    optimize_memory: bool = False) -> gpd.GeoDataFrame:
+        """perform_join through the on-disk result cache
+        
+        A CSV identical to the cached one for the same layer, fields and
+        options is served from disk. For an edited CSV of a plain exact join
+        (single-field key),
+        only features whose keys gained, lost or changed CSV rows are
+        re-joined (when at most INCREMENTAL_MAX_CHANGED of the keys changed);
+        anything else is a full join. join_stats['cache'] records which.
+        Results are cached as joined; optimize_memory applies to what is returned.
+        """
+        composite = is_composite(geo_field)
+        exact = not composite and not (fuzzy_match and geo_field in NAME_FIELDS)
+        
+        def finish(result):
+            if optimize_memory:
+                return self.optimize_joined(result, csv_field, geo_field, exact=exact)
+            return result
+        
+        layer_path = self.available_layers[layer_name]['path']
+        options = {'fuzzy_match': fuzzy_match, 'load_geometry': load_geometry,
+                   'matched_only': matched_only, 'geo_columns': geo_columns, 'aggregate': aggregate,
+                   'weight_field': weight_field, 'point_fields': point_fields}
+        spec = {'layer': layer_signature(layer_path), 'csv_field': csv_field, 'geo_field': geo_field,
+                'options': options}
+        cache_key = self.result_cache.entry_key(spec)
+        csv_sha = self.result_cache.csv_hash(csv_path)
+        entry = self.result_cache.load(cache_key)
+        
+        if entry and entry['meta']['csv_sha256'] == csv_sha:
+            result = entry['result']
+            result.attrs['join_stats'] = dict(entry['meta']['join_stats'], cache='hit')
+            logger.info(f"Join served from cache ({cache_key})")
+            return finish(result)
+        
+        incremental = not (fuzzy_match or aggregate or point_fields or composite)
+        csv_df = digests = None
+        if entry and incremental and 'rollup' not in entry['meta']['join_stats']:
+            key_type = entry['meta']['join_stats']['key_type']
+            csv_df = pd.read_csv(csv_path, dtype={csv_field: str})
+            csv_df[csv_field], csv_repairs = normalize_keys(csv_df[csv_field], key_type)
+            digests = key_digests(csv_df, csv_field)
+            changed = changed_keys(entry['digests'], digests)
+            if len(changed) <= INCREMENTAL_MAX_CHANGED * max(len(digests), 1):
+                try:
+                    result = self._rejoin_keys(entry, csv_df, csv_repairs, layer_path, csv_field,
+                                               geo_field, changed, load_geometry, matched_only, geo_columns)
+                except KeyError as e:  # cached columns no longer line up; join from scratch
+                    logger.warning(f"Incremental re-join failed ({e}); running a full join")
+                else:
+                    self.result_cache.save(cache_key, {'csv_sha256': csv_sha, 'spec': spec,
+                                                       'join_stats': result.attrs['join_stats']},
+                                           result, digests)
+                    return finish(result)
+        
+        result = self.perform_join(csv_path, layer_name, csv_field, geo_field, fuzzy_match,
+                                   load_geometry=load_geometry, matched_only=matched_only,
+                                   geo_columns=geo_columns, aggregate=aggregate,
+                                   weight_field=weight_field, point_fields=point_fields)
+        stats = result.attrs['join_stats']
+        if incremental and 'rollup' not in stats:
+            if csv_df is None:
+                csv_df = pd.read_csv(csv_path, dtype={csv_field: str})
+                csv_df[csv_field], _ = normalize_keys(csv_df[csv_field], stats['key_type'])
+                digests = key_digests(csv_df, csv_field)
+        else:
+            digests = pd.Series(dtype='uint64')
+        self.result_cache.save(cache_key, {'csv_sha256': csv_sha, 'spec': spec, 'join_stats': stats},
+                               result, digests)
+        stats['cache'] = 'miss'
+        return finish(result)
+    
+    def optimize_joined(self, joined: gpd.GeoDataFrame, csv_field: str, geo_field: str,
+                        exact: bool = True) -> gpd.GeoDataFrame:
+        """Memory-lean copy of a join result; the before/after report goes in join_stats['memory']
+        
+        After an exact join the CSV key duplicates the layer key, so it is
+        dropped; repeated strings become categoricals, other text Arrow
+        strings, and numbers the smallest exact dtype.
+        """
+        drop, rename = [], {}
+        if exact and csv_field != geo_field:
+            if f'{csv_field}_y' in joined.columns:
+                # A layer field of the same name made the merge suffix both copies;
+                # the layer's keeps its own name once the CSV's is gone
+                drop = [f'{csv_field}_y']
+                rename = {f'{csv_field}_x': csv_field}
+            else:
+                drop = [csv_field]
+        lean, report = optimize_frame(joined, drop_columns=drop)
+        lean = lean.rename(columns=rename)
+        report['converted'] = {rename.get(col, col): change for col, change in report['converted'].items()}
+        lean.attrs['join_stats'] = dict(joined.attrs.get('join_stats', {}), memory=report)
+        return lean
+    
+    def _rejoin_keys(self, entry: Dict, csv_df: pd.DataFrame, csv_repairs: Dict[str, int],
+                     layer_path: str, csv_field: str, geo_field: str, changed,
+                     load_geometry: bool, matched_only: bool,
+                     geo_columns: Optional[List[str]]) -> gpd.GeoDataFrame:
+        """Update a cached join for the changed keys only"""
+        started = time.perf_counter()
+        cached = entry['result']
+        stats = entry['meta']['join_stats']
+        
+        columns = None
+        if geo_columns:
+            columns = [geo_field] + [col for col in geo_columns if col != geo_field]
+        attributes = self.read_layer_attributes(layer_path, columns)
+        layer_keys, _ = normalize_keys(attributes[geo_field], stats['key_type'])
+        attributes[geo_field] = layer_keys
+        
+        # Re-join the features behind changed keys, exactly as perform_join would
+        affected = attributes[layer_keys.isin(changed)]
+        rows = csv_df[csv_df[csv_field].isin(changed)]
+        part = affected.merge(rows, left_on=geo_field, right_on=csv_field,
+                              how='inner' if matched_only else 'left')
+        if load_geometry:
+            geometry = self.read_layer_geometry(layer_path, part[FEATURE_ID])
+            part = gpd.GeoDataFrame(part.drop(columns=[FEATURE_ID]),
+                                    geometry=geometry.geometry.reindex(part[FEATURE_ID]).values,
+                                    crs=geometry.crs)
+        else:
+            part = part.drop(columns=[FEATURE_ID])
+        
+        kept = cached[~cached[geo_field].isin(changed)]
+        result = pd.concat([kept, part[list(cached.columns)]], ignore_index=True)
+        # Back into layer order
+        order = pd.Series(np.arange(len(layer_keys)), index=layer_keys.to_numpy()).groupby(level=0).first()
+        result = result.iloc[np.argsort(result[geo_field].map(order).to_numpy(), kind='stable')]
+        result = result.reset_index(drop=True)
+        
+        csv_keys = pd.Index(csv_df[csv_field].dropna().unique())
+        matched = result[geo_field].isin(csv_keys)
+        joined_count = int(matched.sum())
+        total_geo = stats['total_geographic_features']
+        key_repairs = dict(stats.get('key_repairs', {}))
+        key_repairs.pop('csv', None)
+        if csv_repairs:
+            key_repairs['csv'] = csv_repairs
+        result.attrs['join_stats'] = dict(
+            stats,
+            total_csv_records=len(csv_df),
+            successful_joins=joined_count,
+            join_rate=f"{(joined_count/total_geo)*100:.1f}%",
+            unmatched_geographic=int((~layer_keys.isin(csv_keys)).sum()),
+            unmatched_csv=int((~csv_df[csv_field].isin(layer_keys)).sum()),
+            key_repairs=key_repairs,
+            cache='incremental',
+            changed_keys=len(changed)
+        )
+        logger.info(f"Incremental re-join: {len(changed):,} changed keys, {len(part):,} rows "
+                    f"updated in {time.perf_counter() - started:.2f}s")
+        return result
+    
+    def aggregate_csv(self, csv_path: str, csv_field: str, aggregate: Dict[str, List[str]],
+                      key_type: str = 'name',
+                      chunksize: int = CSV_CHUNK_ROWS,
+                      weight_field: Optional[str] = None,
+                      source_key_type: Optional[str] = None,
+                      locator: Optional[PointLocator] = None,
+                      point_fields: Optional[Tuple[str, str]] = None) -> Tuple[pd.DataFrame, Dict[str, int], int]:
+        """Stream a CSV in chunks and aggregate it by normalized join key
+        
+        Each chunk is reduced to partial sums/counts/minima/maxima per key and
+        folded into a running total, so memory is bounded by the number of
+        distinct keys rather than the file size. Means are sum / count and
+        weighted means sum(x * weight_field) / sum(weight_field).
+        
+        With source_key_type finer than key_type (e.g. tract -> county), keys
+        are normalized at their own level and rolled up by GEOID prefix.
+        csv_path may also be a DataFrame already read whole.
+        With a locator, keys come from point_fields ((lat, lon)) instead.
+        Returns (one row per key, key repairs, rows read).
+        """
+        for column, functions in aggregate.items():
+            unknown = set(functions) - set(AGGREGATIONS)
+            if unknown:
+                raise ValueError(f"Unknown aggregation(s) for {column}: {sorted(unknown)}")
+        weighted = [column for column, functions in aggregate.items() if 'weighted_mean' in functions]
+        if weighted and not weight_field:
+            raise ValueError("weighted_mean needs a weight_field")
+        rollup = source_key_type is not None and source_key_type != key_type
+        
+        # Partial statistics needed for every requested function
+        partials = {}
+        for column, functions in aggregate.items():
+            needed = set()
+            for function in functions:
+                needed.update(_PARTIAL_STATS.get(function, [function]))
+            partials[column] = sorted(needed)
+        basic = {column: [stat for stat in stats if stat not in ('wsum', 'weight')]
+                 for column, stats in partials.items()}
+        basic = {column: stats for column, stats in basic.items() if stats}
+        combine = {f'{column}|{stat}': _PARTIAL_COMBINE[stat]
+                   for column, stats in partials.items() for stat in stats}
+        
+        totals = None
+        repairs = Counter()
+        rows = 0
+        key_columns = list(point_fields) if locator is not None else [csv_field]
+        usecols = key_columns + [column for column in aggregate if column not in key_columns]
+        if weighted and weight_field not in usecols:
+            usecols.append(weight_field)
+        dtype = None if locator is not None else {csv_field: str}
+        if isinstance(csv_path, pd.DataFrame):
+            reader = [csv_path[usecols]]
+        else:
+            reader = pd.read_csv(csv_path, usecols=usecols, dtype=dtype, chunksize=chunksize)
+        for chunk in reader:
+            rows += len(chunk)
+            if locator is not None:
+                lat_field, lon_field = point_fields
+                keys = locator.locate(chunk[lon_field], chunk[lat_field])
+            else:
+                keys, chunk_repairs = normalize_keys(chunk[csv_field], source_key_type or key_type)
+                repairs.update(chunk_repairs)
+            if rollup:
+                keys = rollup_keys(keys, source_key_type, key_type)
+                repairs['rollup'] += int(keys.notna().sum())
+            
+            values = pd.DataFrame({'_records': 1}, index=chunk.index)
+            for column in aggregate:
+                values[column] = pd.to_numeric(chunk[column], errors='coerce')
+            if weighted:
+                weights = pd.to_numeric(chunk[weight_field], errors='coerce')
+                for column in weighted:
+                    column_weights = weights.where(values[column].notna())
+                    values[f'{column}|wsum'] = values[column] * column_weights
+                    values[f'{column}|weight'] = column_weights
+            grouped = values.groupby(keys.to_numpy(), dropna=True)
+            
+            pieces = []
+            if basic:
+                stats = grouped.agg(basic)
+                stats.columns = [f'{column}|{stat}' for column, stat in stats.columns]
+                pieces.append(stats)
+            if weighted:
+                pieces.append(grouped[[f'{column}|{stat}' for column in weighted
+                                       for stat in ('wsum', 'weight')]].sum())
+            pieces.append(grouped['_records'].sum())
+            partial = pd.concat(pieces, axis=1)
+            
+            if totals is None:
+                totals = partial
+            else:
+                totals = pd.concat([totals, partial]).groupby(level=0).agg(
+                    dict(combine, _records='sum'))
+        
+        if totals is None:
+            raise ValueError(f"No rows to aggregate in {csv_path}")
+        
+        result = pd.DataFrame(index=totals.index)
+        for column, functions in aggregate.items():
+            for function in functions:
+                if function == 'mean':
+                    counts = totals[f'{column}|count']
+                    value = totals[f'{column}|sum'] / counts.where(counts > 0)
+                elif function == 'weighted_mean':
+                    weight = totals[f'{column}|weight']
+                    value = totals[f'{column}|wsum'] / weight.where(weight > 0)
+                else:
+                    value = totals[f'{column}|{function}']
+                result[f'{column}_{function}'] = value
+        result['record_count'] = totals['_records'].astype('int64')
+        result = result.rename_axis(csv_field).reset_index()
+        result[csv_field] = result[csv_field].astype('string')
+        
+        level = f" ({source_key_type} rolled up to {key_type})" if rollup else ''
+        logger.info(f"Aggregated {rows:,} CSV records into {len(result):,} keys{level}")
+        return result, dict(repairs), rows
+    
+    def partitioned_join(self, csv_path: str, layer_name: str, csv_field: str, geo_field: str,
+                         output_path: str, format_type: str = 'gpkg', matched_only: bool = False,
+                         workers: Optional[int] = None, chunksize: int = CSV_CHUNK_ROWS) -> Dict:
+        """Join a very large GEOID-keyed CSV state by state across a process pool
+        
+        The CSV is streamed into per-state parts and the layer's features are
+        grouped by the state prefix of their key; each state's features are
+        shipped to a worker once and joined there. 'gpkg' output is appended
+        to one file as partitions finish; 'geoparquet' output is a directory
+        with one file per state, written by the workers. Returns join_stats.
+        """
+        if format_type not in ('gpkg', 'geoparquet'):
+            raise ValueError("Partitioned joins write 'gpkg' or 'geoparquet'")
+        if format_type == 'geoparquet' and pyarrow is None:
+            raise ImportError("GeoParquet export needs pyarrow (pip install pyarrow)")
+        
+        started = time.perf_counter()
+        geo_df = layer_cache.get(self.available_layers[layer_name]['path'])
+        key_type = detect_key_type(geo_df[geo_field], geo_field)
+        if key_type not in PARTITION_KEY_TYPES:
+            raise ValueError(f"{geo_field} holds {key_type} keys; partitioning needs state-prefixed GEOIDs")
+        geo_df[geo_field], geo_repairs = normalize_keys(geo_df[geo_field], key_type)
+        geo_states = state_prefix(geo_df[geo_field]).to_numpy()
+        
+        output_path = Path(output_path)
+        if format_type == 'gpkg':
+            output = output_path.with_suffix('.gpkg')
+            output.unlink(missing_ok=True)
+        else:
+            output = output_path.with_suffix('')
+            output.mkdir(parents=True, exist_ok=True)
+        
+        partitions = []
+        with tempfile.TemporaryDirectory(prefix='partitioned_join_') as work_dir:
+            csv_parts = partition_csv(csv_path, csv_field, key_type, Path(work_dir), chunksize)
+            logger.info(f"Partitioned {csv_parts['rows']:,} CSV rows into {len(csv_parts['parts'])} states")
+            
+            tasks = [{
+                'state': state,
+                'features': features,
+                'geo_field': geo_field,
+                'csv_field': csv_field,
+                'csv_template': csv_parts['template'],
+                'csv_parts': csv_parts['parts'].get(state, []),
+                'matched_only': matched_only,
+                'output': str(output / f'state={state}.parquet') if format_type == 'geoparquet' else None
+            } for state, features in geo_df.groupby(geo_states)]
+            # Biggest partitions first so the pool doesn't end on a straggler
+            tasks.sort(key=lambda task: csv_parts['counts'].get(task['state'], 0), reverse=True)
+            
+            # Finished GPKG partitions are buffered and appended in batches
+            buffered = []
+            
+            def flush():
+                if buffered:
+                    frame = pd.concat(buffered, ignore_index=True)
+                    frame.to_file(output, driver='GPKG', mode='a' if output.exists() else 'w')
+                    buffered.clear()
+            
+            with ProcessPoolExecutor(workers) as pool:
+                futures = [pool.submit(join_partition, task) for task in tasks]
+                for future in as_completed(futures):
+                    result = future.result()
+                    frame = result.pop('frame', None)
+                    if frame is not None and len(frame):
+                        buffered.append(frame)
+                        if sum(len(f) for f in buffered) >= PARTITION_APPEND_ROWS:
+                            flush()
+                    partitions.append(result)
+            flush()
+        
+        layer_states = set(geo_states)
+        unpartitioned = sum(count for state, count in csv_parts['counts'].items()
+                            if state == NO_STATE or state not in layer_states)
+        join_stats = combine_stats(partitions, csv_parts['rows'], unpartitioned)
+        join_stats['key_type'] = key_type
+        join_stats['key_repairs'] = {side: counts for side, counts in
+                                     [('csv', csv_parts['repairs']), ('geographic', geo_repairs)] if counts}
+        join_stats['seconds'] = round(time.perf_counter() - started, 3)
+        join_stats['output'] = str(output)
+        
+        with open(output_path.with_suffix('.json'), 'w') as f:
+            json.dump(join_stats, f, indent=2)
+        logger.info(f"Partitioned join completed: {join_stats['successful_joins']:,}/"
+                    f"{join_stats['total_geographic_features']:,} features matched "
+                    f"across {len(partitions)} states in {join_stats['seconds']}s")
+        return join_stats
+    
+    def out_of_core_join(self, csv_path: str, layer_name: str, csv_field: str, geo_field: str,
+                         output_path: str, format_type: str = 'gpkg', matched_only: bool = False,
+                         memory_cap_mb: float = OUT_OF_CORE_MEMORY_MB,
+                         aggregate: Optional[Dict[str, List[str]]] = None,
+                         weight_field: Optional[str] = None,
+                         chunksize: int = CSV_CHUNK_ROWS) -> Dict:
+        """Join a layer too large for memory batch by batch
+        
+        The CSV (or its aggregate, see aggregate_csv) is held as a key -> row
+        lookup; the layer is streamed in batches sized so that the lookup
+        plus a few copies of one batch stay under memory_cap_mb, and each
+        joined batch is appended to the output ('gpkg', 'csv', or a
+        'geoparquet' directory). Returns join_stats, also saved as a .json
+        sidecar.
+        """
+        timer = StageTimer()
+        path = self.available_layers[layer_name]['path']
+        read_geometry = format_type != 'csv'
+        writer = BatchWriter(output_path, format_type)
+        
+        with timer.stage('layer_read') as stage:
+            sample = read_sample(path, read_geometry=read_geometry)
+            stage['rows'] = len(sample)
+        key_type = detect_key_type(sample[geo_field], geo_field)
+        
+        if aggregate:
+            with timer.stage('csv_read_aggregate') as stage:
+                csv_df, csv_repairs, csv_rows = self.aggregate_csv(csv_path, csv_field, aggregate, key_type,
+                                                                   chunksize, weight_field=weight_field)
+                stage['rows'] = csv_rows
+        else:
+            with timer.stage('csv_read') as stage:
+                csv_df = pd.read_csv(csv_path, dtype={csv_field: str})
+                csv_rows = stage['rows'] = len(csv_df)
+            with timer.stage('key_normalization', rows=csv_rows):
+                csv_df[csv_field], csv_repairs = normalize_keys(csv_df[csv_field], key_type)
+        log_repairs('CSV', key_type, csv_repairs)
+        lookup = KeyLookup(csv_df, csv_field, sample.columns, geo_field)
+        del csv_df
+        
+        # Size batches from the measured per-feature footprint, fanned out by CSV rows per key
+        feature_bytes = frame_bytes(sample) / max(len(sample), 1)
+        fan_out = lookup.rows / max(len(lookup.keys), 1)
+        lookup_bytes = lookup.nbytes()
+        row_bytes = lookup_bytes / max(lookup.rows, 1)
+        batch_size = batch_features(memory_cap_mb, lookup_bytes, (feature_bytes + row_bytes) * max(fan_out, 1))
+        del sample
+        logger.info(f"Out-of-core join: {lookup_bytes / 1024 / 1024:.1f} MB CSV lookup, "
+                    f"{batch_size:,} features per batch under a {memory_cap_mb} MB cap")
+        
+        total_geo = successful = unmatched_geo = joined_rows = batches = largest_batch = 0
+        geo_repairs = Counter()
+        csv_matched = np.zeros(lookup.rows, dtype=bool)
+        batch_iter = layer_batches(path, batch_size, read_geometry=read_geometry)
+        while True:
+            with timer.stage('layer_read') as stage:
+                batch = next(batch_iter, None)
+                stage['rows'] = 0 if batch is None else len(batch)
+            if batch is None:
+                break
+            with timer.stage('key_normalization', rows=len(batch)):
+                batch[geo_field], repairs = normalize_keys(batch[geo_field], key_type)
+                geo_repairs.update(repairs)
+            with timer.stage('merge', rows=len(batch)):
+                joined, csv_positions, unmatched = lookup.join(batch, geo_field, matched_only)
+                csv_matched[csv_positions] = True
+            largest_batch = max(largest_batch, frame_bytes(batch) + frame_bytes(joined))
+            total_geo += len(batch)
+            successful += len(csv_positions)
+            unmatched_geo += unmatched
+            batches += 1
+            del batch
+            if len(joined):
+                with timer.stage('export', rows=len(joined)):
+                    writer.write(joined)
+                joined_rows += len(joined)
+            del joined
+        log_repairs('layer', key_type, dict(geo_repairs))
+        
+        join_stats = {
+            'total_geographic_features': total_geo,
+            'total_csv_records': lookup.rows,
+            'successful_joins': successful,
+            'join_rate': f"{(successful / total_geo) * 100:.1f}%" if total_geo else '0.0%',
+            'unmatched_geographic': unmatched_geo,
+            'unmatched_csv': int((~csv_matched).sum()),
+            'key_type': key_type,
+            'key_repairs': {side: dict(counts) for side, counts in
+                            [('csv', csv_repairs), ('geographic', geo_repairs)] if counts},
+            'out_of_core': {
+                'memory_cap_mb': memory_cap_mb,
+                'lookup_mb': round(lookup_bytes / 1024 / 1024, 1),
+                'batch_features': batch_size,
+                'batches': batches,
+                'largest_batch_mb': round(largest_batch / 1024 / 1024, 1),
+                'rows_written': joined_rows
+            },
+            'output': str(writer.output)
+        }
+        if aggregate:
+            join_stats['csv_rows_aggregated'] = csv_rows
+        join_stats['timings'] = timer.summary()
+        
+        with open(Path(output_path).with_suffix('.json'), 'w') as f:
+            json.dump(join_stats, f, indent=2)
+        logger.info(f"Out-of-core join completed: {successful:,} rows joined to {total_geo:,} features "
+                    f"in {batches} batches")
+        return join_stats
+    
+    def get_crosswalk(self, source_layer: str, source_field: str, target_layer: str,
+                      target_field: str, method: str = 'area',
+                      weight_layer: Optional[str] = None, weight_field: Optional[str] = None,
+                      workers: Optional[int] = None) -> Crosswalk:
+        """Crosswalk from one catalog layer to another, built once and stored
+        
+        Stored under <data_dir>/crosswalks and rebuilt only when a layer file
+        is newer. method is 'area', or 'population' with a finer weight_layer
+        whose weight_field holds population.
+        """
+        parts = [Path(source_layer).stem, source_field, Path(target_layer).stem, target_field, method]
+        layers = [source_layer, target_layer]
+        if method == 'population' and weight_layer:
+            parts += [Path(weight_layer).stem, str(weight_field)]
+            layers.append(weight_layer)
+        path = self.data_dir / CROSSWALK_DIR / ('__'.join(parts) + '.npz')
+        layer_paths = [Path(self.available_layers[layer]['path']) for layer in layers]
+        
+        if path.exists() and all(path.stat().st_mtime >= p.stat().st_mtime for p in layer_paths):
+            return Crosswalk.load(path)
+        
+        started = time.perf_counter()
+        source = layer_cache.get(layer_paths[0])
+        target = layer_cache.get(layer_paths[1])
+        source_type = detect_key_type(source[source_field], source_field)
+        target_type = detect_key_type(target[target_field], target_field)
+        crosswalk = Crosswalk.build(
+            source, normalize_keys(source[source_field], source_type)[0],
+            target, normalize_keys(target[target_field], target_type)[0],
+            method=method,
+            weight_layer=layer_cache.get(layer_paths[2]) if len(layer_paths) > 2 else None,
+            weight_field=weight_field, workers=workers, source_key_type=source_type)
+        crosswalk.save(path)
+        logger.info(f"Built {method} crosswalk {source_layer} -> {target_layer} "
+                    f"({len(crosswalk.rows):,} pairs) in {time.perf_counter() - started:.1f}s: {path}")
+        return crosswalk
+    
+    def assign_points(self, csv_path: str, layer_name: str, geo_field: str, output_path: str,
+                      point_fields: Optional[Tuple[str, str]] = None,
+                      chunksize: int = POINT_CHUNK_ROWS,
+                      workers: Optional[int] = None) -> Dict:
+        """Stream a lat/lon CSV to output_path (.csv) with the containing polygon's geo_field
+        
+        Rows are read, located and appended chunk by chunk, so memory is
+        bounded by chunksize. point_fields defaults to detected lat/lon columns.
+        Returns point counts (assigned, outside the layer, invalid coordinates).
+        """
+        if point_fields is None:
+            point_fields = detect_point_fields(pd.read_csv(csv_path, nrows=0).columns)
+            if point_fields is None:
+                raise ValueError(f"No latitude/longitude columns found in {csv_path}")
+        lat_field, lon_field = point_fields
+        
+        polygons = layer_cache.get(self.available_layers[layer_name]['path'])
+        key_type = detect_key_type(polygons[geo_field], geo_field)
+        polygon_keys, _ = normalize_keys(polygons[geo_field], key_type)
+        
+        output_file = Path(output_path).with_suffix('.csv')
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        with PointLocator(polygons.geometry, polygon_keys, workers) as locator:
+            for i, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunksize)):
+                assigned = geo_field if geo_field not in chunk.columns else f'{geo_field}_assigned'
+                chunk[assigned] = locator.locate(chunk[lon_field], chunk[lat_field]).to_numpy()
+                chunk.to_csv(output_file, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        
+        stats = dict(locator.stats, key_type=key_type, output=str(output_file),
+                     seconds=round(time.perf_counter() - started, 3))
+        logger.info(f"Assigned {stats.get('assigned', 0):,} of {stats.get('points', 0):,} points "
+                    f"to {layer_name} in {stats['seconds']}s")
+        return stats
+    
+    def composite_join(self, csv_df: pd.DataFrame, geo_df: pd.DataFrame, csv_field: str, geo_field: str,
+                       fuzzy_match: bool = False, threshold: int = 80, indicator: bool = False):
+        """Join on a multi-column key hashed into one value per row
+        
+        Component key types are detected on the layer side and both sides
+        are normalized the same way (state names/abbreviations -> FIPS,
+        names without 'County'/'Parish'...). With fuzzy_match, CSV rows whose
+        composite has no exact partner are name-matched within their state;
+        names matching several features are counted as ambiguous and left out.
+        CSV columns named like a layer field (ignoring case) get a '_csv' suffix.
+        Returns (joined frame, {'fields', 'key_types', 'exact', 'fuzzy', 'ambiguous'}).
+        """
+        csv_fields, geo_fields = split_key_fields(csv_field), split_key_fields(geo_field)
+        key_types = component_key_types(geo_df, geo_fields)
+        geo_keys = composite_keys(geo_df, geo_fields, key_types)
+        csv_keys = composite_keys(csv_df, csv_fields, key_types)
+        
+        keyed = csv_df.assign(**{COMPOSITE_KEY: csv_keys})
+        exact = keyed[COMPOSITE_KEY].isin(geo_keys.dropna()).to_numpy()
+        stats = {'fields': f"{csv_field} -> {geo_field}", 'key_types': key_types,
+                 'exact': int(exact.sum()), 'fuzzy': 0, 'ambiguous': 0}
+        parts = [keyed[exact]]
+        
+        if fuzzy_match and not exact.all():
+            positions = fuzzy_components(key_types)
+            if positions is None:
+                logger.warning(f"Fuzzy fallback needs one name component plus an optional state "
+                               f"(got {key_types}); unmatched composites stay unmatched")
+            else:
+                fuzzy, stats['ambiguous'] = match_leftovers(keyed[~exact], geo_df, geo_keys, csv_fields,
+                                                            geo_fields, positions, threshold)
+                stats['fuzzy'] = int(fuzzy[CSV_ROW_ID].nunique()) if CSV_ROW_ID in fuzzy else len(fuzzy)
+                parts.append(fuzzy)
+        logger.info(f"Composite key {stats['fields']}: {stats['exact']:,} exact, {stats['fuzzy']:,} fuzzy "
+                    f"of {len(csv_df):,} CSV rows")
+        
+        # Component columns often differ from the layer's only by case ('State'/'STATE'),
+        # which GPKG field names don't distinguish
+        matched = pd.concat(parts, ignore_index=True)
+        layer_columns = {str(col).lower() for col in geo_df.columns}
+        matched = matched.rename(columns={col: f'{col}_csv' for col in matched.columns
+                                          if str(col).lower() in layer_columns and col != COMPOSITE_KEY})
+        joined_df = geo_df.assign(**{COMPOSITE_KEY: geo_keys}).merge(
+            matched, on=COMPOSITE_KEY, how='left', indicator=JOIN_INDICATOR if indicator else False
+        ).drop(columns=[COMPOSITE_KEY])
+        return joined_df, stats
+    
     def fuzzy_join(self, csv_df: pd.DataFrame, geo_df: gpd.GeoDataFrame, 
-                   csv_field: str, geo_field: str, threshold: int = 80) -> gpd.GeoDataFrame:
-        """Perform fuzzy string matching for name-based joins"""
+                   csv_field: str, geo_field: str, threshold: int = 80,
+                   indicator: bool = False, csv_state_field: Optional[str] = None,
+                   geo_state_field: Optional[str] = None) -> gpd.GeoDataFrame:
+        """Perform fuzzy string matching for name-based joins
+        
+        Names are normalized into an exact-match alias index first; only the
+        leftovers are similarity-scored, within their state when both sides
+        carry one (CSV state column or 'Name, State' values).
+        """
         logger.info("Performing fuzzy name matching...")
         
-        # Create lookup dictionary for geographic names
-        geo_names = geo_df[geo_field].tolist()
-        csv_names = csv_df[csv_field].unique().tolist()
+        geo_state_field = geo_state_field or detect_state_field(geo_df.columns)
+        csv_state_field = csv_state_field or detect_csv_state_field(
+            [col for col in csv_df.columns if col != csv_field])
+        if geo_state_field:
+            logger.info(f"Blocking name matches by state ({csv_state_field or 'from names'} -> {geo_state_field})")
         
-        # Find best matches
-        matches = {}
-        for csv_name in csv_names:
-            if pd.isna(csv_name):
-                continue
-                
-            best_match = process.extractOne(csv_name, geo_names)
-            if best_match and best_match[1] >= threshold:
-                matches[csv_name] = best_match[0]
-                
-        logger.info(f"Found {len(matches)} fuzzy matches above {threshold}% threshold")
+        matcher = NameMatcher(geo_df[geo_field],
+                              geo_df[geo_state_field] if geo_state_field else None,
+                              threshold=threshold)
+        match_keys = matcher.match(csv_df[csv_field],
+                                   csv_df[csv_state_field] if csv_state_field else None)
+        logger.info(f"Found {int(match_keys.notna().sum())} fuzzy matches above {threshold}% threshold")
         
-        # Apply matches to CSV
-        csv_df_matched = csv_df.copy()
-        csv_df_matched[f'{csv_field}_matched'] = csv_df_matched[csv_field].map(matches)
+        # CSV row -> match key -> geo row position(s)
+        csv_df_matched = csv_df.assign(_match_key=match_keys.to_numpy()).merge(
+            matcher.lookup_table(), left_on='_match_key', right_on='key', how='inner'
+        ).drop(columns=['_match_key', 'key'])
+        csv_df_matched[f'{csv_field}_matched'] = geo_df[geo_field].to_numpy()[csv_df_matched['row']]
         
-        # Join on matched names
-        joined_df = geo_df.merge(
+        # Join on matched geo rows
+        joined_df = geo_df.assign(_geo_row=np.arange(len(geo_df))).merge(
             csv_df_matched, 
-            left_on=geo_field, 
-            right_on=f'{csv_field}_matched', 
-            how='left'
-        )
+            left_on='_geo_row', 
+            right_on='row', 
+            how='left',
+            indicator=JOIN_INDICATOR if indicator else False
+        ).drop(columns=['_geo_row', 'row'])
         
         return joined_df
     
     def export_results(self, joined_gdf: gpd.GeoDataFrame, output_path: str, 
-                      format_type: str = 'geojson') -> str:
-        """Export joined results to various formats"""
+                      format_type: str = 'geojson', write_stats: bool = True) -> str:
+        """Export joined results to various formats
+        
+        The join statistics, with an export stage added to a copy of their
+        timings, go to a .json sidecar (unless write_stats is False) and to
+        joined_gdf.attrs['export_stats']; join_stats itself is left as joined.
+        """
         try:
             output_path = Path(output_path)
+            timer = StageTimer()
+            with timer.stage('export', rows=len(joined_gdf)):
+                output_file = self._write_output(joined_gdf, output_path, format_type)
             
-            if format_type.lower() == 'geojson':
-                output_file = output_path.with_suffix('.geojson')
-                joined_gdf.to_file(output_file, driver='GeoJSON')
-                
-            elif format_type.lower() == 'shapefile':
-                output_file = output_path.with_suffix('.shp')
-                # Truncate column names for shapefile compatibility
-                gdf_copy = joined_gdf.copy()
-                gdf_copy.columns = [col[:10] if len(col) > 10 else col for col in gdf_copy.columns]
-                gdf_copy.to_file(output_file, driver='ESRI Shapefile')
-                
-            elif format_type.lower() == 'csv':
-                output_file = output_path.with_suffix('.csv')
-                # Export without geometry for CSV
-                df_no_geom = joined_gdf.drop(columns=['geometry'])
-                df_no_geom.to_csv(output_file, index=False)
-                
-            elif format_type.lower() == 'gpkg':
-                output_file = output_path.with_suffix('.gpkg')
-                joined_gdf.to_file(output_file, driver='GPKG')
-                
-            else:
-                raise ValueError(f"Unsupported format: {format_type}")
-            
-            # Save join statistics
             if hasattr(joined_gdf, 'attrs') and 'join_stats' in joined_gdf.attrs:
-                stats_file = output_path.with_suffix('.json')
-                with open(stats_file, 'w') as f:
-                    json.dump(joined_gdf.attrs['join_stats'], f, indent=2)
-                logger.info(f"Join statistics saved to {stats_file}")
+                stats = dict(joined_gdf.attrs['join_stats'])
+                if 'timings' in stats:
+                    timings = {stage: dict(values) for stage, values in stats['timings'].items()}
+                    export = timer.summary()['export']
+                    total = timings.pop('total')
+                    total['seconds'] = round(total['seconds'] + export['seconds'], 4)
+                    if 'peak_mb' in export:
+                        total['peak_mb'] = max(total.get('peak_mb', 0.0), export['peak_mb'])
+                    stats['timings'] = dict(timings, export=export, total=total)
+                joined_gdf.attrs['export_stats'] = stats
+                if write_stats:
+                    stats_file = output_path.with_suffix('.json')
+                    with open(stats_file, 'w') as f:
+                        json.dump(stats, f, indent=2)
+                    logger.info(f"Join statistics saved to {stats_file}")
             
             logger.info(f"Results exported to {output_file}")
             return str(output_file)
@@ -382,6 +1544,192 @@ class CSVShapefileJoiner:
         except Exception as e:
             logger.error(f"Error exporting results: {e}")
             raise
+    
+    def _write_output(self, joined_gdf: gpd.GeoDataFrame, output_path: Path, format_type: str) -> Path:
+        """Write joined results in one format; returns the file written"""
+        if format_type.lower() != 'csv' and not isinstance(joined_gdf, gpd.GeoDataFrame):
+            raise ValueError(f"{format_type} export needs geometry; join with load_geometry=True")
+        
+        if format_type.lower() == 'geojson':
+            output_file = output_path.with_suffix('.geojson')
+            joined_gdf.to_file(output_file, driver='GeoJSON')
+        
+        elif format_type.lower() == 'shapefile':
+            output_file = output_path.with_suffix('.shp')
+            # Truncate column names for shapefile compatibility
+            gdf_copy = joined_gdf.copy()
+            gdf_copy.columns = [col[:10] if len(col) > 10 else col for col in gdf_copy.columns]
+            gdf_copy.to_file(output_file, driver='ESRI Shapefile')
+        
+        elif format_type.lower() == 'csv':
+            output_file = output_path.with_suffix('.csv')
+            # Export without geometry for CSV
+            df_no_geom = joined_gdf.drop(columns=['geometry'], errors='ignore')
+            df_no_geom.to_csv(output_file, index=False)
+        
+        elif format_type.lower() == 'gpkg':
+            output_file = output_path.with_suffix('.gpkg')
+            joined_gdf.to_file(output_file, driver='GPKG')
+        
+        elif format_type.lower() == 'geoparquet':
+            if pyarrow is None:
+                raise ImportError("GeoParquet export needs pyarrow (pip install pyarrow)")
+            output_file = output_path.with_suffix('.parquet')
+            # Columnar + zstd; the bbox covering column lets readers filter spatially
+            joined_gdf.to_parquet(output_file, compression='zstd', index=False,
+                                  write_covering_bbox=True)
+        
+        elif format_type.lower() == 'flatgeobuf':
+            output_file = output_path.with_suffix('.fgb')
+            # Streamable, with a packed Hilbert R-tree spatial index
+            joined_gdf.to_file(output_file, driver='FlatGeobuf', SPATIAL_INDEX='YES')
+        
+        else:
+            raise ValueError(f"Unsupported format: {format_type}")
+        
+        return output_file
+    
+    def benchmark_exports(self, joined_gdf: gpd.GeoDataFrame, output_dir: str,
+                          formats: Optional[List[str]] = None) -> List[Dict]:
+        """Write one result in several formats; report write time and size per format
+        
+        The report (join statistics plus one entry per format) is written
+        once, to benchmark.json, after every format has run.
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        results = []
+        for format_type in formats or list(EXPORT_FORMATS):
+            started = time.perf_counter()
+            try:
+                output_file = Path(self.export_results(joined_gdf, output_dir / 'benchmark', format_type,
+                                                       write_stats=False))
+            except Exception as e:
+                results.append({'format': format_type, 'error': str(e)})
+                continue
+            seconds = time.perf_counter() - started
+            # Shapefiles are several files
+            parts = ([output_file.with_suffix(suffix) for suffix in SHAPEFILE_PARTS]
+                     if format_type == 'shapefile' else [output_file])
+            size = sum(part.stat().st_size for part in parts if part.exists())
+            results.append({'format': format_type, 'seconds': round(seconds, 3),
+                            'size_mb': round(size / 1024 / 1024, 2), 'bytes': size,
+                            'file': str(output_file)})
+        
+        report_file = output_dir / 'benchmark.json'
+        with open(report_file, 'w') as f:
+            json.dump({'features': len(joined_gdf), 'join_stats': joined_gdf.attrs.get('join_stats', {}),
+                       'exports': results}, f, indent=2)
+        logger.info(f"Export benchmark saved to {report_file}")
+        return results
+    
+    def run_batch(self, jobs: List[Dict], writers: int = BATCH_WRITERS) -> List[Dict]:
+        """Run many joins in one process, loading each layer once
+        
+        Jobs are grouped by layer and each layer is pinned in the layer cache
+        while its joins run, so even layers over LAYER_CACHE_MB are read once.
+        Joins run one after another and finished results are written by a
+        pool of writer threads while the next join runs; at most writers * 2
+        results wait for a writer at a time. Returns one summary dict per
+        job, in manifest order.
+        """
+        summaries = [{'name': job['name'], 'csv': job['csv'], 'layer': job['layer'],
+                      'output': None, 'error': None} for job in jobs]
+        order = sorted(range(len(jobs)), key=lambda i: jobs[i]['layer'])
+        
+        def write(i, joined_gdf, started):
+            job = jobs[i]
+            export_started = time.perf_counter()
+            try:
+                summaries[i]['output'] = self.export_results(joined_gdf, job['output'], job['format'])
+            except Exception as e:
+                summaries[i]['error'] = f"export failed: {e}"
+            summaries[i]['export_seconds'] = round(time.perf_counter() - export_started, 3)
+            summaries[i]['total_seconds'] = round(time.perf_counter() - started, 3)
+        
+        with ThreadPoolExecutor(max_workers=writers, thread_name_prefix='batch-writer') as pool:
+            pending = set()
+            for layer, group in groupby(order, key=lambda i: jobs[i]['layer']):
+                layer_path = self.available_layers.get(layer, {}).get('path')
+                with layer_cache.pin(layer_path) if layer_path else nullcontext():
+                    for i in group:
+                        job = jobs[i]
+                        started = time.perf_counter()
+                        logger.info(f"Batch job {job['name']}: {Path(job['csv']).name} -> {job['layer']}")
+                        try:
+                            joined_gdf = self.perform_join(
+                                job['csv'], job['layer'], job['csv_field'], job['geo_field'],
+                                job.get('fuzzy', False),
+                                load_geometry=job['format'] != 'csv',
+                                matched_only=job.get('matched_only', False),
+                                geo_columns=job.get('geo_columns'),
+                                aggregate=job.get('aggregate'),
+                                chunksize=job.get('chunksize', CSV_CHUNK_ROWS),
+                                weight_field=job.get('weight_field')
+                            )
+                        except Exception as e:
+                            summaries[i]['error'] = f"join failed: {e}"
+                            summaries[i]['total_seconds'] = round(time.perf_counter() - started, 3)
+                            continue
+                        
+                        stats = joined_gdf.attrs.get('join_stats', {})
+                        summaries[i].update({
+                            'join_seconds': round(time.perf_counter() - started, 3),
+                            'successful_joins': stats.get('successful_joins'),
+                            'join_rate': stats.get('join_rate'),
+                            'unmatched_csv': stats.get('unmatched_csv')
+                        })
+                        pending.add(pool.submit(write, i, joined_gdf, started))
+                        if len(pending) >= writers * 2:
+                            # Every queued result is a joined frame held in memory
+                            _, pending = wait(pending, return_when=FIRST_COMPLETED)
+        
+        failed = sum(1 for summary in summaries if summary['error'])
+        logger.info(f"Batch finished: {len(jobs) - failed}/{len(jobs)} jobs succeeded "
+                    f"({layer_cache.stats()['hits']} layer cache hits)")
+        return summaries
+
+def parse_aggregate_spec(spec: str) -> Dict[str, List[str]]:
+    """Parse "col:mean+max,col2:sum" into {column: [functions]}"""
+    aggregate = {}
+    for item in spec.split(','):
+        column, _, functions = item.partition(':')
+        aggregate[column.strip()] = (functions or 'sum').split('+')
+    return aggregate
+
+def load_batch_manifest(manifest_path: str) -> List[Dict]:
+    """Read a batch manifest into a list of fully specified jobs
+    
+    The manifest is either a list of jobs or {"defaults": {...}, "jobs": [...]}.
+    Each job needs csv, layer, csv_field, geo_field and output; relative
+    csv/output paths are resolved against the manifest's directory.
+    """
+    manifest_path = Path(manifest_path)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {'jobs': manifest}
+    
+    base_dir = manifest_path.parent
+    defaults = dict({'format': 'geojson'}, **manifest.get('defaults', {}))
+    jobs = []
+    for i, entry in enumerate(manifest.get('jobs', []), 1):
+        job = dict(defaults, **entry)
+        missing = [key for key in ('csv', 'layer', 'csv_field', 'geo_field', 'output') if key not in job]
+        if missing:
+            raise ValueError(f"Batch job {i} is missing {', '.join(missing)}")
+        unknown = set(job) - set(BATCH_OPTIONS) - {'name', 'csv', 'layer', 'csv_field', 'geo_field', 'output'}
+        if unknown:
+            raise ValueError(f"Batch job {i} has unknown option(s): {sorted(unknown)}")
+        for key in ('csv', 'output'):
+            job[key] = str(base_dir / job[key])
+        if isinstance(job.get('aggregate'), str):
+            job['aggregate'] = parse_aggregate_spec(job['aggregate'])
+        if isinstance(job.get('geo_columns'), str):
+            job['geo_columns'] = job['geo_columns'].split(',')
+        job.setdefault('name', Path(job['output']).stem)
+        jobs.append(job)
+    return jobs
 
 def main():
     """Command line interface for the join tool"""
@@ -395,36 +1743,96 @@ def main():
     parser.add_argument('--suggest-joins', type=str, 
                        help='Suggest best join options for CSV file')
     parser.add_argument('--join', nargs=5, metavar=('CSV', 'LAYER', 'CSV_FIELD', 'GEO_FIELD', 'OUTPUT'),
-                       help='Perform join: CSV_FILE LAYER_NAME CSV_FIELD GEO_FIELD OUTPUT_PATH')
+                       help='Perform join: CSV_FILE LAYER_NAME CSV_FIELD GEO_FIELD OUTPUT_PATH '
+                            '(comma-separated fields join on a composite key, e.g. "State,County" "STATE,NAME")')
+    parser.add_argument('--spatial-join', nargs=4, metavar=('CSV', 'LAYER', 'GEO_FIELD', 'OUTPUT'),
+                       help='Point-in-polygon join of a lat/lon CSV: counts (and --aggregate) per polygon')
+    parser.add_argument('--points', nargs=2, metavar=('LAT_FIELD', 'LON_FIELD'),
+                       help='Coordinate columns for --spatial-join (default: detected)')
+    parser.add_argument('--assign', action='store_true',
+                       help='With --spatial-join: write every point with its polygon GEO_FIELD instead')
+    parser.add_argument('--workers', type=int,
+                       help='Worker processes for --spatial-join and --partitioned (default: all cores)')
+    parser.add_argument('--optimize-memory', action='store_true',
+                       help='Shrink the joined table (categoricals, downcasts, no duplicate key) and report it')
+    parser.add_argument('--profile', action='store_true',
+                       help='Print per-stage time, rows/s and peak memory (traces allocations; slower)')
+    parser.add_argument('--cache', action='store_true',
+                       help='With --join: reuse cached results, re-joining only keys whose CSV rows changed')
+    parser.add_argument('--partitioned', action='store_true',
+                       help='With --join: split CSV and layer by state and join states in parallel '
+                            '(--format gpkg or geoparquet)')
+    parser.add_argument('--out-of-core', action='store_true',
+                       help='With --join: stream the layer in batches under --memory-cap and append '
+                            'the output (--format gpkg, geoparquet or csv)')
+    parser.add_argument('--memory-cap', type=float, default=OUT_OF_CORE_MEMORY_MB, metavar='MB',
+                       help='Memory cap for --out-of-core joins')
+    parser.add_argument('--crosswalk', nargs=2, metavar=('SOURCE_LAYER', 'SOURCE_FIELD'),
+                       help='With --join: CSV keys are SOURCE_LAYER units, allocated to LAYER by overlay')
+    parser.add_argument('--crosswalk-weights', nargs=2, metavar=('WEIGHT_LAYER', 'POP_FIELD'),
+                       help='Allocate by population of a finer layer instead of by area')
+    parser.add_argument('--intensive', type=str,
+                       help='Comma-separated rate columns to average (not split) through a crosswalk')
+    parser.add_argument('--join-batch', type=str, metavar='MANIFEST',
+                       help='Run every join in a JSON manifest, loading each layer once')
     parser.add_argument('--fuzzy', action='store_true', 
                        help='Use fuzzy matching for name fields')
-    parser.add_argument('--format', choices=['geojson', 'shapefile', 'csv', 'gpkg'], 
+    parser.add_argument('--matched-only', action='store_true',
+                       help='Keep only matched features (loads geometry for those only)')
+    parser.add_argument('--geo-columns', type=str,
+                       help='Comma-separated layer attributes to keep (default: all)')
+    parser.add_argument('--aggregate', type=str,
+                       help='Aggregate a record-level CSV per key, e.g. "Population:sum,Income:mean+max"')
+    parser.add_argument('--weight-field', type=str,
+                       help='CSV column that weights "weighted_mean" aggregations')
+    parser.add_argument('--chunksize', type=int, default=CSV_CHUNK_ROWS,
+                       help='CSV rows per chunk when aggregating or locating points')
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), 
                        default='geojson', help='Output format')
+    parser.add_argument('--benchmark-export', type=str, metavar='DIR',
+                       help='With --join: also write every format to DIR and compare time and size')
     
     args = parser.parse_args()
     
+    if args.profile:
+        tracemalloc.start()
+    
     # Initialize joiner
     joiner = CSVShapefileJoiner()
     
     if args.list_layers:
-        layers_df = joiner.list_available_layers()
+        summaries = joiner.layer_summaries()
         print("\nAvailable Geospatial Layers:")
         print("=" * 80)
-        print(layers_df.to_string(index=False))
+        if summaries:
+            # Plain-text table, so listing layers never loads pandas
+            headers = list(summaries[0])
+            widths = {col: max(len(col), *(len(str(row[col])) for row in summaries)) for col in headers}
+            print('  '.join(col.ljust(widths[col]) for col in headers))
+            for row in summaries:
+                print('  '.join(str(row[col]).ljust(widths[col]) for col in headers))
+        else:
+            print("No layers found")
         
     elif args.analyze_csv:
         analysis = joiner.analyze_csv(args.analyze_csv)
         if analysis:
             print(f"\nCSV Analysis: {analysis['filename']}")
             print("=" * 50)
-            print(f"Total rows: {analysis['total_rows']:,}")
-            print(f"Columns: {len(analysis['columns'])}")
+            print(f"Total rows: {analysis['total_rows']:,}"
+                  f"{'' if analysis['total_rows_exact'] else ' (newline count)'}")
+            print(f"Columns: {len(analysis['columns'])} (profiled from {analysis['sampled_rows']:,} rows)")
+            print(f"\n{'Column':30} {'Type':12} {'Conf':>6} {'Null%':>6} {'Distinct':>10}")
+            for column, profile in analysis['column_profiles'].items():
+                print(f"{column[:30]:30} {profile['inferred_type']:12} {profile['confidence']:>6.2f} "
+                      f"{profile['null_rate'] * 100:>5.1f}% {profile['distinct_estimate']:>10,}")
             print("\nPotential Join Fields:")
             for join_type, fields in analysis['potential_joins'].items():
                 if fields:
                     print(f"\n{join_type.upper()}:")
                     for field in fields:
-                        print(f"  - {field['column']} ({field['type']}): {field['sample']}")
+                        print(f"  - {field['column']} ({field['type']}, {field['confidence']:.0%} of sample): "
+                              f"{field['sample']}")
                         
     elif args.suggest_joins:
         analysis = joiner.analyze_csv(args.suggest_joins)
@@ -437,13 +1845,124 @@ def main():
                 print(f"   Coverage: {suggestion['coverage']}")
                 print(f"   Score: {suggestion['score']}")
                 for option in suggestion['join_options']:
-                    print(f"   Join: {option['csv_field']} → {option['geo_field']} ({option['confidence']} confidence)")
+                    print(f"   Join: {option['csv_field']} → {option['geo_field']} "
+                          f"({option['overlap']:.0%} of sampled values match, {option['confidence']} confidence)")
                     
+    elif args.spatial_join:
+        csv_file, layer_name, geo_field, output_path = args.spatial_join
+        point_fields = tuple(args.points) if args.points else None
+        
+        try:
+            if args.assign:
+                stats = joiner.assign_points(csv_file, layer_name, geo_field, output_path,
+                                             point_fields=point_fields, workers=args.workers)
+                print(f"\nPoints assigned: {stats.get('assigned', 0):,} of {stats.get('points', 0):,} "
+                      f"({stats.get('outside_layer', 0):,} outside, "
+                      f"{stats.get('invalid_coordinates', 0):,} invalid) in {stats['seconds']}s")
+                print(f"Output file: {stats['output']}")
+            else:
+                point_fields = point_fields or detect_point_fields(pd.read_csv(csv_file, nrows=0).columns)
+                if point_fields is None:
+                    raise ValueError("No latitude/longitude columns found; use --points LAT LON")
+                aggregate = parse_aggregate_spec(args.aggregate) if args.aggregate else None
+                joined_gdf = joiner.perform_join(csv_file, layer_name, geo_field, geo_field,
+                                                 load_geometry=args.format != 'csv',
+                                                 matched_only=args.matched_only,
+                                                 aggregate=aggregate, chunksize=args.chunksize,
+                                                 weight_field=args.weight_field,
+                                                 point_fields=point_fields, workers=args.workers)
+                output_file = joiner.export_results(joined_gdf, output_path, args.format)
+                stats = joined_gdf.attrs['join_stats']
+                points = stats.get('points', {})
+                print(f"\nSpatial join completed: {output_file}")
+                print(f"  Points: {points.get('points', 0):,} ({points.get('assigned', 0):,} inside polygons, "
+                      f"{points.get('invalid_coordinates', 0):,} invalid coordinates)")
+                print(f"  Polygons with points: {stats['successful_joins']:,} of "
+                      f"{stats['total_geographic_features']:,}")
+                if args.profile:
+                    print_timings(stats['timings'])
+        except Exception as e:
+            print(f"Error: {e}")
+        
+    elif args.join_batch:
+        jobs = load_batch_manifest(args.join_batch)
+        started = time.perf_counter()
+        summaries = joiner.run_batch(jobs)
+        elapsed = time.perf_counter() - started
+        
+        print(f"\nBatch Join: {len(jobs)} jobs in {elapsed:.1f}s")
+        print("=" * 90)
+        print(f"{'Job':28} {'Layer':22} {'Join s':>8} {'Total s':>8} {'Matched':>8} {'Rate':>7}")
+        for summary in summaries:
+            if summary['error']:
+                print(f"{summary['name'][:28]:28} {summary['layer'][:22]:22} ERROR: {summary['error']}")
+                continue
+            print(f"{summary['name'][:28]:28} {summary['layer'][:22]:22} {summary['join_seconds']:>8.2f} "
+                  f"{summary['total_seconds']:>8.2f} {summary['successful_joins']:>8,} {summary['join_rate']:>7}")
+        
+        summary_file = Path(args.join_batch).with_suffix('.summary.json')
+        with open(summary_file, 'w') as f:
+            json.dump({'elapsed_seconds': round(elapsed, 3), 'jobs': summaries}, f, indent=2)
+        print(f"\nSummary saved to {summary_file}")
+        if any(summary['error'] for summary in summaries):
+            raise SystemExit(1)
+        
     elif args.join:
         csv_file, layer_name, csv_field, geo_field, output_path = args.join
         
         try:
-            joined_gdf = joiner.perform_join(csv_file, layer_name, csv_field, geo_field, args.fuzzy)
+            if args.partitioned:
+                stats = joiner.partitioned_join(csv_file, layer_name, csv_field, geo_field, output_path,
+                                                format_type=args.format, matched_only=args.matched_only,
+                                                workers=args.workers, chunksize=args.chunksize)
+                print(f"\nPartitioned join completed in {stats['seconds']}s ({stats['partitions']} states)")
+                print(f"Output: {stats['output']}")
+                print(f"  CSV records: {stats['total_csv_records']:,}")
+                print(f"  Successful joins: {stats['successful_joins']:,} ({stats['join_rate']})")
+                return
+            
+            if args.out_of_core:
+                aggregate = parse_aggregate_spec(args.aggregate) if args.aggregate else None
+                stats = joiner.out_of_core_join(csv_file, layer_name, csv_field, geo_field, output_path,
+                                                format_type=args.format, matched_only=args.matched_only,
+                                                memory_cap_mb=args.memory_cap, aggregate=aggregate,
+                                                weight_field=args.weight_field, chunksize=args.chunksize)
+                batches = stats['out_of_core']
+                print(f"\nOut-of-core join completed: {batches['batches']} batches of "
+                      f"{batches['batch_features']:,} features (cap {batches['memory_cap_mb']} MB)")
+                print(f"Output: {stats['output']}")
+                print(f"  Geographic features: {stats['total_geographic_features']:,}")
+                print(f"  Successful joins: {stats['successful_joins']:,} ({stats['join_rate']})")
+                if args.profile:
+                    print_timings(stats['timings'])
+                return
+            
+            geo_columns = args.geo_columns.split(',') if args.geo_columns else None
+            aggregate = parse_aggregate_spec(args.aggregate) if args.aggregate else None
+            crosswalk = None
+            if args.crosswalk:
+                weight_layer, weight_field = args.crosswalk_weights or (None, None)
+                crosswalk = joiner.get_crosswalk(args.crosswalk[0], args.crosswalk[1], layer_name, geo_field,
+                                                 method='population' if weight_layer else 'area',
+                                                 weight_layer=weight_layer, weight_field=weight_field)
+            load_geometry = args.format != 'csv' or bool(args.benchmark_export)
+            if args.cache and crosswalk is None:
+                joined_gdf = joiner.cached_join(csv_file, layer_name, csv_field, geo_field, args.fuzzy,
+                                                load_geometry=load_geometry,
+                                                matched_only=args.matched_only,
+                                                geo_columns=geo_columns, aggregate=aggregate,
+                                                weight_field=args.weight_field,
+                                                optimize_memory=args.optimize_memory)
+            else:
+                joined_gdf = joiner.perform_join(csv_file, layer_name, csv_field, geo_field, args.fuzzy,
+                                                 load_geometry=load_geometry,
+                                                 matched_only=args.matched_only,
+                                                 geo_columns=geo_columns,
+                                                 aggregate=aggregate, chunksize=args.chunksize,
+                                                 weight_field=args.weight_field,
+                                                 crosswalk=crosswalk,
+                                                 intensive=args.intensive.split(',') if args.intensive else None,
+                                                 optimize_memory=args.optimize_memory)
             output_file = joiner.export_results(joined_gdf, output_path, args.format)
             
             print(f"\nJoin completed successfully!")
@@ -454,8 +1973,35 @@ def main():
                 print(f"\nJoin Statistics:")
                 print(f"  Geographic features: {stats['total_geographic_features']:,}")
                 print(f"  CSV records: {stats['total_csv_records']:,}")
+                if 'csv_rows_aggregated' in stats:
+                    print(f"  CSV rows aggregated: {stats['csv_rows_aggregated']:,}")
+                if 'rollup' in stats:
+                    print(f"  Rolled up: {stats['rollup']}")
+                if 'composite' in stats:
+                    print(f"  Composite key: {stats['composite']['exact']:,} exact, "
+                          f"{stats['composite']['fuzzy']:,} fuzzy CSV matches, "
+                          f"{stats['composite'].get('ambiguous', 0):,} ambiguous")
+                if 'crosswalk' in stats:
+                    print(f"  Allocated by {stats['crosswalk']['method']} from "
+                          f"{stats['crosswalk']['csv_rows']:,} CSV rows")
                 print(f"  Successful joins: {stats['successful_joins']:,}")
                 print(f"  Join rate: {stats['join_rate']}")
+                if 'cache' in stats:
+                    changed = f" ({stats['changed_keys']:,} changed keys)" if 'changed_keys' in stats else ''
+                    print(f"  Cache: {stats['cache']}{changed}")
+                if 'memory' in stats:
+                    print(f"  Memory: {stats['memory']['before_mb']} MB -> {stats['memory']['after_mb']} MB")
+                if args.profile and 'timings' in stats:
+                    print_timings(joined_gdf.attrs.get('export_stats', stats)['timings'])
+            
+            if args.benchmark_export:
+                print(f"\nExport Benchmark ({len(joined_gdf):,} features):")
+                print(f"  {'Format':12} {'Seconds':>9} {'Size MB':>9}")
+                for result in joiner.benchmark_exports(joined_gdf, args.benchmark_export):
+                    if 'error' in result:
+                        print(f"  {result['format']:12} ERROR: {result['error']}")
+                    else:
+                        print(f"  {result['format']:12} {result['seconds']:>9.3f} {result['size_mb']:>9.2f}")
                 
         except Exception as e:
             print(f"Error: {e}")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Frame Memory
+Measures and shrinks the memory held by joined (Geo)DataFrames: repeated
+strings become categoricals, other text Arrow-backed strings, and numeric
+columns the smallest dtype that holds their values exactly
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, Tuple
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+gpd = lazy_import('geopandas')
+shapely = lazy_import('shapely')
+
+pyarrow = lazy_import('pyarrow', optional=True)  # text stays in pandas' default string dtype
+
+logger = logging.getLogger(__name__)
+
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_DISTINCT = 0.5
+
+# Smallest first: the first dtype whose range holds a column's values wins
+_INT_DTYPES = ['Int8', 'Int16', 'Int32', 'Int64']
+
+
+def frame_bytes(frame: pd.DataFrame) -> int:
+    """Estimate memory held by a frame, including geometry coordinates"""
+    nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+    if isinstance(frame, gpd.GeoDataFrame) and frame.geometry.name in frame:
+        # Shapely objects look like 8-byte pointers to pandas; count coordinates
+        coords = shapely.get_num_coordinates(frame.geometry.values).sum()
+        nbytes += int(coords) * 16 + len(frame) * 100
+    return nbytes
+
+
+def _smallest_int(values: pd.Series):
+    """Smallest integer dtype for integral values (nullable when there are NAs), or None"""
+    present = values.dropna()
+    if present.empty or not np.all(np.mod(present.to_numpy(dtype='float64'), 1) == 0):
+        return None
+    low, high = present.min(), present.max()
+    for dtype in _INT_DTYPES:
+        info = np.iinfo(dtype.lower())
+        if info.min <= low and high <= info.max:
+            # Plain numpy ints unless there are gaps to keep
+            return dtype if len(present) < len(values) else dtype.lower()
+    return None
+
+
+def _lean_dtype(values: pd.Series):
+    """Smaller dtype that represents a column exactly, or None to keep it"""
+    if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype.name == 'geometry':
+        return None
+    if pd.api.types.is_bool_dtype(values):
+        return None
+    if pd.api.types.is_integer_dtype(values) or pd.api.types.is_float_dtype(values):
+        int_dtype = _smallest_int(values)
+        if int_dtype is not None:
+            return int_dtype if int_dtype != str(values.dtype) else None
+        if pd.api.types.is_float_dtype(values) and values.dtype != np.float32:
+            as_float32 = values.to_numpy(dtype='float64', na_value=np.nan).astype(np.float32)
+            if np.array_equal(as_float32.astype(np.float64),
+                              values.to_numpy(dtype='float64', na_value=np.nan), equal_nan=True):
+                return 'float32'
+        return None
+    if pd.api.types.is_string_dtype(values) or values.dtype == object:
+        if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) != 'string':
+            return None  # mixed objects (dicts, lists...) stay as they are
+        if len(values) and values.nunique() <= CATEGORY_MAX_DISTINCT * len(values):
+            return 'category'
+        if pyarrow is not None and getattr(values.dtype, 'storage', None) != 'pyarrow':
+            return 'string[pyarrow]'
+    return None
+
+
+def optimize_frame(frame: pd.DataFrame, drop_columns: Iterable[str] = ()) -> Tuple[pd.DataFrame, Dict]:
+    """Lean copy of a frame plus a report of memory before and after
+
+    Geometry is left untouched. Returns (frame, {'before_mb', 'after_mb',
+    'dropped', 'converted': {column: 'old -> new'}}).
+    """
+    before = frame_bytes(frame)
+    dropped = [col for col in drop_columns if col in frame.columns]
+    lean = frame.drop(columns=dropped)
+
+    converted = {}
+    for column in lean.columns:
+        dtype = _lean_dtype(lean[column])
+        if dtype is None:
+            continue
+        old = str(lean[column].dtype)
+        lean[column] = lean[column].astype(dtype)
+        converted[column] = f'{old} -> {dtype}'
+
+    report = {
+        'before_mb': round(before / 1024 / 1024, 2),
+        'after_mb': round(frame_bytes(lean) / 1024 / 1024, 2),
+        'dropped': dropped,
+        'converted': converted
+    }
+    logger.info(f"Optimized joined frame: {report['before_mb']} MB -> {report['after_mb']} MB "
+                f"({len(converted)} columns converted, {len(dropped)} dropped)")
+    return lean, report
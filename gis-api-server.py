@@ -7,19 +7,49 @@ Super simple to start - just run: python3 gis-api-server.py
 
 import os
 import json
+import shutil
+import signal
 import sys
+import gzip
+import hashlib
+import threading
+import time
+import zipfile
+from collections import OrderedDict
 from pathlib import Path
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
 import pandas as pd
 
+from tile_renderer import (TileRenderer, build_feature_colors, COLOR_RAMPS,
+                           CLASSIFICATION_METHODS)
+from job_queue import JobQueue, QueueFullError
+from cache_snapshot import Snapshot, save_snapshot
+from request_profiler import SlowRequestProfiler
+
 # Simple Flask app
 app = Flask(__name__)
 CORS(app)  # Allow cross-origin requests
 
 # Configuration
 DATA_DIR = Path(__file__).parent / 'data'
+TILE_CACHE_DIR = Path(__file__).parent / 'tile_cache'
+JOB_CACHE_DIR = Path(__file__).parent / 'job_cache'
+SNAPSHOT_DIR = Path(__file__).parent / 'server_snapshot'
+SLOW_REQUEST_DIR = Path(__file__).parent / 'slow_requests'
 PORT = 5000
+MAX_TILE_ZOOM = 14
+JOB_WORKERS = 2
+MAX_PENDING_JOBS = 16
+JOB_FORMATS = ['geojson', 'shapefile', 'csv', 'gpkg', 'geoparquet', 'flatgeobuf']
+MAX_CACHED_RESPONSES = 64
+MAX_RESPONSE_CACHE_MB = 512
+SNAPSHOT_INTERVAL = 600  # Seconds between warm-cache snapshots (0 = only on shutdown)
+SLOW_REQUEST_MS = 0      # Requests slower than this get a sampled stack profile (0 = off)
+
+# Profile slow requests into slow_requests/*.folded (flamegraph.pl / speedscope)
+# once SLOW_REQUEST_MS is set, e.g. to 1000
+profiler = SlowRequestProfiler(app, threshold_ms=SLOW_REQUEST_MS, log_dir=SLOW_REQUEST_DIR)
 
 # Your database datasets
 DATASETS = {
@@ -73,7 +103,12 @@ def home():
             '/api/datasets': 'List available datasets',
             '/api/geography/{type}': 'Get geography data',
             '/api/inventory': 'Database inventory',
-            '/api/analyze-csv': 'Analyze CSV for joins'
+            '/api/analyze-csv': 'Analyze CSV for joins',
+            '/api/tiles/{type}': 'Register choropleth values for tile rendering (POST)',
+            '/api/tiles/{type}/{values_hash}/{z}/{x}/{y}.png': 'Rendered choropleth PNG tile',
+            '/api/jobs': 'Queue a join or export job (POST) / list jobs',
+            '/api/jobs/{id}': 'Job status and progress',
+            '/api/jobs/{id}/result': 'Download a finished job result'
         },
         'datasets': len(DATASETS),
         'data_size': '3.2GB'
@@ -88,6 +123,111 @@ def list_datasets():
         'total_size': '3.2GB'
     })
 
+# Parsed datasets, keyed by geo_type -> (mtime, dataset dict)
+_dataset_cache = {}
+_dataset_lock = threading.Lock()
+
+# Gzipped /api/geography bodies, keyed by (geo_type, state) -> (mtime, bytes)
+_response_cache = OrderedDict()
+_response_lock = threading.Lock()
+
+# Warm caches restored from disk at startup (see cache_snapshot.py)
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_cache_dirty = False
+
+def dataset_sources():
+    """Source file for every dataset, used to validate snapshots"""
+    return {geo_type: DATA_DIR / info['file'] for geo_type, info in DATASETS.items()}
+
+def cached_response(geo_type, key, mtime):
+    """Gzipped response body from memory or the snapshot, or None"""
+    with _response_lock:
+        cached = _response_cache.get((geo_type, key))
+        if cached and cached[0] == mtime:
+            _response_cache.move_to_end((geo_type, key))
+            return cached[1]
+    if _snapshot:
+        return _snapshot.response(geo_type, key)
+    return None
+
+def store_response(geo_type, key, mtime, body):
+    """Keep a gzipped response, evicting least recently used entries"""
+    global _cache_dirty
+    with _response_lock:
+        _response_cache[(geo_type, key)] = (mtime, body)
+        _response_cache.move_to_end((geo_type, key))
+        total = sum(len(entry[1]) for entry in _response_cache.values())
+        while len(_response_cache) > 1 and (
+                len(_response_cache) > MAX_CACHED_RESPONSES or
+                total > MAX_RESPONSE_CACHE_MB * 1024 * 1024):
+            _, (_, evicted) = _response_cache.popitem(last=False)
+            total -= len(evicted)
+        _cache_dirty = True
+
+def gzip_json_response(body):
+    """Send a gzipped JSON body, inflating it for clients without gzip"""
+    if 'gzip' in request.accept_encodings:
+        response = Response(body, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(gzip.decompress(body), mimetype='application/json')
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+def source_version(file_path):
+    """Short mtime/size token of a source file (tile cache paths include it)"""
+    stat = Path(file_path).stat()
+    return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+def prune_stale_tiles(geo_type, version):
+    """Remove cached tiles rendered from earlier versions of a dataset"""
+    for stale in (TILE_CACHE_DIR / geo_type).glob('*'):
+        if stale.is_dir() and stale.name != version:
+            shutil.rmtree(stale, ignore_errors=True)
+
+def load_dataset(geo_type):
+    """Load a dataset once and keep it with its spatial and key indexes"""
+    file_path = DATA_DIR / DATASETS[geo_type]['file']
+    mtime = file_path.stat().st_mtime
+    
+    with _dataset_lock:
+        cached = _dataset_cache.get(geo_type)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        
+        prune_stale_tiles(geo_type, source_version(file_path))
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        
+        features = data.get('features', [])
+        bboxes = _snapshot.spatial_index(geo_type, len(features)) if _snapshot else None
+        dataset = {
+            'data': data,
+            'renderer': TileRenderer(features, bboxes),
+            'key_indexes': _snapshot.key_indexes(geo_type) if _snapshot else {}
+        }
+        _dataset_cache[geo_type] = (mtime, dataset)
+        mark_cache_dirty()
+        return dataset
+
+def mark_cache_dirty():
+    """Note that warm caches changed since the last snapshot"""
+    global _cache_dirty
+    _cache_dirty = True
+
+def get_key_index(dataset, field):
+    """Map join-field values to the indices of the features that carry them"""
+    if field not in dataset['key_indexes']:
+        index = {}
+        for i, feature in enumerate(dataset['data'].get('features', [])):
+            value = feature.get('properties', {}).get(field)
+            if value is not None:
+                index.setdefault(str(value), []).append(i)
+        dataset['key_indexes'][field] = index
+        mark_cache_dirty()
+    return dataset['key_indexes'][field]
+
 @app.route('/api/geography/<geo_type>')
 def get_geography(geo_type):
     """Get geography data by type"""
@@ -106,12 +246,17 @@ def get_geography(geo_type):
                 'dataset': DATASETS[geo_type]
             }), 404
         
-        # Load the data
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        state_filter = request.args.get('state')
+        mtime = file_path.stat().st_mtime
+        body = cached_response(geo_type, state_filter or '', mtime)
+        if body is not None:
+            return gzip_json_response(body)
+        
+        # Shallow copy so filtering never touches the cached dataset
+        data = dict(load_dataset(geo_type)['data'])
+        data['metadata'] = dict(data.get('metadata', {}))
         
         # Filter by state if requested
-        state_filter = request.args.get('state')
         if state_filter and 'features' in data:
             original_count = len(data['features'])
             data['features'] = [
@@ -121,20 +266,18 @@ def get_geography(geo_type):
             filtered_count = len(data['features'])
             
             # Add metadata about filtering
-            if 'metadata' not in data:
-                data['metadata'] = {}
             data['metadata']['filtered'] = True
             data['metadata']['state_filter'] = state_filter
             data['metadata']['original_count'] = original_count
             data['metadata']['filtered_count'] = filtered_count
         
         # Add dataset info
-        if 'metadata' not in data:
-            data['metadata'] = {}
         data['metadata']['dataset_info'] = DATASETS[geo_type]
         data['metadata']['geography_type'] = geo_type
         
-        return jsonify(data)
+        body = gzip.compress(json.dumps(data).encode('utf-8'), compresslevel=6)
+        store_response(geo_type, state_filter or '', mtime, body)
+        return gzip_json_response(body)
         
     except Exception as e:
         return jsonify({
@@ -266,11 +409,334 @@ def analyze_csv():
             'error': f'Failed to analyze CSV: {str(e)}'
         }), 500
 
+@app.route('/api/tiles/<geo_type>', methods=['POST'])
+def register_tile_values(geo_type):
+    """Register choropleth values and return the tile URL template"""
+    if geo_type not in DATASETS:
+        return jsonify({
+            'error': f'Dataset "{geo_type}" not found',
+            'available': list(DATASETS.keys())
+        }), 404
+    
+    payload = request.get_json()
+    if not payload or not payload.get('values'):
+        return jsonify({'error': 'No values provided'}), 400
+    
+    join_field = payload.get('join_field', 'GEOID')
+    if join_field not in DATASETS[geo_type]['join_fields'] + ['GEOID']:
+        return jsonify({
+            'error': f'Unsupported join field: {join_field}',
+            'join_fields': DATASETS[geo_type]['join_fields']
+        }), 400
+    
+    values = {str(key): value for key, value in payload['values'].items()}
+    canonical = json.dumps({'join_field': join_field, 'values': values}, sort_keys=True)
+    values_hash = hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+    
+    values_file = TILE_CACHE_DIR / 'values' / f'{values_hash}.json'
+    if not values_file.exists():
+        values_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = values_file.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_file.write_text(canonical)
+        os.replace(tmp_file, values_file)
+    
+    # Breaks for the requested (or default) classification, for map legends
+    method = payload.get('method', 'quantile')
+    classes = int(payload.get('classes', 5))
+    if method not in CLASSIFICATION_METHODS or not 1 <= classes <= 9:
+        return jsonify({'error': 'Invalid classification parameters'}), 400
+    _, breaks = build_feature_colors({}, values, classes=classes, method=method)
+    
+    return jsonify({
+        'values_hash': values_hash,
+        'breaks': breaks,
+        'join_field': join_field,
+        'value_count': len(values),
+        'tiles': f'/api/tiles/{geo_type}/{values_hash}/{{z}}/{{x}}/{{y}}.png',
+        'ramps': list(COLOR_RAMPS.keys()),
+        'methods': CLASSIFICATION_METHODS
+    })
+
+@app.route('/api/tiles/<geo_type>/<values_hash>/<int:z>/<int:x>/<int:y>.png')
+def get_tile(geo_type, values_hash, z, x, y):
+    """Render (or serve from the disk cache) one choropleth PNG tile"""
+    if geo_type not in DATASETS:
+        return jsonify({'error': f'Dataset "{geo_type}" not found'}), 404
+    
+    ramp = request.args.get('ramp', 'blues')
+    method = request.args.get('method', 'quantile')
+    try:
+        classes = int(request.args.get('classes', 5))
+    except ValueError:
+        classes = 0
+    
+    if ramp not in COLOR_RAMPS or method not in CLASSIFICATION_METHODS or not 1 <= classes <= 9:
+        return jsonify({
+            'error': 'Invalid style parameters',
+            'ramps': list(COLOR_RAMPS.keys()),
+            'methods': CLASSIFICATION_METHODS,
+            'classes': '1-9'
+        }), 400
+    if not 0 <= z <= MAX_TILE_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({'error': f'Invalid tile {z}/{x}/{y}'}), 400
+    if not all(c in '0123456789abcdef' for c in values_hash):
+        return jsonify({'error': 'Invalid values hash'}), 400
+    
+    file_path = DATA_DIR / DATASETS[geo_type]['file']
+    if not file_path.exists():
+        return jsonify({'error': f'Data file not found: {file_path}'}), 404
+    
+    # Tiles are keyed by the source file's version, so edits never serve stale tiles
+    style = f'{ramp}-{method}-{classes}'
+    tile_file = (TILE_CACHE_DIR / geo_type / source_version(file_path) / values_hash / style /
+                 str(z) / str(x) / f'{y}.png')
+    if tile_file.exists():
+        return send_from_directory(tile_file.parent, tile_file.name, mimetype='image/png')
+    
+    values_file = TILE_CACHE_DIR / 'values' / f'{values_hash}.json'
+    if not values_file.exists():
+        return jsonify({'error': f'Unknown values hash: {values_hash}'}), 404
+    
+    try:
+        registered = json.loads(values_file.read_text())
+        dataset = load_dataset(geo_type)
+        key_index = get_key_index(dataset, registered['join_field'])
+        feature_colors, _ = build_feature_colors(
+            key_index, registered['values'], ramp, classes, method
+        )
+        png = dataset['renderer'].render_tile(z, x, y, feature_colors)
+        
+        tile_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = tile_file.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp_file.write_bytes(png)
+        os.replace(tmp_file, tile_file)
+        
+        return Response(png, mimetype='image/png')
+    
+    except Exception as e:
+        return jsonify({
+            'error': f'Failed to render tile: {str(e)}',
+            'dataset': geo_type
+        }), 500
+
+# Background worker pool for joins and exports
+job_queue = JobQueue(JOB_CACHE_DIR, max_workers=JOB_WORKERS, max_pending=MAX_PENDING_JOBS)
+_joiner = None
+_joiner_lock = threading.Lock()
+
+def get_joiner():
+    """Create the CSV joiner on first use (keeps geopandas out of startup)"""
+    global _joiner
+    with _joiner_lock:
+        if _joiner is None:
+            from csv_shapefile_joiner import CSVShapefileJoiner
+            _joiner = CSVShapefileJoiner(data_dir=str(DATA_DIR))
+        return _joiner
+
+def joiner_layer_name(joiner, geo_type):
+    """Make sure the joiner knows the dataset file and return its layer name"""
+    filename = DATASETS[geo_type]['file']
+    if filename not in joiner.available_layers:
+        joiner.available_layers[filename] = {
+            'path': str(DATA_DIR / filename),
+            'type': joiner.detect_layer_type(filename),
+            'geography_level': joiner.detect_geography_level(filename)
+        }
+    return filename
+
+def package_job_output(workdir, output_file, format_type):
+    """Return the single file a client downloads for a job"""
+    if format_type != 'shapefile':
+        return output_file
+    # Shapefiles are several sidecar files; ship them as one zip
+    archive = workdir / 'result.zip'
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for part in sorted(workdir.glob('result.*')):
+            if part != archive:
+                zf.write(part, part.name)
+    return str(archive)
+
+def make_join_work(spec):
+    """Build the worker function for a CSV join job"""
+    def work(workdir, payload, progress):
+        progress(0.05, 'writing csv')
+        csv_path = workdir / 'input.csv'
+        csv_path.write_bytes(payload)
+        
+        joiner = get_joiner()
+        layer_name = joiner_layer_name(joiner, spec['geography'])
+        
+        progress(0.15, 'joining')
+        joined = joiner.perform_join(str(csv_path), layer_name, spec['csv_field'],
+                                     spec['geo_field'], spec['fuzzy'])
+        csv_path.unlink()
+        
+        progress(0.7, 'exporting')
+        output_file = joiner.export_results(joined, str(workdir / 'result'), spec['format'])
+        return package_job_output(workdir, output_file, spec['format']), joined.attrs.get('join_stats')
+    return work
+
+def make_export_work(spec):
+    """Build the worker function for a dataset export job"""
+    def work(workdir, payload, progress):
+        import geopandas as gpd
+        
+        progress(0.05, 'loading')
+        features = load_dataset(spec['geography'])['data'].get('features', [])
+        if spec.get('state'):
+            features = [f for f in features if matches_state(f, spec['state'])]
+        gdf = gpd.GeoDataFrame.from_features(features, crs='EPSG:4326')
+        
+        progress(0.5, 'exporting')
+        output_file = get_joiner().export_results(gdf, str(workdir / 'result'), spec['format'])
+        stats = {'features': len(gdf), 'state_filter': spec.get('state')}
+        return package_job_output(workdir, output_file, spec['format']), stats
+    return work
+
+def job_response(job):
+    """Public view of a job with links"""
+    view = {key: value for key, value in job.items() if key != 'traceback'}
+    view['links'] = {
+        'status': f"/api/jobs/{job['id']}",
+        'result': f"/api/jobs/{job['id']}/result"
+    }
+    return view
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue a long-running join or export job"""
+    payload = request.get_json()
+    if not payload:
+        return jsonify({'error': 'No job description provided'}), 400
+    
+    kind = payload.get('type', 'join')
+    geography = payload.get('geography')
+    format_type = payload.get('format', 'geojson')
+    
+    if kind not in ('join', 'export'):
+        return jsonify({'error': f'Unknown job type: {kind}', 'types': ['join', 'export']}), 400
+    if geography not in DATASETS:
+        return jsonify({
+            'error': f'Dataset "{geography}" not found',
+            'available': list(DATASETS.keys())
+        }), 404
+    if format_type not in JOB_FORMATS:
+        return jsonify({'error': f'Unsupported format: {format_type}', 'formats': JOB_FORMATS}), 400
+    if not (DATA_DIR / DATASETS[geography]['file']).exists():
+        return jsonify({'error': f'Data file not found for "{geography}"'}), 404
+    
+    spec = {'geography': geography, 'format': format_type}
+    csv_bytes = b''
+    
+    if kind == 'join':
+        if not payload.get('csv_field') or not payload.get('geo_field'):
+            return jsonify({'error': 'csv_field and geo_field are required'}), 400
+        if payload.get('csv'):
+            csv_bytes = payload['csv'].encode('utf-8')
+        elif payload.get('data'):
+            csv_bytes = pd.DataFrame(payload['data']).to_csv(index=False).encode('utf-8')
+        else:
+            return jsonify({'error': 'No CSV data provided'}), 400
+        spec.update({
+            'csv_field': payload['csv_field'],
+            'geo_field': payload['geo_field'],
+            'fuzzy': bool(payload.get('fuzzy', False))
+        })
+        work = make_join_work(spec)
+    else:
+        spec['state'] = payload.get('state')
+        work = make_export_work(spec)
+    
+    try:
+        job, created = job_queue.submit(kind, spec, work, csv_bytes)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    
+    return jsonify(job_response(job)), 202 if created else 200
+
+@app.route('/api/jobs')
+def list_jobs():
+    """List jobs known to this server process"""
+    jobs = [job_response(job) for job in job_queue.list_jobs()]
+    return jsonify({'jobs': jobs, 'count': len(jobs)})
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Job status and progress"""
+    job = job_queue.get(job_id) if job_id.isalnum() else None
+    if not job:
+        return jsonify({'error': f'Job not found: {job_id}'}), 404
+    return jsonify(job_response(job))
+
+@app.route('/api/jobs/<job_id>/result')
+def get_job_result(job_id):
+    """Download a finished job result"""
+    job = job_queue.get(job_id) if job_id.isalnum() else None
+    if not job:
+        return jsonify({'error': f'Job not found: {job_id}'}), 404
+    if job['status'] != 'done':
+        return jsonify({'error': f"Job is {job['status']}", 'job': job_response(job)}), 409
+    
+    result_file = job_queue.result_path(job_id)
+    return send_from_directory(result_file.parent, result_file.name, as_attachment=True)
+
 @app.route('/data/<path:filename>')
 def serve_data_file(filename):
     """Serve data files directly"""
     return send_from_directory(DATA_DIR, filename)
 
+def load_warm_snapshot():
+    """Restore warm caches saved by a previous server run"""
+    global _snapshot
+    started = time.time()
+    _snapshot = Snapshot.load(SNAPSHOT_DIR, dataset_sources())
+    if _snapshot:
+        print(f"♻️  Restored {len(_snapshot.manifest['entries'])} cached entries "
+              f"in {time.time() - started:.2f}s")
+
+def save_server_snapshot():
+    """Persist compressed responses, key indexes and spatial indexes to disk"""
+    global _snapshot, _cache_dirty
+    with _snapshot_lock:
+        sources = dataset_sources()
+        current = {geo_type: path.stat().st_mtime
+                   for geo_type, path in sources.items() if path.exists()}
+        
+        # Start from what the old snapshot still holds, then overlay live caches
+        responses = _snapshot.responses() if _snapshot else {}
+        spatial_indexes = _snapshot.spatial_indexes() if _snapshot else {}
+        key_indexes = {geo_type: _snapshot.key_indexes(geo_type)
+                       for geo_type in spatial_indexes} if _snapshot else {}
+        
+        with _response_lock:
+            for key, (mtime, body) in _response_cache.items():
+                if current.get(key[0]) == mtime:
+                    responses[key] = body
+        with _dataset_lock:
+            for geo_type, (mtime, dataset) in _dataset_cache.items():
+                if current.get(geo_type) == mtime:
+                    spatial_indexes[geo_type] = dataset['renderer'].bboxes
+                    key_indexes[geo_type] = dict(dataset['key_indexes'])
+        _cache_dirty = False
+        
+        previous = _snapshot.manifest if _snapshot else None
+        save_snapshot(SNAPSHOT_DIR, sources, responses, spatial_indexes, key_indexes, previous)
+        _snapshot = Snapshot.load(SNAPSHOT_DIR, sources)
+
+def start_snapshot_timer():
+    """Periodically snapshot warm caches so a crash loses little work"""
+    def run():
+        while True:
+            time.sleep(SNAPSHOT_INTERVAL)
+            if _cache_dirty:
+                try:
+                    save_server_snapshot()
+                except Exception as e:
+                    print(f"⚠️  Cache snapshot failed: {e}")
+    
+    if SNAPSHOT_INTERVAL > 0:
+        threading.Thread(target=run, name='cache-snapshot', daemon=True).start()
+
 def check_data_directory():
     """Check if data directory exists and has files"""
     if not DATA_DIR.exists():
@@ -303,6 +769,11 @@ if __name__ == '__main__':
         sys.exit(1)
     
     print("✅ Data directory check complete")
+    load_warm_snapshot()
+    start_snapshot_timer()
+    
+    # Deploys stop the server with SIGTERM; unwind so warm caches get saved
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     print(f"📊 Serving {len(DATASETS)} datasets")
     print("=" * 50)
     print("🎯 USAGE:")
@@ -322,4 +793,9 @@ if __name__ == '__main__':
         print("\n👋 GIS API Server stopped")
     except Exception as e:
         print(f"❌ Server error: {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+    finally:
+        job_queue.shutdown()
+        if _cache_dirty:
+            print("💾 Saving warm caches...")
+            save_server_snapshot()
\ No newline at end of file
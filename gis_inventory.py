@@ -14,6 +14,9 @@ import geopandas as gpd
 from shapely.geometry import box
 import logging
 
+from attribute_store import ATTRIBUTE_STORE_DB, attribute_store_path, save_attribute_table
+from layer_keys import build_key_index, read_attribute_table, save_key_index
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -348,6 +351,23 @@ class GISInventory:
         
         conn.commit()
         conn.close()
+        
+        # Sorted key sets per join field, used to rank join suggestions by overlap,
+        # and the attribute table with those fields indexed, for geometry-free joins
+        store_path = attribute_store_path(db_name)
+        for item in self.inventory:
+            try:
+                table = read_attribute_table(item['path'])
+                index = build_key_index(item['path'], table)
+                save_key_index(db_name, item['filename'], item['path'], index)
+            except Exception as e:
+                logger.warning(f"Could not index join keys for {item['filename']}: {e}")
+                continue
+            try:
+                save_attribute_table(store_path, item['filename'], item['path'], table,
+                                     {field: entry['key_type'] for field, entry in index.items()})
+            except Exception as e:
+                logger.warning(f"Could not store the attribute table of {item['filename']}: {e}")
         logger.info(f"Metadata database created: {db_name}")
 
 def main():
@@ -373,6 +393,7 @@ def main():
     print("Files generated:")
     print("- gis_inventory.csv (detailed inventory)")
     print("- gis_metadata.db (SQLite database)")
+    print(f"- {ATTRIBUTE_STORE_DB} (indexed attribute tables)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Job Queue
+Bounded worker pool for long-running joins and exports with a
+content-addressed result cache
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from content_hash import content_key
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ['queued', 'running', 'done', 'failed']
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds its maximum number of pending jobs"""
+
+
+class JobQueue:
+    """Runs jobs on a bounded thread pool and caches finished results on disk"""
+
+    def __init__(self, cache_dir, max_workers=2, max_pending=16):
+        self.cache_dir = Path(cache_dir)
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gis-job')
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, kind, spec, work, payload=b''):
+        """Queue a job unless an identical one is cached or in flight
+
+        work(workdir, payload, progress) must return (result_path, stats).
+        Returns (job, created) where created is False for cache hits.
+        """
+        job_id = content_key(kind, spec, payload)
+
+        with self.lock:
+            job = self.jobs.get(job_id) or self._load_finished(job_id)
+            if job and job['status'] != 'failed':
+                self.jobs[job_id] = job
+                return dict(job), False
+
+            pending = sum(1 for j in self.jobs.values() if j['status'] in ('queued', 'running'))
+            if pending >= self.max_pending:
+                raise QueueFullError(f"Job queue is full ({pending} pending jobs)")
+
+            job = {
+                'id': job_id,
+                'kind': kind,
+                'spec': spec,
+                'status': 'queued',
+                'progress': 0.0,
+                'stage': 'queued',
+                'created': time.time(),
+                'started': None,
+                'finished': None,
+                'error': None,
+                'result_file': None,
+                'stats': None
+            }
+            self.jobs[job_id] = job
+
+        self.executor.submit(self._run, job_id, work, payload)
+        logger.info(f"Queued {kind} job {job_id}")
+        return dict(job), True
+
+    def get(self, job_id):
+        """Return a snapshot of a job, including cached jobs from earlier runs"""
+        with self.lock:
+            job = self.jobs.get(job_id) or self._load_finished(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self):
+        """Return snapshots of all jobs known to this process"""
+        with self.lock:
+            return [dict(job) for job in self.jobs.values()]
+
+    def result_path(self, job_id):
+        """Path to a finished job's result file, or None"""
+        job = self.get(job_id)
+        if not job or job['status'] != 'done':
+            return None
+        return self.cache_dir / job_id / job['result_file']
+
+    def _update(self, job_id, **changes):
+        with self.lock:
+            self.jobs[job_id].update(changes)
+
+    def _run(self, job_id, work, payload):
+        workdir = self.cache_dir / job_id
+        shutil.rmtree(workdir, ignore_errors=True)
+        workdir.mkdir(parents=True)
+
+        def progress(fraction, stage):
+            self._update(job_id, progress=round(fraction, 3), stage=stage)
+
+        self._update(job_id, status='running', stage='starting', started=time.time())
+        try:
+            result_path, stats = work(workdir, payload, progress)
+            self._update(job_id, status='done', stage='done', progress=1.0,
+                         finished=time.time(), result_file=Path(result_path).name,
+                         stats=stats)
+            self._save_finished(job_id)
+            logger.info(f"Job {job_id} finished")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            self._update(job_id, status='failed', stage='failed', finished=time.time(),
+                         error=str(e), traceback=traceback.format_exc())
+
+    def _save_finished(self, job_id):
+        with self.lock:
+            job = dict(self.jobs[job_id])
+        job_file = self.cache_dir / job_id / 'job.json'
+        tmp_file = job_file.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps(job, indent=2, default=str))
+        os.replace(tmp_file, job_file)
+
+    def _load_finished(self, job_id):
+        """Load a completed job record from the result cache (lock held)"""
+        job_file = self.cache_dir / job_id / 'job.json'
+        if not job_file.exists():
+            return None
+        try:
+            job = json.loads(job_file.read_text())
+        except (OSError, ValueError):
+            return None
+        if not (self.cache_dir / job_id / job['result_file']).exists():
+            return None
+        return job
+
+    def shutdown(self, wait=False):
+        """Stop accepting work; running jobs finish unless the process exits"""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Join Key Normalization
+Detects the kind of geographic key in a column (state, county, tract, ZIP...)
+and repairs common formatting damage with vectorized string operations
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+
+from census_codes import STATE_FIPS_LOOKUP, state_to_fips
+
+logger = logging.getLogger(__name__)
+
+# Digit width of each numeric key type
+KEY_WIDTHS = {
+    'state': 2,
+    'county': 5,
+    'zip': 5,
+    'county_subdivision': 10,
+    'tract': 11,
+    'block_group': 12
+}
+
+# Census GEOID hierarchy: each level's parent, whose GEOID is its prefix
+GEOID_PARENTS = {
+    'block_group': 'tract',
+    'tract': 'county',
+    'county_subdivision': 'county',
+    'county': 'state'
+}
+
+# Field-name hints, checked before value lengths
+_ZIP_FIELD = r'(?i)(zip|zcta|postal)'
+_STATE_FIELD = r'(?i)^(state|statefp\d*|st|stusps|state_fips|state_abbr|state_name)$'
+
+
+def clean_keys(values: pd.Series) -> Tuple[pd.Series, Counter]:
+    """Repairs that apply to every key type"""
+    repairs = Counter()
+    text = values.astype('string')
+
+    def apply(rule, updated):
+        nonlocal text
+        changed = (updated != text).fillna(False)
+        repairs[rule] += int(changed.sum())
+        text = updated
+
+    apply('whitespace', text.str.strip())
+    # 1001.0 from a float column
+    apply('float_suffix', text.str.replace(r'^(\d+)\.0+$', r'\1', regex=True))
+    # 0500000US01001 / 8600000US04101 GEO_ID prefixes
+    apply('geoid_prefix', text.str.replace(r'^\d{7}US', '', regex=True))
+    # 04101_ZCTA / ZCTA5 04101
+    apply('zcta_suffix', text.str.replace(r'(?i)(_zcta\d?$|^zcta\d?\s*)', '', regex=True))
+    return text, repairs
+
+
+def detect_key_type(values: pd.Series, field_name: Optional[str] = None) -> str:
+    """Guess the key type of a column: a KEY_WIDTHS name, or 'name' for free text"""
+    cleaned, _ = clean_keys(values.dropna().head(1000))
+    cleaned = cleaned[cleaned != '']
+    if cleaned.empty:
+        return 'name'
+
+    field_name = str(field_name or '')
+    if re.search(_ZIP_FIELD, field_name):
+        return 'zip'
+    is_state_value = cleaned.str.upper().isin(STATE_FIPS_LOOKUP.keys())
+    if re.match(_STATE_FIELD, field_name) and is_state_value.mean() >= 0.8:
+        return 'state'
+
+    digits = cleaned.str.match(r'^\d+(-\d{4})?$')
+    if digits.mean() < 0.8:
+        return 'state' if is_state_value.mean() >= 0.8 else 'name'
+    if cleaned[digits].str.contains('-').any():
+        return 'zip'
+
+    # Widths come from the whole column: a sorted head may hold only short codes
+    return width_key_type(key_widths(values), field_name) or 'name'
+
+
+def key_widths(values: pd.Series) -> Counter:
+    """{digit count: keys} over the all-digit keys of a column, after clean_keys"""
+    cleaned, _ = clean_keys(values.dropna())
+    digits = cleaned[cleaned.str.fullmatch(r'\d+').fillna(False)]
+    return Counter({int(width): int(count) for width, count in digits.str.len().value_counts().items()})
+
+
+def width_key_type(widths: Counter, label: Optional[str] = None) -> Optional[str]:
+    """Numeric key type for a width distribution (see key_widths), or None
+
+    The longest code decides the type; shorter ones lost leading zeros. A
+    warning is logged when the widths present are themselves the widths of
+    different key types (10 and 11 digits: county subdivisions, or tracts
+    whose state FIPS lost its zero).
+    """
+    if not widths:
+        return None
+    longest = max(widths)
+    key_type = next((key_type for key_type, width in sorted(KEY_WIDTHS.items(), key=lambda item: item[1])
+                     if key_type != 'zip' and longest <= width), None)
+    exact = {name for name, width in KEY_WIDTHS.items() if name != 'zip' and width in widths}
+    if key_type and len(exact) > 1:
+        counts = ', '.join(f"{count:,} of {width} digits" for width, count in sorted(widths.items()))
+        logger.warning(f"{label or 'Key'} codes have mixed widths ({counts}); treating them as "
+                       f"{key_type} and zero-padding the shorter ones")
+    return key_type
+
+
+def normalize_keys(values: pd.Series, key_type: str) -> Tuple[pd.Series, Dict[str, int]]:
+    """Normalize a key column for the given key type
+
+    Returns the normalized string series and {rule: keys repaired}.
+    Free-text ('name') keys are only stripped.
+    """
+    if key_type == 'name':
+        return values.astype('string').str.strip(), {}
+
+    text, repairs = clean_keys(values)
+
+    if key_type == 'state':
+        # Abbreviations and names -> FIPS; unknown values are kept as-is
+        mapped = state_to_fips(text)
+        converted = mapped.notna() & (mapped != text)
+        repairs['state_code'] += int(converted.sum())
+        text = mapped.where(mapped.notna(), text)
+
+    if key_type == 'zip':
+        updated = text.str.replace(r'^(\d{5})-?\d{4}$', r'\1', regex=True)
+        repairs['zip_plus4'] += int((updated != text).fillna(False).sum())
+        text = updated
+
+    width = KEY_WIDTHS.get(key_type)
+    if width:
+        short = text.str.match(r'^\d+$').fillna(False) & (text.str.len() < width)
+        repairs['zero_pad'] += int(short.sum())
+        text = text.where(~short, text.str.pad(width, side='left', fillchar='0'))
+
+    return text, {rule: count for rule, count in repairs.items() if count}
+
+
+def is_rollup(source_type: str, target_type: str) -> bool:
+    """True when source_type GEOIDs roll up to target_type by prefix"""
+    level = GEOID_PARENTS.get(source_type)
+    while level is not None:
+        if level == target_type:
+            return True
+        level = GEOID_PARENTS.get(level)
+    return False
+
+
+def may_roll_up(values: pd.Series, target_type: str) -> bool:
+    """True when a sample of codes may be GEOIDs finer than target_type
+
+    Codes stored as numbers lose the state FIPS's leading zero, so the
+    longest code can be one digit short of its level; a zero-led code of
+    that width shows the widths are exact.
+    """
+    widths = key_widths(values)
+    if not widths:
+        return False
+    longest = max(widths)
+    cleaned, _ = clean_keys(values.dropna())
+    exact = cleaned[cleaned.str.len() == longest].str.startswith('0').any()
+    candidates = {longest} if exact else {longest, longest + 1}
+    return any(width in candidates and is_rollup(key_type, target_type)
+               for key_type, width in KEY_WIDTHS.items())
+
+
+def rollup_keys(keys: pd.Series, source_type: str, target_type: str) -> pd.Series:
+    """Truncate finer-level GEOIDs to their target-level prefix
+
+    Codes shorter than source_type's width are zero-padded first, so a
+    prefix is never taken from a code that lost its leading zeros.
+    """
+    if not is_rollup(source_type, target_type):
+        raise ValueError(f"{source_type} GEOIDs do not roll up to {target_type}")
+    width = KEY_WIDTHS[source_type]
+    keys = keys.astype('string')
+    short = keys.str.fullmatch(r'\d+').fillna(False) & (keys.str.len() < width)
+    keys = keys.where(~short, keys.str.pad(width, side='left', fillchar='0'))
+    return keys.str.slice(0, KEY_WIDTHS[target_type])
+
+
+def log_repairs(label: str, key_type: str, repairs: Dict[str, int]):
+    """Log how many keys each rule repaired"""
+    if repairs:
+        details = ', '.join(f"{count} {rule.replace('_', ' ')}" for rule, count in repairs.items())
+        logger.info(f"Normalized {label} keys as {key_type}: {details}")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Layer Key Index
+Persists, per layer and candidate join field, the sorted set of normalized
+key values (zlib-compressed) in the metadata database, and measures how much
+of a CSV column those keys cover
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+from join_keys import detect_key_type, normalize_keys
+from name_matching import normalize_names, split_state
+
+pyogrio = lazy_import('pyogrio', optional=True)  # geopandas falls back to fiona
+
+logger = logging.getLogger(__name__)
+
+# Layer fields worth indexing: identifiers by name pattern, plus place-name fields
+KEY_FIELD_PATTERN = (r'(?i)(fips|geoid|geo_id|zcta|zip|postal|statefp|countyfp|cousub|tract|blkgrp'
+                     r'|^state$|^state_abbr$|^stusps$|^county$|^id$)')
+NAME_KEY_FIELDS = ['NAME', 'NAMELSAD', 'BASENAME', 'COUNTY', 'CITY', 'PLACE']
+
+# Layer key types a CSV column's profiled type (csv_profile.PATTERNS) can join to
+COMPATIBLE_KEY_TYPES = {
+    'state_fips': ['state'],
+    'state': ['state'],
+    'county_fips': ['county', 'zip'],
+    'zip': ['zip', 'county'],
+    'tract': ['tract'],
+    'block_group': ['block_group'],
+    'name': ['name']
+}
+
+# Column-name hints per layer key type; columns without one rank lower
+KEY_NAME_HINTS = {
+    'state': r'(?i)(state|(^|_)st($|_)|stusps)',
+    'county': r'(?i)(fips|geoid|geo_id|county|cnty)',
+    'zip': r'(?i)(zip|zcta|postal)',
+    'tract': r'(?i)(tract|fips|geoid|geo_id)',
+    'block_group': r'(?i)(block|blkgrp|bg|fips|geoid|geo_id)',
+    'name': r'(?i)(name|county|city|place|town)'
+}
+
+# Score multiplier for a column whose name gives no hint of the key type
+NO_HINT_WEIGHT = 0.5
+
+# Unhinted code columns with fewer distinct values than this share of rows
+# are measures (counts, small integers), not keys
+MIN_KEY_DISTINCT = 0.1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS layer_keys (
+    layer TEXT NOT NULL,
+    field TEXT NOT NULL,
+    key_type TEXT NOT NULL,
+    key_count INTEGER NOT NULL,
+    source_mtime REAL NOT NULL,
+    keys BLOB NOT NULL,
+    PRIMARY KEY (layer, field)
+)
+"""
+
+
+def normalize_for_index(values: pd.Series, key_type: str) -> pd.Series:
+    """Normalize values the same way for layer indexes and CSV samples"""
+    if key_type == 'name':
+        stripped, _ = split_state(values)
+        return normalize_names(stripped)
+    normalized, _ = normalize_keys(values, key_type)
+    return normalized
+
+
+def encode_keys(keys: np.ndarray) -> bytes:
+    """Sorted unique keys -> compressed newline-separated blob"""
+    return zlib.compress('\n'.join(keys).encode('utf-8'), 6)
+
+
+def decode_keys(blob: bytes) -> np.ndarray:
+    """Compressed blob -> sorted array of keys"""
+    text = zlib.decompress(blob).decode('utf-8')
+    return np.array(text.split('\n') if text else [], dtype=object)
+
+
+def read_attribute_table(path: str) -> pd.DataFrame:
+    """All attributes of a layer, without geometry, indexed by feature ID"""
+    if pyogrio is not None:
+        return pyogrio.read_dataframe(path, read_geometry=False, fid_as_index=True)
+    import geopandas as gpd
+    return pd.DataFrame(gpd.read_file(path, ignore_geometry=True))
+
+
+def build_key_index(path: str, table: Optional[pd.DataFrame] = None) -> Dict[str, Dict]:
+    """{field: {'key_type', 'keys'}} for every candidate join field of a layer"""
+    if table is None:
+        table = read_attribute_table(path)
+    index = {}
+    for field in table.columns:
+        is_name = field.upper() in NAME_KEY_FIELDS
+        if not is_name and not re.search(KEY_FIELD_PATTERN, field):
+            continue
+        key_type = detect_key_type(table[field], field)
+        if key_type == 'name' and not is_name:
+            continue
+        keys = normalize_for_index(table[field], key_type).dropna()
+        index[field] = {
+            'key_type': key_type,
+            'keys': np.sort(keys[keys != ''].unique().astype(object))
+        }
+    return index
+
+
+def save_key_index(db_path: str, layer: str, path: str, index: Dict[str, Dict]):
+    """Replace a layer's rows in the layer_keys table"""
+    mtime = Path(path).stat().st_mtime
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(_SCHEMA)
+        conn.execute("DELETE FROM layer_keys WHERE layer = ?", (layer,))
+        conn.executemany(
+            "INSERT INTO layer_keys VALUES (?, ?, ?, ?, ?, ?)",
+            [(layer, field, entry['key_type'], len(entry['keys']), mtime, encode_keys(entry['keys']))
+             for field, entry in index.items()]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def load_key_indexes(db_path: str, layers: Optional[Dict[str, str]] = None) -> Dict[str, Dict]:
+    """{layer: {field: {'key_type', 'keys'}}} from the layer_keys table
+
+    When layers ({layer: path}) is given, indexes older than their layer
+    file are left out.
+    """
+    if not Path(db_path).exists():
+        return {}
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT layer, field, key_type, source_mtime, keys FROM layer_keys").fetchall()
+    except sqlite3.Error:
+        return {}
+    finally:
+        conn.close()
+
+    indexes = {}
+    for layer, field, key_type, mtime, blob in rows:
+        if layers is not None:
+            path = layers.get(layer)
+            if path is None or not Path(path).exists() or Path(path).stat().st_mtime != mtime:
+                continue
+        indexes.setdefault(layer, {})[field] = {'key_type': key_type, 'keys': decode_keys(blob)}
+    return indexes
+
+
+def key_overlap(values: np.ndarray, keys: np.ndarray) -> float:
+    """Share of normalized distinct values found in a sorted key array"""
+    if len(values) == 0 or len(keys) == 0:
+        return 0.0
+    positions = np.searchsorted(keys, values)
+    found = keys[np.minimum(positions, len(keys) - 1)] == values
+    return float(found.mean())
+
+
+def rank_join_fields(samples: Dict[str, Dict], indexes: Dict[str, Dict],
+                     min_overlap: float = 0.05) -> List[Dict]:
+    """Score every CSV sample column against compatible indexed fields
+
+    samples: {csv_field: {'type': profiled type, 'values': [distinct values],
+    'confidence': share of values matching the type, 'distinct': distinct
+    estimate, 'rows': CSV rows}}; only 'type' and 'values' are required.
+
+    The score is the measured overlap weighted by the profile confidence
+    and by NO_HINT_WEIGHT when the column name does not hint at the key
+    type. Unhinted code columns with few distinct values for their row
+    count (a 'pop' column of small integers matches state FIPS) are left
+    out. Returns [{'layer', 'csv_field', 'geo_field', 'key_type', 'overlap',
+    'score'}], best first.
+    """
+    results = []
+    for csv_field, sample in samples.items():
+        series = pd.Series(sample['values'], dtype='string')
+        rows, distinct = sample.get('rows'), sample.get('distinct')
+        low_cardinality = (sample['type'] != 'name' and rows and distinct is not None
+                           and distinct < MIN_KEY_DISTINCT * rows)
+        normalized = {}  # key type -> normalized distinct values
+        for key_type in COMPATIBLE_KEY_TYPES.get(sample['type'], []):
+            hinted = bool(re.search(KEY_NAME_HINTS[key_type], str(csv_field)))
+            if low_cardinality and not hinted:
+                continue
+            values = normalize_for_index(series, key_type).dropna().unique()
+            weight = sample.get('confidence', 1.0) * (1.0 if hinted else NO_HINT_WEIGHT)
+            normalized[key_type] = (np.asarray(values, dtype=object), weight)
+
+        for layer, fields in indexes.items():
+            for geo_field, entry in fields.items():
+                if entry['key_type'] not in normalized:
+                    continue
+                values, weight = normalized[entry['key_type']]
+                overlap = key_overlap(values, entry['keys'])
+                if overlap >= min_overlap:
+                    results.append({'layer': layer, 'csv_field': csv_field, 'geo_field': geo_field,
+                                    'key_type': entry['key_type'], 'overlap': round(overlap, 3),
+                                    'score': round(overlap * weight, 3)})
+    results.sort(key=lambda r: (r['score'], r['overlap']), reverse=True)
+    return results
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Lazy Imports
+Defers loading heavy libraries (pandas, geopandas, shapely ...) until one of
+their attributes is first used, so metadata commands start quickly
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+from typing import Optional
+
+
+def lazy_import(name: str, optional: bool = False) -> Optional[ModuleType]:
+    """Module object for name that executes on first attribute access
+
+    An already imported module is returned as-is. With optional=True a
+    module that is not installed gives None (the try/except ImportError
+    pattern, without importing anything).
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        if optional:
+            return None
+        raise ImportError(f"No module named '{name}'")
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
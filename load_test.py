@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth GIS API Load Tester
+Replays a weighted request mix against a running gis-api-server.py and
+reports throughput, latency percentiles, error rate and server RSS
+"""
+
+import argparse
+import json
+import math
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+# Realistic default traffic: mostly state-filtered county/ZIP maps plus CSV analysis
+DEFAULT_MIX = [
+    {'name': 'counties', 'method': 'GET', 'path': '/api/geography/counties', 'weight': 2},
+    {'name': 'counties_by_state', 'method': 'GET', 'path': '/api/geography/counties',
+     'params': {'state': ['FL', 'TX', 'CA', 'ME', '12', '48', '06']}, 'weight': 4},
+    {'name': 'zips', 'method': 'GET', 'path': '/api/geography/zips', 'weight': 1},
+    {'name': 'zips_by_state', 'method': 'GET', 'path': '/api/geography/zips',
+     'params': {'state': ['12', '48', '23', '25']}, 'weight': 2},
+    {'name': 'analyze_csv', 'method': 'POST', 'path': '/api/analyze-csv', 'weight': 2,
+     'json': {'data': [
+         {'FIPS': '12086', 'County': 'Miami-Dade', 'Population': 2716940},
+         {'FIPS': '12011', 'County': 'Broward', 'Population': 1944375},
+         {'FIPS': '48201', 'County': 'Harris', 'Population': 4731145}
+     ]}}
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(results, elapsed):
+    """Throughput, error rate and latency percentiles (ms) for a list of results"""
+    latencies = sorted(r['latency_ms'] for r in results)
+    errors = sum(1 for r in results if r['error'] or r['status'] >= 400)
+    return {
+        'requests': len(results),
+        'errors': errors,
+        'error_rate': round(errors / len(results), 4) if results else 0.0,
+        'throughput_rps': round(len(results) / elapsed, 2) if elapsed else 0.0,
+        'bytes': sum(r['bytes'] for r in results),
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 2) if latencies else None,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': latencies[-1] if latencies else None
+        }
+    }
+
+
+def process_rss_mb(pid):
+    """Resident set size of a process in MB via ps (Linux and macOS)"""
+    try:
+        output = subprocess.run(['ps', '-o', 'rss=', '-p', str(pid)],
+                                capture_output=True, text=True, timeout=5).stdout.strip()
+        return round(int(output) / 1024, 1) if output else None
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+class LoadTest:
+    """Drives a request mix from a pool of worker threads"""
+
+    def __init__(self, base_url, mix, concurrency=4, duration=30, max_requests=None,
+                 warmup=0, server_pid=None, rss_interval=1.0, timeout=120, seed=None):
+        self.base_url = base_url.rstrip('/')
+        self.mix = mix
+        self.concurrency = concurrency
+        self.duration = duration
+        self.max_requests = max_requests
+        self.warmup = warmup
+        self.server_pid = server_pid
+        self.rss_interval = rss_interval
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.weights = [scenario.get('weight', 1) for scenario in mix]
+        self.results = []
+        self.rss_samples = []
+        self.lock = threading.Lock()
+        self.issued = 0
+        self.measure_started = None
+        self.stop = threading.Event()
+
+    def _next_scenario(self):
+        """Pick the next scenario, or None once the run is over"""
+        with self.lock:
+            if self.max_requests is not None and self.issued >= self.max_requests + self.warmup:
+                return None, False
+            self.issued += 1
+            measured = self.issued > self.warmup
+            if measured and self.measure_started is None:
+                # Throughput is measured from here, so warmup never dilutes it
+                self.measure_started = time.perf_counter()
+            return self.random.choices(self.mix, weights=self.weights)[0], measured
+
+    def _build_params(self, scenario):
+        params = {}
+        for key, value in scenario.get('params', {}).items():
+            params[key] = self.random.choice(value) if isinstance(value, list) else value
+        return params
+
+    def _worker(self):
+        session = requests.Session()
+        session.headers['Accept-Encoding'] = 'gzip'
+        while not self.stop.is_set():
+            scenario, measured = self._next_scenario()
+            if scenario is None:
+                break
+
+            params = self._build_params(scenario)
+            begin = time.perf_counter()
+            status, size, error = 0, 0, None
+            try:
+                response = session.request(scenario.get('method', 'GET'),
+                                           self.base_url + scenario['path'],
+                                           params=params, json=scenario.get('json'),
+                                           timeout=self.timeout)
+                size = len(response.content)
+                status = response.status_code
+            except requests.RequestException as e:
+                error = str(e)
+            latency = (time.perf_counter() - begin) * 1000
+
+            if measured:
+                with self.lock:
+                    self.results.append({
+                        'scenario': scenario['name'],
+                        'params': params,
+                        'offset_s': round(begin - self.measure_started, 3),
+                        'latency_ms': round(latency, 2),
+                        'status': status,
+                        'bytes': size,
+                        'error': error
+                    })
+
+    def _sample_rss(self, started):
+        while not self.stop.is_set():
+            rss = process_rss_mb(self.server_pid)
+            if rss is not None:
+                self.rss_samples.append({'offset_s': round(time.perf_counter() - started, 2),
+                                         'rss_mb': rss})
+            self.stop.wait(self.rss_interval)
+
+    def run(self):
+        """Run the load test and return the report dict"""
+        started = time.perf_counter()
+        threads = [threading.Thread(target=self._worker, daemon=True)
+                   for _ in range(self.concurrency)]
+        if self.server_pid:
+            threads.append(threading.Thread(target=self._sample_rss, args=(started,), daemon=True))
+
+        for thread in threads:
+            thread.start()
+
+        # --duration counts from the first measured request once warmup is over
+        workers = threads[:self.concurrency]
+        while any(thread.is_alive() for thread in workers):
+            window_start = self.measure_started or started
+            if self.duration and time.perf_counter() >= window_start + self.duration:
+                self.stop.set()
+            time.sleep(0.05)
+        self.stop.set()
+        for thread in threads:
+            thread.join()
+        finished = time.perf_counter()
+        elapsed = finished - self.measure_started if self.measure_started else 0.0
+        warmup_elapsed = (self.measure_started or finished) - started
+
+        scenarios = {}
+        for scenario in self.mix:
+            subset = [r for r in self.results if r['scenario'] == scenario['name']]
+            scenarios[scenario['name']] = summarize(subset, elapsed)
+
+        rss_values = [sample['rss_mb'] for sample in self.rss_samples]
+        return {
+            'created': datetime.now().isoformat(),
+            'config': {
+                'base_url': self.base_url,
+                'concurrency': self.concurrency,
+                'duration_s': self.duration,
+                'max_requests': self.max_requests,
+                'warmup': self.warmup,
+                'server_pid': self.server_pid,
+                'mix': self.mix
+            },
+            'elapsed_s': round(elapsed, 2),
+            'warmup_s': round(warmup_elapsed, 2),
+            'summary': summarize(self.results, elapsed),
+            'scenarios': scenarios,
+            'rss': {
+                'peak_mb': max(rss_values) if rss_values else None,
+                'start_mb': rss_values[0] if rss_values else None,
+                'end_mb': rss_values[-1] if rss_values else None,
+                'samples': self.rss_samples
+            },
+            'requests': self.results
+        }
+
+
+def print_report(report):
+    """Human-readable summary of a load-test report"""
+    summary = report['summary']
+    print(f"\nLoad Test: {report['config']['base_url']} "
+          f"({report['config']['concurrency']} workers, {report['elapsed_s']}s)")
+    print("=" * 88)
+    print(f"{'Scenario':22} {'Reqs':>7} {'Err%':>6} {'RPS':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    rows = list(report['scenarios'].items()) + [('TOTAL', summary)]
+    for name, stats in rows:
+        if not stats['requests']:
+            continue
+        lat = stats['latency_ms']
+        print(f"{name:22} {stats['requests']:>7} {stats['error_rate'] * 100:>5.1f}% "
+              f"{stats['throughput_rps']:>8.1f} {lat['p50']:>9.1f} {lat['p95']:>9.1f} "
+              f"{lat['p99']:>9.1f} {lat['max']:>9.1f}")
+    if report['rss']['peak_mb'] is not None:
+        rss = report['rss']
+        print(f"\nServer RSS: start {rss['start_mb']} MB, end {rss['end_mb']} MB, peak {rss['peak_mb']} MB")
+
+
+def print_comparison(baseline, report):
+    """Compare a run against a previously saved report"""
+    print(f"\nComparison against baseline from {baseline['created']}:")
+    print("-" * 60)
+    old, new = baseline['summary'], report['summary']
+    metrics = [('throughput_rps', old['throughput_rps'], new['throughput_rps'])]
+    for pct in ('p50', 'p95', 'p99'):
+        metrics.append((f'{pct} ms', old['latency_ms'][pct], new['latency_ms'][pct]))
+    metrics.append(('error_rate', old['error_rate'], new['error_rate']))
+    metrics.append(('peak_rss_mb', baseline['rss']['peak_mb'], report['rss']['peak_mb']))
+    for name, before, after in metrics:
+        if before is None or after is None:
+            continue
+        change = f"{(after - before) / before * 100:+.1f}%" if before else 'n/a'
+        print(f"  {name:15} {before:>10} -> {after:<10} ({change})")
+
+
+def main():
+    """Command line interface for the load tester"""
+    parser = argparse.ArgumentParser(description='Load test the GIS API server')
+    parser.add_argument('--url', default='http://localhost:5000', help='Server base URL')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent workers')
+    parser.add_argument('--duration', type=float, default=30,
+                        help='Measured run time in seconds, after warmup (0 = until --requests are sent)')
+    parser.add_argument('--requests', type=int, help='Stop after this many measured requests')
+    parser.add_argument('--warmup', type=int, default=0,
+                        help='Unmeasured requests sent before measuring')
+    parser.add_argument('--mix', type=str, help='JSON file with a request mix (list of scenarios)')
+    parser.add_argument('--server-pid', type=int, help='Server process id for RSS sampling')
+    parser.add_argument('--seed', type=int, help='Random seed for a reproducible mix')
+    parser.add_argument('--output', type=str, help='Save the full report to this JSON file')
+    parser.add_argument('--compare', type=str, help='Baseline report JSON to compare against')
+
+    args = parser.parse_args()
+
+    if not args.duration and not args.requests:
+        parser.error('either --duration or --requests is required')
+
+    mix = DEFAULT_MIX
+    if args.mix:
+        with open(args.mix) as f:
+            mix = json.load(f)
+
+    test = LoadTest(args.url, mix, concurrency=args.concurrency, duration=args.duration,
+                    max_requests=args.requests, warmup=args.warmup,
+                    server_pid=args.server_pid, seed=args.seed)
+    report = test.run()
+    print_report(report)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.output}")
+
+    return 1 if report['summary']['requests'] == 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
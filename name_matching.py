@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Name Matching Engine
+Normalizes place/county names into an exact-match alias index and scores only
+the leftovers with vectorized similarity, blocked by state
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Optional
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+from census_codes import STATE_FIPS_BY_ABBR, STATE_FIPS_LOOKUP, state_to_fips
+
+rapidfuzz = lazy_import('rapidfuzz', optional=True)  # fall back to fuzzywuzzy's one-at-a-time matching
+
+logger = logging.getLogger(__name__)
+
+# Column names that carry a state on the layer side, in order of preference
+GEO_STATE_FIELDS = ['STATEFP', 'STATEFP20', 'STATEFP10', 'STATE', 'STUSPS', 'STATE_ABBR']
+
+# CSV columns that carry a state
+CSV_STATE_PATTERN = r'(?i)^(state|state_name|st|state_abbr|state_fips|statefp|state_code)$'
+
+# Rows scored per similarity matrix (bounds memory at rows x candidates bytes)
+SCORE_CHUNK_ROWS = 2000
+
+_SUFFIX_PATTERN = (r'\s+(county|parish|borough|census area|city and borough|municipality|'
+                   r'municipio|cdp|town|township|village)$')
+_ABBREVIATIONS = [
+    (r'\bst\.?\s', 'saint '),
+    (r'\bste\.?\s', 'sainte '),
+    (r'\bft\.?\s', 'fort '),
+    (r'\bmt\.?\s', 'mount '),
+]
+
+
+def split_state(names: pd.Series):
+    """Split a trailing state off names like 'Alachua County, Florida' or 'Androscoggin ME'
+
+    Returns (names without the state, 2-digit state FIPS or NA).
+    """
+    text = names.astype('string').str.strip()
+
+    # 'Name, State' (any spelling) or 'Name ST' (upper-case USPS abbreviation)
+    comma = text.str.extract(r'^(?P<name>.*\S)\s*,\s*(?P<state>[^,]+)$')
+    comma_state = comma['state'].str.strip().str.upper().map(STATE_FIPS_LOOKUP).astype('string')
+    abbr = text.str.extract(r'^(?P<name>.*\S)\s+(?P<state>[A-Z]{2})$')
+    abbr_state = abbr['state'].map(STATE_FIPS_BY_ABBR).astype('string')
+
+    use_comma = comma_state.notna()
+    use_abbr = ~use_comma & abbr_state.notna()
+
+    stripped = text.where(~use_comma, comma['name']).where(~use_abbr, abbr['name'])
+    states = comma_state.where(use_comma, abbr_state.where(use_abbr))
+    return stripped, states
+
+
+def normalize_names(names: pd.Series) -> pd.Series:
+    """Vectorized name normalization: accents, case, Saint/St., suffixes, punctuation"""
+    text = names.astype('string').str.normalize('NFKD')
+    text = text.str.encode('ascii', 'ignore').str.decode('ascii').astype('string')
+    text = text.str.lower().str.strip()
+    for pattern, replacement in _ABBREVIATIONS:
+        text = text.str.replace(pattern, replacement, regex=True)
+    text = text.str.replace(r'[^\w\s]', ' ', regex=True)
+    text = text.str.replace(r'\s+', ' ', regex=True).str.strip()
+    return text.str.replace(_SUFFIX_PATTERN, '', regex=True)
+
+
+def detect_state_field(columns, pattern_fields=GEO_STATE_FIELDS) -> Optional[str]:
+    """First column from pattern_fields present in columns"""
+    return next((field for field in pattern_fields if field in columns), None)
+
+
+def detect_csv_state_field(columns) -> Optional[str]:
+    """First CSV column whose name looks like a state column"""
+    return next((col for col in columns if re.match(CSV_STATE_PATTERN, str(col))), None)
+
+
+class NameMatcher:
+    """Matches free-text names to a layer's names
+
+    Every geo feature is indexed under 'N|<normalized name>' and, when the
+    layer has states, 'S|<state>|<normalized name>'. CSV names with a known
+    state are matched inside that state's block only.
+    """
+
+    def __init__(self, geo_names: pd.Series, geo_states: Optional[pd.Series] = None,
+                 threshold: int = 80, workers: int = -1):
+        self.threshold = threshold
+        self.workers = workers
+        self.blocked = geo_states is not None
+
+        self.geo = pd.DataFrame({
+            'norm': pd.array(normalize_names(geo_names), dtype='string'),
+            'state': pd.array(state_to_fips(geo_states) if self.blocked
+                              else [pd.NA] * len(geo_names), dtype='string'),
+            'row': np.arange(len(geo_names))
+        }).dropna(subset=['norm'])
+
+        keys = [('N|' + self.geo['norm']).rename('key')]
+        if self.blocked:
+            with_state = self.geo.dropna(subset=['state'])
+            keys.append(('S|' + with_state['state'] + '|' + with_state['norm']).rename('key'))
+        self.lookup = pd.concat([
+            pd.DataFrame({'key': k.to_numpy(), 'row': self.geo.loc[k.index, 'row'].to_numpy()})
+            for k in keys
+        ], ignore_index=True)
+        self.known_keys = pd.Index(self.lookup['key'].unique())
+
+    def lookup_table(self) -> pd.DataFrame:
+        """(key, row) pairs: which geo rows each match key refers to"""
+        return self.lookup
+
+    def match(self, names: pd.Series, states: Optional[pd.Series] = None) -> pd.Series:
+        """Return a match key per input name (NA when nothing scores above threshold)"""
+        stripped, embedded_states = split_state(names)
+        row_states = embedded_states
+        if states is not None:
+            row_states = state_to_fips(states).fillna(embedded_states)
+
+        rows = pd.DataFrame({'norm': pd.array(normalize_names(stripped), dtype='string'),
+                             'state': pd.array(row_states, dtype='string')})
+        unique = rows.dropna(subset=['norm']).drop_duplicates().reset_index(drop=True)
+
+        use_block = self.blocked & unique['state'].notna()
+        unique['key'] = ('N|' + unique['norm']).where(
+            ~use_block, 'S|' + unique['state'] + '|' + unique['norm'])
+        unique['match'] = unique['key'].where(unique['key'].isin(self.known_keys))
+
+        exact = int(unique['match'].notna().sum())
+        leftovers = unique[unique['match'].isna()]
+        block_ids = leftovers['state'].where(use_block[leftovers.index], '')
+        for state, group in leftovers.groupby(block_ids.fillna('')):
+            unique.loc[group.index, 'match'] = self._score_block(group['norm'], state)
+
+        fuzzy = int(unique['match'].notna().sum()) - exact
+        logger.info(f"Name matching: {exact} exact alias matches, {fuzzy} fuzzy matches, "
+                    f"{len(unique) - exact - fuzzy} unmatched of {len(unique)} distinct names")
+
+        merged = rows.merge(unique[['norm', 'state', 'match']], on=['norm', 'state'], how='left')
+        return pd.Series(merged['match'].to_numpy(), index=names.index, dtype='string')
+
+    def _score_block(self, norms: pd.Series, state: str) -> np.ndarray:
+        """Fuzzy-score leftover names against one state block (or the whole layer)"""
+        if state:
+            candidates = self.geo.loc[self.geo['state'] == state, 'norm'].unique()
+            prefix = f'S|{state}|'
+        else:
+            candidates = self.geo['norm'].unique()
+            prefix = 'N|'
+
+        result = np.full(len(norms), None, dtype=object)
+        if len(candidates) == 0:
+            return result
+
+        queries = norms.tolist()
+        choices = list(candidates)
+
+        if rapidfuzz is not None:
+            for start in range(0, len(queries), SCORE_CHUNK_ROWS):
+                chunk = queries[start:start + SCORE_CHUNK_ROWS]
+                scores = rapidfuzz.process.cdist(chunk, choices, scorer=rapidfuzz.fuzz.WRatio,
+                                                 dtype=np.uint8, score_cutoff=self.threshold,
+                                                 workers=self.workers)
+                best = scores.argmax(axis=1)
+                best_score = scores[np.arange(len(chunk)), best]
+                for offset, (index, score) in enumerate(zip(best, best_score)):
+                    if score >= self.threshold:
+                        result[start + offset] = prefix + choices[index]
+        else:
+            from fuzzywuzzy import process
+            for i, query in enumerate(queries):
+                best_match = process.extractOne(query, choices)
+                if best_match and best_match[1] >= self.threshold:
+                    result[i] = prefix + best_match[0]
+
+        return result
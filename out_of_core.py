@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Out-of-Core Join
+Streams a layer in feature batches sized to a memory cap, joins each batch
+against an in-memory key -> CSV row lookup, and appends every joined batch
+to the output, so layers far larger than memory can be joined
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Iterator
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+gpd = lazy_import('geopandas')
+shapely = lazy_import('shapely')
+
+from frame_memory import frame_bytes
+
+pyogrio = lazy_import('pyogrio', optional=True)  # batches are read with geopandas row slices
+
+pyarrow = lazy_import('pyarrow', optional=True)
+
+logger = logging.getLogger(__name__)
+
+# Default memory an out-of-core join may hold at once
+OUT_OF_CORE_MEMORY_MB = 512
+
+# Features read up front to measure the in-memory size of one feature
+CALIBRATION_FEATURES = 1000
+
+# Copies of a batch alive at once: reader buffer, frame, joined frame, writer
+BATCH_COPIES = 4
+
+# Smallest batch read, however tight the cap
+MIN_BATCH_FEATURES = 100
+
+# Formats that can be written batch by batch
+OUT_OF_CORE_FORMATS = ['gpkg', 'geoparquet', 'csv']
+
+
+def read_sample(path: str, features: int = CALIBRATION_FEATURES,
+                read_geometry: bool = True) -> pd.DataFrame:
+    """First features of a layer (for key detection and batch sizing)"""
+    if pyogrio is not None:
+        return pyogrio.read_dataframe(path, max_features=features, read_geometry=read_geometry)
+    return gpd.read_file(path, rows=features, ignore_geometry=not read_geometry)
+
+
+def batch_features(memory_cap_mb: float, lookup_bytes: int, feature_bytes: float) -> int:
+    """Features per batch so that the lookup plus BATCH_COPIES batches fit the cap"""
+    available = memory_cap_mb * 1024 * 1024 - lookup_bytes
+    if available <= 0:
+        logger.warning(f"The CSV lookup alone ({lookup_bytes / 1024 / 1024:.0f} MB) exceeds the "
+                       f"{memory_cap_mb} MB cap; reading {MIN_BATCH_FEATURES} features at a time")
+        return MIN_BATCH_FEATURES
+    return max(MIN_BATCH_FEATURES, int(available / (feature_bytes * BATCH_COPIES)))
+
+
+def layer_batches(path: str, batch_size: int, read_geometry: bool = True) -> Iterator[pd.DataFrame]:
+    """Yield a layer's features batch_size at a time (GeoDataFrames unless read_geometry=False)
+
+    With pyogrio and pyarrow the layer is read as one Arrow stream; otherwise
+    each batch is a row slice read with geopandas.
+    """
+    if pyogrio is not None and pyarrow is not None:
+        with pyogrio.open_arrow(path, batch_size=batch_size, read_geometry=read_geometry,
+                                use_pyarrow=True) as (meta, reader):
+            geometry_name = meta['geometry_name'] or 'wkb_geometry'
+            for batch in reader:
+                frame = batch.to_pandas()
+                if read_geometry:
+                    geometry = shapely.from_wkb(frame.pop(geometry_name).to_numpy())
+                    frame = gpd.GeoDataFrame(frame, geometry=geometry, crs=meta['crs'])
+                yield frame
+        return
+
+    start = 0
+    while True:
+        frame = gpd.read_file(path, rows=slice(start, start + batch_size),
+                              ignore_geometry=not read_geometry)
+        if frame.empty:
+            return
+        yield frame
+        start += len(frame)
+
+
+class KeyLookup:
+    """CSV rows addressed by join key, built once and probed by every batch
+
+    Keys may repeat (one-to-many joins). CSV columns whose names clash with
+    layer fields (case-insensitively, as GPKG field names do) get a '_csv'
+    suffix; integer columns become nullable so unmatched rows keep dtypes
+    identical across batches.
+    """
+
+    def __init__(self, csv_df: pd.DataFrame, key_field: str, layer_columns, geo_field: str):
+        layer_lower = {str(col).lower() for col in layer_columns}
+        values = csv_df.drop(columns=[key_field]) if key_field == geo_field else csv_df
+        values = values.rename(columns={col: f'{col}_csv' for col in values.columns
+                                        if str(col).lower() in layer_lower})
+        values = values.astype({col: 'Int64' for col in values.columns
+                                if pd.api.types.is_integer_dtype(values[col])})
+        # A trailing all-NA row: position -1 stands for "no CSV row"
+        self.values = pd.concat([values, values.iloc[:0].reindex([len(values)])], ignore_index=True)
+        self.rows = len(csv_df)
+
+        codes, uniques = pd.factorize(csv_df[key_field])
+        self.keys = pd.Index(uniques)
+        keyed = codes >= 0
+        self.order = np.flatnonzero(keyed)[np.argsort(codes[keyed], kind='stable')]
+        self.counts = np.bincount(codes[keyed], minlength=len(uniques))
+        self.starts = np.concatenate([[0], np.cumsum(self.counts)[:-1]]).astype('int64')
+
+    def nbytes(self) -> int:
+        return frame_bytes(self.values) + self.order.nbytes + self.counts.nbytes + self.starts.nbytes
+
+    def join(self, batch: pd.DataFrame, geo_field: str, matched_only: bool = False):
+        """Left-join CSV rows onto a batch of features
+
+        Returns (joined frame, CSV row positions that matched, number of
+        features without a match).
+        """
+        codes = self.keys.get_indexer(batch[geo_field])
+        found = codes >= 0
+        repeats = np.where(found, self.counts[np.maximum(codes, 0)], 1)
+        if matched_only:
+            repeats[~found] = 0
+
+        features = np.repeat(np.arange(len(batch)), repeats)
+        feature_codes = codes[features]
+        offsets = np.arange(len(features)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        csv_rows = np.where(feature_codes >= 0,
+                            self.order[self.starts[np.maximum(feature_codes, 0)] + offsets], -1)
+
+        joined = batch.iloc[features].reset_index(drop=True)
+        csv_part = self.values.iloc[csv_rows].reset_index(drop=True)
+        joined = pd.concat([joined, csv_part], axis=1)
+        if isinstance(batch, gpd.GeoDataFrame):
+            joined = gpd.GeoDataFrame(joined, geometry=batch.geometry.name, crs=batch.crs)
+        return joined, csv_rows[csv_rows >= 0], int((~found).sum())
+
+
+class BatchWriter:
+    """Appends joined batches to one output as they are produced
+
+    'gpkg' and 'csv' grow a single file; 'geoparquet' writes a directory of
+    part files (read it back with geopandas.read_parquet(dir)).
+    """
+
+    def __init__(self, output_path, format_type: str):
+        if format_type not in OUT_OF_CORE_FORMATS:
+            raise ValueError(f"Out-of-core joins write {OUT_OF_CORE_FORMATS}, not '{format_type}'")
+        if format_type == 'geoparquet' and pyarrow is None:
+            raise ImportError("GeoParquet export needs pyarrow (pip install pyarrow)")
+        self.format_type = format_type
+        self.parts = 0
+        output_path = Path(output_path)
+        if format_type == 'geoparquet':
+            self.output = output_path.with_suffix('')
+            self.output.mkdir(parents=True, exist_ok=True)
+            for stale in self.output.glob('part-*.parquet'):
+                stale.unlink()
+        else:
+            self.output = output_path.with_suffix(f'.{format_type}')
+            self.output.unlink(missing_ok=True)
+
+    def write(self, frame: pd.DataFrame):
+        if self.format_type == 'gpkg':
+            frame.to_file(self.output, driver='GPKG', mode='a' if self.parts else 'w')
+        elif self.format_type == 'geoparquet':
+            frame.to_parquet(self.output / f'part-{self.parts:05d}.parquet', compression='zstd',
+                             index=False, write_covering_bbox=True)
+        else:
+            frame.drop(columns=['geometry'], errors='ignore').to_csv(
+                self.output, mode='a', header=not self.parts, index=False)
+        self.parts += 1
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth State-Partitioned Join
+Splits a large GEOID-keyed CSV and the target layer by the 2-digit state
+prefix of the key, and joins the state partitions in separate processes
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+gpd = lazy_import('geopandas')
+
+from join_keys import normalize_keys
+
+logger = logging.getLogger(__name__)
+
+# Key types whose normalized values start with the state FIPS code
+PARTITION_KEY_TYPES = ['state', 'county', 'county_subdivision', 'tract', 'block_group']
+
+# Partition name for CSV keys without a state prefix
+NO_STATE = 'none'
+
+
+def state_prefix(keys: pd.Series) -> pd.Series:
+    """2-digit state FIPS prefix of normalized GEOID keys (NO_STATE otherwise)"""
+    prefix = keys.str.slice(0, 2)
+    return prefix.where(prefix.str.fullmatch(r'\d{2}').fillna(False), NO_STATE)
+
+
+def partition_csv(csv_path: str, csv_field: str, key_type: str, work_dir: Path,
+                  chunksize: int) -> Dict:
+    """Stream a CSV into per-state pickle parts with normalized keys
+
+    Returns {'parts': {state: [paths]}, 'counts': {state: rows}, 'template':
+    path of an empty frame with the output dtype of every CSV column, 'rows',
+    'repairs'}. Chunks infer dtypes on their own (a column empty in one
+    chunk reads as float, as text in the next), so the template holds the
+    type common to all chunks, widened to hold the NA of unmatched features.
+    """
+    parts = {}
+    counts = Counter()
+    repairs = Counter()
+    rows = 0
+    schema = None
+    template = work_dir / 'csv_template.pkl'
+    for i, chunk in enumerate(pd.read_csv(csv_path, dtype={csv_field: str}, chunksize=chunksize)):
+        rows += len(chunk)
+        schema = chunk.iloc[:0] if schema is None else pd.concat([schema, chunk.iloc[:0]])
+        chunk[csv_field], chunk_repairs = normalize_keys(chunk[csv_field], key_type)
+        repairs.update(chunk_repairs)
+        for state, group in chunk.groupby(state_prefix(chunk[csv_field]).to_numpy()):
+            path = work_dir / f'csv_{state}_{i:05d}.pkl'
+            group.to_pickle(path)
+            parts.setdefault(state, []).append(str(path))
+            counts[state] += len(group)
+    if schema is not None:
+        schema = schema.reindex([0]).iloc[:0]
+        # Numbers in some chunks and text in others are text, as in a whole-file read
+        text = [col for col in schema.columns if schema[col].dtype == object]
+        schema.astype({col: 'string' for col in text + [csv_field]}).to_pickle(template)
+    return {'parts': parts, 'counts': dict(counts), 'template': str(template), 'rows': rows,
+            'repairs': dict(repairs)}
+
+
+def join_partition(task: Dict) -> Dict:
+    """Join one state's CSV parts to that state's features (runs in a worker)
+
+    With task['output'] set (GeoParquet), the result is written there and
+    only statistics are returned; otherwise the joined frame is returned
+    under 'frame' for the parent to append.
+    """
+    geo_field, csv_field = task['geo_field'], task['csv_field']
+    geo_df = task['features']  # this state's features, keys already normalized
+
+    # Every partition is cast to the template, so appended outputs share one schema
+    template = pd.read_pickle(task['csv_template'])
+    csv_df = pd.concat([template] + [pd.read_pickle(path) for path in task['csv_parts']],
+                       ignore_index=True).astype(template.dtypes.to_dict())
+    csv_df['_csv_row'] = np.arange(len(csv_df))
+
+    # GPKG field names are case-insensitive: keep a CSV 'name' apart from the layer's 'NAME'
+    layer_columns = {str(col).lower() for col in geo_df.columns}
+    renames = {col: f'{col}_csv' for col in csv_df.columns
+               if str(col).lower() in layer_columns and col not in geo_df.columns}
+    csv_df = csv_df.rename(columns=renames)
+    csv_field = renames.get(csv_field, csv_field)
+
+    joined = geo_df.merge(csv_df, left_on=geo_field, right_on=csv_field, how='left', indicator='_join_match')
+    matched = (joined['_join_match'] == 'both').to_numpy()
+    stats = {
+        'state': task['state'],
+        'geographic_features': len(geo_df),
+        'csv_records': len(csv_df),
+        'successful_joins': int(matched.sum()),
+        'unmatched_geographic': int((~matched).sum()),
+        'matched_csv': int(joined.loc[matched, '_csv_row'].nunique())
+    }
+    joined = joined.drop(columns=['_join_match', '_csv_row'])
+    if task['matched_only']:
+        joined = joined[matched]
+    joined = gpd.GeoDataFrame(joined, geometry=geo_df.geometry.name, crs=geo_df.crs)
+
+    if task.get('output'):
+        joined.to_parquet(task['output'], compression='zstd', index=False, write_covering_bbox=True)
+    else:
+        stats['frame'] = joined
+    return stats
+
+
+def combine_stats(partitions: List[Dict], csv_rows: int, unpartitioned_csv: int) -> Dict:
+    """join_stats for the whole run from per-partition statistics"""
+    total_geo = sum(p['geographic_features'] for p in partitions)
+    joined = sum(p['successful_joins'] for p in partitions)
+    matched_csv = sum(p['matched_csv'] for p in partitions)
+    return {
+        'total_geographic_features': total_geo,
+        'total_csv_records': csv_rows,
+        'successful_joins': joined,
+        'join_rate': f"{(joined / total_geo) * 100:.1f}%" if total_geo else '0.0%',
+        'unmatched_geographic': sum(p['unmatched_geographic'] for p in partitions),
+        'unmatched_csv': csv_rows - matched_csv,
+        'partitions': len(partitions),
+        'csv_records_without_state': unpartitioned_csv
+    }
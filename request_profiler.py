@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Slow-Request Profiler
+Samples the Python stacks of in-flight Flask requests and writes a
+flamegraph-compatible (folded stacks) profile for every slow request
+"""
+
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+# Share of the slow threshold a request must be in flight before it is sampled
+SAMPLE_AFTER = 0.25
+
+
+def frame_label(frame):
+    """Stable label for a stack frame: function (file:first line)"""
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def fold_stack(frame):
+    """Collapse a frame chain into a root-first, semicolon-separated stack"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class SlowRequestProfiler:
+    """Flask middleware: a sampler thread profiles requests over a latency threshold
+
+    The sampler thread sleeps on an event while no request is in flight, and
+    a request is only sampled once it has run for sample_after of the
+    threshold. Requests that finish sooner pay two short locked dict updates
+    and are never sampled; a slow request's profile therefore starts at
+    sample_after * threshold_ms, not at its first millisecond. A threshold of
+    0 (or None) leaves the app untouched: no hooks and no sampler thread.
+    """
+
+    def __init__(self, app=None, threshold_ms=1000, interval_ms=5, log_dir='slow_requests',
+                 tag_args=('geo_type',), sample_after=SAMPLE_AFTER):
+        self.enabled = bool(threshold_ms)
+        self.threshold = (threshold_ms or 0) / 1000.0
+        self.interval = interval_ms / 1000.0
+        self.delay = self.threshold * sample_after
+        self.log_dir = Path(log_dir)
+        self.tag_args = tag_args
+        self.active = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.sampler = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not self.enabled:
+            return
+        app.before_request(self._start_request)
+        app.teardown_request(self._finish_request)
+
+    def _ensure_sampler(self):
+        if self.sampler is None:
+            with self.lock:
+                if self.sampler is None:
+                    self.sampler = threading.Thread(target=self._sample_loop,
+                                                    name='slow-request-sampler', daemon=True)
+                    self.sampler.start()
+
+    def _start_request(self):
+        self._ensure_sampler()
+        record = {'started': time.perf_counter(), 'samples': Counter()}
+        g._profile_thread = threading.get_ident()
+        with self.lock:
+            self.active[g._profile_thread] = record
+        self.wakeup.set()
+
+    def _finish_request(self, exc=None):
+        thread_id = g.pop('_profile_thread', None)
+        if thread_id is None:
+            return
+        with self.lock:
+            record = self.active.pop(thread_id, None)
+            if not self.active:
+                self.wakeup.clear()
+        if record is None:
+            return
+
+        duration = time.perf_counter() - record['started']
+        if duration >= self.threshold:
+            try:
+                self._write_profile(record, duration, exc)
+            except Exception as e:
+                logger.warning(f"Could not write slow-request profile: {e}")
+
+    def _sample_loop(self):
+        own_thread = threading.get_ident()
+        while True:
+            self.wakeup.wait()
+            now = time.perf_counter()
+            with self.lock:
+                due = [(thread_id, record) for thread_id, record in self.active.items()
+                       if now - record['started'] >= self.delay and thread_id != own_thread]
+                next_due = min((record['started'] + self.delay - now for record in self.active.values()),
+                               default=self.interval)
+            if not due:
+                # Nothing has run long enough yet; newer requests are due even later
+                time.sleep(max(self.interval, next_due))
+                continue
+
+            # Walk the stacks without holding the lock requests start and finish under
+            frames = sys._current_frames()
+            stacks = [(thread_id, record, fold_stack(frames[thread_id]))
+                      for thread_id, record in due if thread_id in frames]
+            del frames
+            with self.lock:
+                for thread_id, record, stack in stacks:
+                    if self.active.get(thread_id) is record:
+                        record['samples'][stack] += 1
+            time.sleep(self.interval)
+
+    def _write_profile(self, record, duration, exc):
+        route = request.url_rule.rule if request.url_rule else request.path
+        view_args = request.view_args or {}
+        dataset = next((str(view_args[arg]) for arg in self.tag_args if arg in view_args), '')
+        params = request.args.to_dict()
+
+        # Tag the profile itself with a synthetic root frame
+        tag = f"{request.method} {route}"
+        if dataset:
+            tag += f" dataset={dataset}"
+        if params:
+            tag += ' ' + ' '.join(f"{key}={value}" for key, value in sorted(params.items()))
+        tag = tag.replace(';', ',')
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', f"{route}-{dataset}").strip('-')
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        profile_file = self.log_dir / f"{stamp}-{slug}-{int(duration * 1000)}ms.folded"
+
+        with open(profile_file, 'w') as f:
+            for stack, count in record['samples'].most_common():
+                f.write(f"{tag};{stack} {count}\n")
+
+        entry = {
+            'time': datetime.now().isoformat(),
+            'method': request.method,
+            'route': route,
+            'path': request.path,
+            'dataset': dataset or None,
+            'params': params,
+            'duration_ms': round(duration * 1000, 1),
+            'samples': sum(record['samples'].values()),
+            'sampled_after_ms': round(self.delay * 1000, 1),
+            'error': str(exc) if exc else None,
+            'profile': profile_file.name
+        }
+        with open(self.log_dir / 'slow_requests.jsonl', 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+        logger.warning(f"Slow request {request.method} {request.path} took "
+                       f"{entry['duration_ms']}ms; profile: {profile_file}")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Join Result Cache
+Keeps joined results on disk per (layer, fields, options) together with the
+CSV's content hash and a digest of the CSV rows behind every join key, so a
+re-uploaded CSV is either served as-is or re-joined only where keys changed
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+from content_hash import content_key, file_sha256
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_DIR = 'join_cache'
+
+# Entries kept (least recently used are removed first)
+RESULT_CACHE_ENTRIES = 50
+
+META_NAME = 'meta.json'
+RESULT_NAME = 'result.pkl'
+DIGESTS_NAME = 'key_digests.pkl'
+
+
+def layer_signature(path) -> Dict:
+    """Identity of a layer file: resolved path, size and mtime"""
+    path = Path(path).resolve()
+    stat = path.stat()
+    return {'path': str(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def key_digests(df: pd.DataFrame, key_field: str) -> pd.Series:
+    """One uint64 per join key, combining the hashes of every CSV row with that key
+
+    Row hashes are summed (order-independent, wrapping), so any added,
+    removed or edited row changes its key's digest.
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    keys = df[key_field].fillna('').to_numpy()
+    return pd.Series(row_hashes, index=keys).groupby(level=0).sum()
+
+
+def changed_keys(old: pd.Series, new: pd.Series) -> np.ndarray:
+    """Keys whose digest differs, or that exist on only one side"""
+    both = old.index.intersection(new.index)
+    differing = both[old.loc[both].to_numpy() != new.loc[both].to_numpy()]
+    return np.asarray(differing.union(old.index.difference(new.index))
+                      .union(new.index.difference(old.index)), dtype=object)
+
+
+class JoinResultCache:
+    """On-disk joined results, one entry (the latest CSV) per join spec"""
+
+    def __init__(self, cache_dir=RESULT_CACHE_DIR, max_entries: int = RESULT_CACHE_ENTRIES):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+
+    @staticmethod
+    def entry_key(spec: Dict) -> str:
+        return content_key('join-result', spec)
+
+    @staticmethod
+    def csv_hash(csv_path) -> str:
+        return file_sha256(csv_path)
+
+    def load(self, key: str) -> Optional[Dict]:
+        """{'meta', 'result', 'digests'} for an entry, or None"""
+        entry = self.cache_dir / key
+        try:
+            meta = json.loads((entry / META_NAME).read_text())
+            result = pd.read_pickle(entry / RESULT_NAME)
+            digests = pd.read_pickle(entry / DIGESTS_NAME)
+        except (OSError, ValueError, EOFError) as e:
+            if entry.exists():
+                logger.warning(f"Discarding unreadable join cache entry {key}: {e}")
+                shutil.rmtree(entry, ignore_errors=True)
+            return None
+        (entry / META_NAME).touch()  # recency for pruning
+        return {'meta': meta, 'result': result, 'digests': digests}
+
+    def save(self, key: str, meta: Dict, result: pd.DataFrame, digests: pd.Series):
+        """Write an entry atomically (to a temp dir, then rename)"""
+        entry = self.cache_dir / key
+        staging = self.cache_dir / f'.{key}.{time.time_ns()}'
+        staging.mkdir(parents=True)
+        result.to_pickle(staging / RESULT_NAME)
+        digests.to_pickle(staging / DIGESTS_NAME)
+        (staging / META_NAME).write_text(json.dumps(meta, indent=2, default=str))
+        shutil.rmtree(entry, ignore_errors=True)
+        staging.rename(entry)
+        self.prune()
+
+    def prune(self):
+        entries = sorted((p for p in self.cache_dir.iterdir() if (p / META_NAME).exists()),
+                         key=lambda p: (p / META_NAME).stat().st_mtime, reverse=True)
+        for stale in entries[self.max_entries:]:
+            shutil.rmtree(stale, ignore_errors=True)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Point-in-Polygon Locator
+Assigns latitude/longitude points to the polygons of a layer with an STRtree,
+splitting large chunks of points across a process pool
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+gpd = lazy_import('geopandas')
+shapely = lazy_import('shapely')
+
+logger = logging.getLogger(__name__)
+
+# CSV rows per chunk when streaming points
+POINT_CHUNK_ROWS = 500_000
+
+# Chunks smaller than this are located in-process (pool overhead dominates)
+MIN_PARALLEL_POINTS = 50_000
+
+# Coordinate column names, checked case-insensitively
+LAT_FIELD_PATTERN = r'(?i)^(lat|latitude|lat_dd|point_y|y)$'
+LON_FIELD_PATTERN = r'(?i)^(lon|lng|long|longitude|lon_dd|point_x|x)$'
+
+# Per-worker spatial index, built once by _init_worker
+_worker_tree = None
+
+
+def detect_point_fields(columns) -> Optional[Tuple[str, str]]:
+    """(lat_field, lon_field) from column names, or None"""
+    lat = next((col for col in columns if re.match(LAT_FIELD_PATTERN, str(col))), None)
+    lon = next((col for col in columns if re.match(LON_FIELD_PATTERN, str(col))), None)
+    return (lat, lon) if lat and lon else None
+
+
+def locate_points(tree: shapely.STRtree, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """Index of the polygon containing each point; -1 outside, -2 for invalid coordinates"""
+    result = np.full(len(lon), -1, dtype='int64')
+    valid = np.isfinite(lon) & np.isfinite(lat) & (np.abs(lon) <= 180) & (np.abs(lat) <= 90)
+    result[~valid] = -2
+
+    point_ids, polygon_ids = tree.query(shapely.points(lon[valid], lat[valid]), predicate='intersects')
+    # Points on a shared border keep the polygon listed first in the layer
+    order = np.lexsort((polygon_ids, point_ids))
+    point_ids, polygon_ids = point_ids[order], polygon_ids[order]
+    point_ids, first = np.unique(point_ids, return_index=True)
+    result[np.flatnonzero(valid)[point_ids]] = polygon_ids[first]
+    return result
+
+
+def _init_worker(polygons_wkb):
+    global _worker_tree
+    _worker_tree = shapely.STRtree(shapely.from_wkb(polygons_wkb))
+
+
+def _locate_in_worker(coords):
+    lon, lat = coords
+    return locate_points(_worker_tree, lon, lat)
+
+
+class PointLocator:
+    """Maps lon/lat points to the keys of the polygons that contain them
+
+    Use as a context manager so the worker pool is shut down. Counts of
+    assigned, outside and invalid points accumulate in stats.
+    """
+
+    def __init__(self, polygons: gpd.GeoSeries, keys: pd.Series, workers: Optional[int] = None):
+        if polygons.crs is not None and polygons.crs.to_epsg() != 4326:
+            polygons = polygons.to_crs(4326)
+        self.geometry = polygons.values
+        self.keys = np.append(np.asarray(keys, dtype=object), [None, None])  # -2, -1 -> None
+        self.tree = shapely.STRtree(self.geometry)
+        self.workers = workers or os.cpu_count() or 1
+        self.stats = Counter()
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _positions(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        if self.workers <= 1 or len(lon) < MIN_PARALLEL_POINTS:
+            return locate_points(self.tree, lon, lat)
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                             initargs=(shapely.to_wkb(self.geometry),))
+            logger.info(f"Started {self.workers} point-in-polygon workers")
+        bounds = np.linspace(0, len(lon), self.workers + 1).astype(int)
+        pieces = [(lon[start:end], lat[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
+        return np.concatenate(list(self._pool.map(_locate_in_worker, pieces)))
+
+    def locate(self, lon: pd.Series, lat: pd.Series) -> pd.Series:
+        """Key of the containing polygon per point (NA outside the layer or invalid)"""
+        lon_values = pd.to_numeric(lon, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        lat_values = pd.to_numeric(lat, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        positions = self._positions(lon_values, lat_values)
+
+        self.stats['points'] += len(positions)
+        self.stats['assigned'] += int((positions >= 0).sum())
+        self.stats['outside_layer'] += int((positions == -1).sum())
+        self.stats['invalid_coordinates'] += int((positions == -2).sum())
+        return pd.Series(self.keys[positions], index=lon.index, dtype='string')
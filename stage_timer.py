@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Stage Timer
+Records wall time, throughput and (while tracemalloc is tracing) peak
+Python-heap memory for each stage of a join
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class StageTimer:
+    """Accumulates {stage: seconds, rows, rows_per_second, peak_mb}
+
+    Stages run one after another (not nested): each stage resets the
+    tracemalloc peak. A stage entered again (e.g. once per chunk) adds to
+    its time and rows and keeps the larger peak.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None):
+        """Time a block; set record['rows'] inside it when the count is known only later"""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        record = {'rows': rows}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.add(name, time.perf_counter() - start, record['rows'],
+                     tracemalloc.get_traced_memory()[1] if tracing else None)
+
+    def add(self, name: str, seconds: float, rows: Optional[int] = None, peak_bytes: Optional[int] = None):
+        entry = self.stages.setdefault(name, {'seconds': 0.0})
+        entry['seconds'] += seconds
+        if rows is not None:
+            entry['rows'] = entry.get('rows', 0) + rows
+        if peak_bytes is not None:
+            entry['peak_mb'] = max(entry.get('peak_mb', 0.0), round(peak_bytes / 1024 / 1024, 1))
+
+    def summary(self) -> Dict:
+        """Stage table for join_stats['timings'], with rows/s and a total"""
+        stages = {}
+        for name, entry in self.stages.items():
+            stage = dict(entry, seconds=round(entry['seconds'], 4))
+            if entry.get('rows') and entry['seconds'] > 0:
+                stage['rows_per_second'] = round(entry['rows'] / entry['seconds'])
+            stages[name] = stage
+        stages['total'] = {'seconds': round(time.perf_counter() - self.started, 4)}
+        peaks = [entry['peak_mb'] for entry in self.stages.values() if 'peak_mb' in entry]
+        if peaks:
+            stages['total']['peak_mb'] = max(peaks)
+        return stages
+
+
+def print_timings(timings: Dict):
+    """CLI table of a join_stats['timings'] dict"""
+    print(f"\n  {'Stage':20} {'Seconds':>9} {'Rows':>12} {'Rows/s':>12} {'Peak MB':>9}")
+    for name, stage in timings.items():
+        rows = f"{stage['rows']:,}" if 'rows' in stage else ''
+        rate = f"{stage['rows_per_second']:,}" if 'rows_per_second' in stage else ''
+        peak = f"{stage['peak_mb']:.1f}" if 'peak_mb' in stage else ''
+        print(f"  {name:20} {stage['seconds']:>9.3f} {rows:>12} {rate:>12} {peak:>9}")
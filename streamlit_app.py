@@ -126,6 +126,14 @@ def show_csv_upload():
                 # Column preview
                 st.subheader("Column Preview")
                 st.write("**All Columns:**", ", ".join(analysis['columns']))
+                with st.expander(f"Column profiles ({analysis['sampled_rows']:,} sampled rows)"):
+                    profile_df = pd.DataFrame([
+                        {'Column': column, 'Type': profile['inferred_type'],
+                         'Confidence': profile['confidence'], 'Null %': profile['null_rate'] * 100,
+                         'Distinct (est.)': profile['distinct_estimate']}
+                        for column, profile in analysis['column_profiles'].items()
+                    ])
+                    st.dataframe(profile_df, use_container_width=True)
                 
                 # Sample data
                 st.subheader("Sample Data")
@@ -155,7 +163,7 @@ def show_csv_upload():
                                 confidence_color = {"High": "🟢", "Medium": "🟡", "Low": "🔴"}
                                 st.write(f"{confidence_color.get(option['confidence'], '⚪')} "
                                        f"`{option['csv_field']}` → `{option['geo_field']}` "
-                                       f"({option['confidence']} confidence)")
+                                       f"({option['overlap']:.0%} of sampled values match)")
                 else:
                     st.warning("No suitable join options found. Check your data format and column names.")
             
@@ -232,6 +240,11 @@ def show_join_interface():
         help="Use fuzzy string matching for name fields (recommended for location names)"
     )
     
+    matched_only = st.checkbox(
+        "Keep only matched features",
+        help="Loads geometry only for features that matched (much faster for tract and block group layers)"
+    )
+    
     # Perform join
     if st.button("🔗 Perform Join", type="primary"):
         if csv_field and geo_field and selected_layer:
@@ -246,8 +259,10 @@ def show_join_interface():
                         tmp_path = tmp_file.name
                     
                     with st.spinner("Performing join..."):
-                        joined_gdf = st.session_state.joiner.perform_join(
-                            tmp_path, selected_layer, csv_field, geo_field, fuzzy_match
+                        # Re-uploads of an edited CSV only re-join the keys that changed
+                        joined_gdf = st.session_state.joiner.cached_join(
+                            tmp_path, selected_layer, csv_field, geo_field, fuzzy_match,
+                            matched_only=matched_only, optimize_memory=True
                         )
                         st.session_state.joined_data = joined_gdf
                     
@@ -359,7 +374,8 @@ def show_export():
     # Format selection
     export_format = st.selectbox(
         "Choose export format:",
-        ["GeoJSON", "Shapefile", "CSV (without geometry)", "GeoPackage (GPKG)"]
+        ["GeoJSON", "Shapefile", "CSV (without geometry)", "GeoPackage (GPKG)",
+         "GeoParquet", "FlatGeobuf"]
     )
     
     # Filename input
@@ -377,7 +393,9 @@ def show_export():
                         "GeoJSON": "geojson",
                         "Shapefile": "shapefile", 
                         "CSV (without geometry)": "csv",
-                        "GeoPackage (GPKG)": "gpkg"
+                        "GeoPackage (GPKG)": "gpkg",
+                        "GeoParquet": "geoparquet",
+                        "FlatGeobuf": "flatgeobuf"
                     }
                     
                     output_file = st.session_state.joiner.export_results(
@@ -393,7 +411,9 @@ def show_export():
                         "geojson": "application/geo+json",
                         "shapefile": "application/zip",
                         "csv": "text/csv",
-                        "gpkg": "application/geopackage+sqlite3"
+                        "gpkg": "application/geopackage+sqlite3",
+                        "geoparquet": "application/vnd.apache.parquet",
+                        "flatgeobuf": "application/octet-stream"
                     }
                     
                     # Create download button
@@ -0,0 +1,80 @@
+"""Shared fixtures: small synthetic county and state layers in a temporary data directory"""
+
+import importlib.util
+from collections import OrderedDict
+from pathlib import Path
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import box
+
+from csv_shapefile_joiner import CSVShapefileJoiner
+from job_queue import JobQueue
+
+# The API server's file name is not an importable module name
+SERVER_PATH = Path(__file__).resolve().parent.parent / 'gis-api-server.py'
+
+# Counties per synthetic state; state FIPS below 10 exercise lost leading zeros
+STATES = {'01': 'Alabama', '06': 'California', '36': 'New York'}
+COUNTIES_PER_STATE = 4
+
+
+def county_frame() -> gpd.GeoDataFrame:
+    """One unit square per county, states side by side"""
+    rows = []
+    for s, (state, name) in enumerate(STATES.items()):
+        for c in range(COUNTIES_PER_STATE):
+            rows.append({'GEOID': f'{state}{c * 2 + 1:03d}', 'STATE': state,
+                         'NAME': f'{name[:3]} County {c + 1}', 'AREA': float(c + 1),
+                         'geometry': box(s * 10 + c, 0, s * 10 + c + 1, 1)})
+    return gpd.GeoDataFrame(rows, crs='EPSG:4326')
+
+
+def state_frame() -> gpd.GeoDataFrame:
+    counties = county_frame()
+    states = counties.dissolve(by='STATE', as_index=False)[['STATE', 'geometry']]
+    states['name'] = states['STATE'].map(STATES)
+    states['NAME'] = states['name'].str.upper()  # differs from 'name' only by case
+    return states
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Temporary data directory with us_counties.json and us_states.json"""
+    monkeypatch.chdir(tmp_path)
+    directory = tmp_path / 'data'
+    directory.mkdir()
+    county_frame().to_file(directory / 'us_counties.json', driver='GeoJSON')
+    state_frame().to_file(directory / 'us_states.json', driver='GeoJSON')
+    return directory
+
+
+@pytest.fixture
+def joiner(data_dir, tmp_path):
+    """Joiner over the synthetic layers, with no metadata database"""
+    return CSVShapefileJoiner(data_dir=str(data_dir), metadata_db=str(tmp_path / 'gis_metadata.db'))
+
+
+@pytest.fixture(scope='session')
+def server_module():
+    spec = importlib.util.spec_from_file_location('gis_api_server', SERVER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    yield module
+    module.job_queue.shutdown()
+
+
+@pytest.fixture
+def server(server_module, data_dir, tmp_path, monkeypatch):
+    """The API server over the synthetic layers, with its caches and job queue in tmp_path"""
+    queue = JobQueue(tmp_path / 'job_cache', max_workers=1)
+    monkeypatch.setattr(server_module, 'DATA_DIR', data_dir)
+    monkeypatch.setattr(server_module, 'TILE_CACHE_DIR', tmp_path / 'tile_cache')
+    monkeypatch.setattr(server_module, 'SNAPSHOT_DIR', tmp_path / 'server_snapshot')
+    monkeypatch.setattr(server_module, 'job_queue', queue)
+    monkeypatch.setattr(server_module, '_dataset_cache', {})
+    monkeypatch.setattr(server_module, '_response_cache', OrderedDict())
+    monkeypatch.setattr(server_module, '_snapshot', None)
+    monkeypatch.setattr(server_module, '_joiner', None)
+    yield server_module
+    queue.shutdown(wait=True)
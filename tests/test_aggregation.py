@@ -0,0 +1,55 @@
+"""Chunked CSV aggregation (aggregate=...) against a whole-file groupby"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import county_frame
+
+
+@pytest.fixture
+def records(tmp_path):
+    """Record-level CSV: several rows per county, FIPS stored as integers (zeros lost)"""
+    rng = np.random.default_rng(7)
+    geoids = county_frame()['GEOID'].tolist()[:-2]  # two counties get no records
+    frame = pd.DataFrame({
+        'FIPS': rng.choice(geoids, 200).astype(int),
+        'clients': rng.integers(0, 50, 200),
+        'households': rng.integers(1, 10, 200).astype(float)
+    })
+    frame.loc[::17, 'clients'] = np.nan
+    path = tmp_path / 'records.csv'
+    frame.to_csv(path, index=False)
+    return path, frame.assign(FIPS=frame['FIPS'].astype(str).str.zfill(5))
+
+
+def test_chunked_aggregation_matches_groupby(joiner, records):
+    path, frame = records
+    joined = joiner.perform_join(str(path), 'us_counties.json', 'FIPS', 'GEOID',
+                                 aggregate={'clients': ['sum', 'mean', 'count', 'min', 'max']},
+                                 chunksize=7)
+
+    expected = frame.groupby('FIPS').agg(clients_sum=('clients', 'sum'), clients_mean=('clients', 'mean'),
+                                         clients_count=('clients', 'count'), clients_min=('clients', 'min'),
+                                         clients_max=('clients', 'max'), record_count=('clients', 'size'))
+    result = joined.set_index('GEOID').loc[expected.index, expected.columns]
+    pd.testing.assert_frame_equal(result.astype('float64'), expected.astype('float64'),
+                                  check_names=False, check_index_type=False)
+
+    stats = joined.attrs['join_stats']
+    assert stats['csv_rows_aggregated'] == 200
+    assert stats['successful_joins'] == len(expected)
+    assert stats['unmatched_geographic'] == len(county_frame()) - len(expected)
+
+
+def test_weighted_mean_ignores_rows_without_a_value(joiner, records):
+    path, frame = records
+    joined = joiner.perform_join(str(path), 'us_counties.json', 'FIPS', 'GEOID',
+                                 aggregate={'clients': ['weighted_mean']}, weight_field='households',
+                                 chunksize=11)
+
+    valid = frame.dropna(subset=['clients'])
+    expected = ((valid['clients'] * valid['households']).groupby(valid['FIPS']).sum()
+                / valid.groupby('FIPS')['households'].sum())
+    result = joined.set_index('GEOID')['clients_weighted_mean'].loc[expected.index]
+    np.testing.assert_allclose(result.to_numpy(dtype=float), expected.to_numpy())
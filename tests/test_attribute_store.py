@@ -0,0 +1,60 @@
+"""Attribute store: round-trips and geometry-free joins answered from the store"""
+
+import pandas as pd
+import pytest
+
+from attribute_store import read_stored_attributes, save_attribute_table, stored_layer
+from conftest import county_frame
+from layer_keys import build_key_index, read_attribute_table
+
+
+def store_layer(joiner, layer):
+    path = joiner.available_layers[layer]['path']
+    table = read_attribute_table(path)
+    index = build_key_index(path, table)
+    save_attribute_table(joiner.attribute_store, layer, path, table,
+                         {field: entry['key_type'] for field, entry in index.items()})
+    return stored_layer(joiner.attribute_store, layer, path), table
+
+
+def test_round_trip_keeps_columns_differing_only_by_case(joiner):
+    entry, table = store_layer(joiner, 'us_states.json')
+
+    assert entry is not None and 'STATE' in entry['key_fields']
+    frame = read_stored_attributes(joiner.attribute_store, entry, 'STATE')
+    assert list(frame.columns) == list(table.columns)
+    pd.testing.assert_frame_equal(frame.drop(columns=['STATE']),
+                                  table.drop(columns=['STATE']).reset_index(drop=True))
+    assert frame['name'].tolist() == ['Alabama', 'California', 'New York']
+    assert frame['NAME'].tolist() == ['ALABAMA', 'CALIFORNIA', 'NEW YORK']
+
+    subset = read_stored_attributes(joiner.attribute_store, entry, 'STATE', columns=['NAME'], keys=['06'])
+    assert subset.to_dict('records') == [{'STATE': '06', 'NAME': 'CALIFORNIA'}]
+
+
+@pytest.fixture
+def counts(tmp_path):
+    # AREA also names a layer field, so the merge suffixes it
+    geoids = county_frame()['GEOID'].tolist()
+    path = tmp_path / 'counts.csv'
+    pd.DataFrame({'FIPS': [int(f) for f in geoids[:-3]] + [99999],
+                  'value': range(10), 'AREA': range(10)}).to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('matched_only', [False, True])
+def test_stored_join_matches_file_join(joiner, counts, matched_only):
+    expected = joiner.perform_join(str(counts), 'us_counties.json', 'FIPS', 'GEOID',
+                                   load_geometry=False, matched_only=matched_only)
+    store_layer(joiner, 'us_counties.json')
+    result = joiner.perform_join(str(counts), 'us_counties.json', 'FIPS', 'GEOID',
+                                 load_geometry=False, matched_only=matched_only)
+
+    assert 'attribute_store' in result.attrs['join_stats']
+    columns = [col for col in expected.columns if col != 'geometry']
+    pd.testing.assert_frame_equal(result[columns].sort_values('GEOID').reset_index(drop=True),
+                                  pd.DataFrame(expected[columns]).sort_values('GEOID').reset_index(drop=True))
+    shared = ['total_geographic_features', 'total_csv_records', 'successful_joins', 'join_rate',
+              'unmatched_geographic', 'unmatched_csv', 'key_type', 'key_repairs']
+    assert {key: result.attrs['join_stats'][key] for key in shared} == \
+        {key: expected.attrs['join_stats'][key] for key in shared}
@@ -0,0 +1,26 @@
+"""Batch manifests: each layer is read once, even when it exceeds the cache budget"""
+
+import pandas as pd
+
+import csv_shapefile_joiner
+from conftest import county_frame
+from csv_shapefile_joiner import LayerCache
+
+
+def test_layers_over_budget_are_read_once_per_batch(joiner, tmp_path, monkeypatch):
+    cache = LayerCache(max_mb=0)  # every layer is over budget
+    monkeypatch.setattr(csv_shapefile_joiner, 'layer_cache', cache)
+
+    csv_path = tmp_path / 'counts.csv'
+    pd.DataFrame({'FIPS': county_frame()['GEOID'], 'value': range(12)}).to_csv(csv_path, index=False)
+    jobs = [{'name': f'job{i}', 'csv': str(csv_path), 'layer': 'us_counties.json', 'csv_field': 'FIPS',
+             'geo_field': 'GEOID', 'output': str(tmp_path / f'out{i}'), 'format': 'geojson'}
+            for i in range(5)]
+
+    summaries = joiner.run_batch(jobs, writers=1)
+
+    assert [summary['error'] for summary in summaries] == [None] * 5
+    assert all(summary['successful_joins'] == 12 for summary in summaries)
+    assert all((tmp_path / f'out{i}.geojson').exists() for i in range(5))
+    assert cache.misses == 1 and cache.hits == 4
+    assert cache.stats()['layers'] == 0  # unpinned after the batch, then evicted
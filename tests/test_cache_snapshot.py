@@ -0,0 +1,116 @@
+"""Warm-cache snapshots: round trips through the memory map, stale sources and corrupt files"""
+
+import gzip
+import json
+import os
+
+import pytest
+
+from cache_snapshot import MANIFEST_NAME, Snapshot, save_snapshot
+
+BBOXES = [(0.0, 0.0, 1.0, 1.0), (1.0, 0.0, 2.0, 1.5)]
+KEY_INDEX = {'GEOID': {'01001': [0], '01003': [1]}}
+
+
+@pytest.fixture
+def sources(tmp_path):
+    counties, states = tmp_path / 'counties.json', tmp_path / 'states.json'
+    counties.write_text('{"features": ["a", "b"]}')
+    states.write_text('{"features": ["c"]}')
+    return {'counties': counties, 'states': states}
+
+
+def write(snapshot_dir, sources):
+    responses = {('counties', ''): gzip.compress(b'{"all": true}'),
+                 ('counties', '01'): gzip.compress(b'{"state": "01"}'),
+                 ('states', ''): gzip.compress(b'{"states": true}')}
+    return save_snapshot(snapshot_dir, sources, responses,
+                         {'counties': BBOXES, 'states': BBOXES[:1]},
+                         {'counties': KEY_INDEX})
+
+
+def test_snapshot_round_trips_through_the_memory_map(tmp_path, sources):
+    write(tmp_path / 'snap', sources)
+    snapshot = Snapshot.load(tmp_path / 'snap', sources)
+
+    assert gzip.decompress(snapshot.response('counties', '01')) == b'{"state": "01"}'
+    assert snapshot.response('counties', '06') is None
+    assert set(snapshot.responses()) == {('counties', ''), ('counties', '01'), ('states', '')}
+    index = snapshot.spatial_index('counties', 2)
+    assert list(index) == BBOXES and index[-1] == BBOXES[1]
+    assert snapshot.spatial_index('counties', 3) is None
+    assert snapshot.key_indexes('counties') == KEY_INDEX
+    assert snapshot.key_indexes('states') == {}
+
+    # Rewriting keeps only the newest data file
+    write(tmp_path / 'snap', sources)
+    assert len(list((tmp_path / 'snap').glob('snapshot-*.bin'))) == 1
+
+
+def test_changed_source_drops_only_its_entries(tmp_path, sources):
+    write(tmp_path / 'snap', sources)
+    sources['counties'].write_text('{"features": ["a", "b", "changed"]}')
+
+    snapshot = Snapshot.load(tmp_path / 'snap', sources)
+    assert snapshot.response('counties', '') is None
+    assert snapshot.spatial_index('counties', 2) is None
+    assert snapshot.key_indexes('counties') == {}
+    assert gzip.decompress(snapshot.response('states', '')) == b'{"states": true}'
+
+
+def test_touched_but_identical_source_stays_current(tmp_path, sources):
+    write(tmp_path / 'snap', sources)
+    stat = sources['counties'].stat()
+    os.utime(sources['counties'], (stat.st_atime, stat.st_mtime + 100))
+
+    snapshot = Snapshot.load(tmp_path / 'snap', sources)
+    assert snapshot.response('counties', '') is not None
+
+    # A change after loading invalidates the entries in place
+    os.utime(sources['counties'], (stat.st_atime, stat.st_mtime + 200))
+    assert snapshot.response('counties', '') is None
+
+
+def test_corrupt_or_missing_files_load_as_no_snapshot(tmp_path, sources):
+    snapshot_dir = tmp_path / 'snap'
+    assert Snapshot.load(snapshot_dir, sources) is None
+
+    manifest = write(snapshot_dir, sources)
+    data_file = snapshot_dir / manifest['data_file']
+    data_file.write_bytes(data_file.read_bytes()[:10])
+    assert Snapshot.load(snapshot_dir, sources) is None
+
+    data_file.unlink()
+    assert Snapshot.load(snapshot_dir, sources) is None
+
+    for broken in ('{"version": 1, "entr', '[1, 2]', '{"version": 1}', '{"version": 99}'):
+        (snapshot_dir / MANIFEST_NAME).write_text(broken)
+        assert Snapshot.load(snapshot_dir, sources) is None
+
+
+def test_server_serves_restored_responses_until_the_source_changes(server):
+    client = server.app.test_client()
+    first = client.get('/api/geography/counties')
+    assert first.status_code == 200 and len(first.get_json()['features']) == 12
+
+    server.save_server_snapshot()
+    server._response_cache.clear()
+    server._dataset_cache.clear()
+    server.load_warm_snapshot()
+    assert server._snapshot.response('counties', '') is not None
+    restored = client.get('/api/geography/counties')
+    assert restored.get_json() == first.get_json()
+    assert not server._dataset_cache  # served from the snapshot without loading the layer
+
+    source = server.DATA_DIR / 'us_counties.json'
+    data = json.loads(source.read_text())
+    data['features'] = data['features'][:5]
+    source.write_text(json.dumps(data))
+    server.load_warm_snapshot()
+    assert server._snapshot is None or server._snapshot.response('counties', '') is None
+    assert len(client.get('/api/geography/counties').get_json()['features']) == 5
+
+    (server.SNAPSHOT_DIR / MANIFEST_NAME).write_text('not json')
+    server.load_warm_snapshot()
+    assert server._snapshot is None
+    assert len(client.get('/api/geography/counties').get_json()['features']) == 5
@@ -0,0 +1,70 @@
+"""Composite (state + name) keys: normalization, exact matching and the fuzzy fallback"""
+
+import pandas as pd
+import pytest
+
+from composite_keys import composite_keys
+from conftest import county_frame
+
+# Washington County exists in two of these states
+LAYER = pd.DataFrame({
+    'STATE': ['01', '06', '01', '36', '06'],
+    'NAME': ['Washington County', 'Washington County', 'St. Clair County', 'Kings County', 'Alameda County'],
+    'POP': [1, 2, 3, 4, 5]
+})
+
+
+def join(joiner, rows, fuzzy_match=False):
+    csv_df = pd.DataFrame(rows, columns=['State', 'County', 'value'])
+    joined, stats = joiner.composite_join(csv_df, LAYER, 'State,County', 'STATE,NAME', fuzzy_match=fuzzy_match)
+    return joined.set_index('POP')['value'], stats
+
+
+def test_components_normalize_before_hashing():
+    frame = pd.DataFrame({'state': ['AL', 'Alabama', '1', '06', None],
+                          'name': ['Saint Clair', 'st. clair county', 'ST CLAIR', 'St. Clair', 'St. Clair']})
+    keys = composite_keys(frame, ['state', 'name'], ['state', 'name'])
+
+    assert keys.iloc[0] == keys.iloc[1] == keys.iloc[2]
+    assert keys.iloc[3] != keys.iloc[0]
+    assert pd.isna(keys.iloc[4])
+
+
+def test_exact_composites_keep_same_names_in_their_states(joiner):
+    values, stats = join(joiner, [('Alabama', 'Washington', 10), ('CA', 'washington county', 20),
+                                  ('NY', 'Kings', 40), ('NY', 'Washington', 99)])
+
+    assert values.fillna(-1).to_dict() == {1: 10, 2: 20, 3: -1, 4: 40, 5: -1}
+    assert stats['exact'] == 3 and stats['fuzzy'] == 0
+
+
+def test_leftovers_are_fuzzy_matched_within_their_state(joiner):
+    values, stats = join(joiner, [('AL', 'Washington', 10), ('CA', 'Alamda', 50), ('NY', 'Alameda', 99)],
+                         fuzzy_match=True)
+
+    assert values.fillna(-1).to_dict() == {1: 10, 2: -1, 3: -1, 4: -1, 5: 50}
+    assert stats['exact'] == 1 and stats['fuzzy'] == 1 and stats['ambiguous'] == 0
+
+
+def test_names_matching_several_features_stay_unmatched(joiner):
+    values, stats = join(joiner, [(None, 'Washington', 10), ('ZZ', 'Washington County', 20),
+                                  (None, 'Kings', 40)], fuzzy_match=True)
+
+    assert values.fillna(-1).to_dict() == {1: -1, 2: -1, 3: -1, 4: 40, 5: -1}
+    assert stats['ambiguous'] == 2 and stats['fuzzy'] == 1
+
+
+def test_perform_join_on_a_composite_key(joiner, tmp_path):
+    counties = county_frame()
+    path = tmp_path / 'chapters.csv'
+    pd.DataFrame({'State': ['AL', 'New York', 'CA'],
+                  'County': ['Ala County 2', 'new county 4', 'Cal County 9'],
+                  'members': [5, 7, 9]}).to_csv(path, index=False)
+
+    joined = joiner.perform_join(str(path), 'us_counties.json', 'State,County', 'STATE,NAME')
+
+    members = joined.set_index('GEOID')['members'].dropna()
+    assert members.to_dict() == {'01003': 5, '36007': 7}
+    assert joined.attrs['join_stats']['composite']['exact'] == 2
+    assert joined.attrs['join_stats']['unmatched_csv'] == 1
+    assert len(joined) == len(counties)
@@ -0,0 +1,58 @@
+"""Areal-interpolation crosswalks against a direct geopandas overlay"""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import box
+
+from conftest import COUNTIES_PER_STATE, STATES, county_frame
+from crosswalk import AREA_CRS
+
+
+@pytest.fixture
+def zones(data_dir):
+    """ZIP-like zones straddling two neighbouring counties each (not nested)"""
+    rows = []
+    for s in range(len(STATES)):
+        for c in range(COUNTIES_PER_STATE - 1):
+            rows.append({'ZCTA': f'{s + 1}{c:04d}', 'geometry': box(s * 10 + c + 0.25, 0, s * 10 + c + 1.75, 1)})
+    frame = gpd.GeoDataFrame(rows, crs='EPSG:4326')
+    frame.to_file(data_dir / 'zones.json', driver='GeoJSON')
+    return frame
+
+
+def test_area_crosswalk_matches_overlay(joiner, zones, tmp_path):
+    rng = np.random.default_rng(3)
+    csv = pd.DataFrame({'zip': zones['ZCTA'], 'people': rng.integers(100, 1000, len(zones)),
+                        'rate': rng.random(len(zones))})
+    path = tmp_path / 'zones.csv'
+    csv.to_csv(path, index=False)
+
+    crosswalk = joiner.get_crosswalk('zones.json', 'ZCTA', 'us_counties.json', 'GEOID')
+    joined = joiner.perform_join(str(path), 'us_counties.json', 'zip', 'GEOID',
+                                 crosswalk=crosswalk, intensive=['rate'])
+
+    pieces = gpd.overlay(zones.merge(csv, left_on='ZCTA', right_on='zip').to_crs(AREA_CRS),
+                         county_frame().to_crs(AREA_CRS), how='intersection')
+    pieces['share'] = pieces.area / pieces['ZCTA'].map(zones.set_index('ZCTA').to_crs(AREA_CRS).area)
+    pieces['area'] = pieces.area
+    expected = pd.DataFrame({
+        'people': (pieces['people'] * pieces['share']).groupby(pieces['GEOID']).sum(),
+        'rate': (pieces['rate'] * pieces['area']).groupby(pieces['GEOID']).sum()
+                / pieces['area'].groupby(pieces['GEOID']).sum()
+    })
+
+    result = joined.set_index('GEOID').loc[expected.index]
+    np.testing.assert_allclose(result['people'].to_numpy(dtype=float), expected['people'], rtol=1e-6)
+    np.testing.assert_allclose(result['rate'].to_numpy(dtype=float), expected['rate'], rtol=1e-6)
+    assert np.isclose(result['people'].sum(), csv['people'].sum())
+    assert joined.attrs['join_stats']['crosswalk']['method'] == 'area'
+
+
+def test_stored_crosswalk_is_reused(joiner, zones):
+    first = joiner.get_crosswalk('zones.json', 'ZCTA', 'us_counties.json', 'GEOID')
+    stored = list((joiner.data_dir / 'crosswalks').glob('*.npz'))
+    again = joiner.get_crosswalk('zones.json', 'ZCTA', 'us_counties.json', 'GEOID')
+    assert len(stored) == 1
+    np.testing.assert_array_equal(first.weights, again.weights)
@@ -0,0 +1,33 @@
+"""Row sampling and counting for CSV profiling"""
+
+import random
+
+import pandas as pd
+
+import csv_profile
+from csv_profile import count_rows, reservoir_lines, sample_rows
+
+
+def test_reservoir_is_uniform_and_ordered():
+    sample = reservoir_lines(iter(range(100_000)), 2000, random.Random(1))
+    assert len(sample) == 2000 and sample == sorted(sample)
+    deciles = pd.Series(sample).floordiv(10_000).value_counts()
+    assert len(deciles) == 10 and deciles.min() > 150
+
+
+def test_short_input_is_returned_whole():
+    assert reservoir_lines(iter(range(5)), 10, random.Random(0)) == list(range(5))
+
+
+def test_sorted_large_file_is_sampled_across_its_whole_length(tmp_path, monkeypatch):
+    # GEOID-sorted tracts: a head-of-file sample would only see state 01
+    geoids = [f'{state:02d}{tract:09d}' for state in range(1, 57) for tract in range(500)]
+    path = tmp_path / 'tracts.csv'
+    pd.DataFrame({'GEOID': geoids, 'value': range(len(geoids))}).to_csv(path, index=False)
+    monkeypatch.setattr(csv_profile, 'FULL_READ_MB', 0)  # force the streaming path
+
+    sample, exact = sample_rows(path, sample_rows=1000)
+    assert not exact and len(sample) == 1000
+    states = sample['GEOID'].str[:2].value_counts()
+    assert len(states) == 56 and states.max() < 60
+    assert count_rows(path) == len(geoids)
@@ -0,0 +1,65 @@
+"""Exports: statistics sidecars and the export benchmark"""
+
+import json
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+
+from conftest import county_frame
+
+
+@pytest.fixture
+def joined(joiner, tmp_path):
+    path = tmp_path / 'counts.csv'
+    pd.DataFrame({'FIPS': county_frame()['GEOID'], 'value': range(12)}).to_csv(path, index=False)
+    return joiner.perform_join(str(path), 'us_counties.json', 'FIPS', 'GEOID')
+
+
+def test_repeated_exports_do_not_accumulate_timings(joiner, joined, tmp_path):
+    join_total = joined.attrs['join_stats']['timings']['total']['seconds']
+    for name in ['a', 'b', 'c']:
+        joiner.export_results(joined, tmp_path / name, 'geojson')
+
+    assert 'export' not in joined.attrs['join_stats']['timings']
+    assert joined.attrs['join_stats']['timings']['total']['seconds'] == join_total
+    for name in ['a', 'b', 'c']:
+        timings = json.loads((tmp_path / f'{name}.json').read_text())['timings']
+        assert timings['total']['seconds'] == pytest.approx(join_total + timings['export']['seconds'], abs=1e-3)
+
+
+def test_benchmark_writes_one_report(joiner, joined, tmp_path):
+    results = joiner.benchmark_exports(joined, tmp_path / 'bench', ['geojson', 'gpkg', 'csv'])
+
+    report = json.loads((tmp_path / 'bench' / 'benchmark.json').read_text())
+    assert [entry['format'] for entry in report['exports']] == ['geojson', 'gpkg', 'csv']
+    assert report['exports'] == results and report['features'] == 12
+    assert 'export' not in report['join_stats']['timings']
+
+
+def test_benchmark_sizes_match_files_on_disk(joiner, joined, tmp_path):
+    # GeoJSON goes first, so a shapefile size that counted it would be too large
+    results = joiner.benchmark_exports(joined, tmp_path / 'bench', ['geojson', 'shapefile', 'gpkg', 'csv'])
+
+    directory = tmp_path / 'bench'
+    sizes = {entry['format']: entry['bytes'] for entry in results}
+    assert sizes['geojson'] == (directory / 'benchmark.geojson').stat().st_size
+    assert sizes['gpkg'] == (directory / 'benchmark.gpkg').stat().st_size
+    assert sizes['csv'] == (directory / 'benchmark.csv').stat().st_size
+    assert sizes['shapefile'] == sum((directory / f'benchmark{suffix}').stat().st_size
+                                     for suffix in ['.shp', '.shx', '.dbf', '.prj', '.cpg']
+                                     if (directory / f'benchmark{suffix}').exists())
+
+
+@pytest.mark.parametrize('format_type', ['geoparquet', 'flatgeobuf'])
+def test_columnar_and_streaming_formats_round_trip(joiner, joined, tmp_path, format_type):
+    output = joiner.export_results(joined, tmp_path / 'out', format_type)
+
+    result = gpd.read_parquet(output) if format_type == 'geoparquet' else gpd.read_file(output)
+    assert len(result) == len(joined) and result.crs == joined.crs
+    # FlatGeobuf's spatial index stores features in Hilbert order
+    result = result.sort_values('GEOID').reset_index(drop=True)
+    expected = joined.sort_values('GEOID').reset_index(drop=True)
+    assert result['GEOID'].tolist() == expected['GEOID'].tolist()
+    assert result['value'].tolist() == expected['value'].tolist()
+    assert result.geometry.geom_equals(expected.geometry).all()
@@ -0,0 +1,23 @@
+"""Memory-optimized joins keep the schema of the plain join"""
+
+import pandas as pd
+
+from conftest import county_frame
+
+
+def test_optimized_join_restores_suffixed_key(joiner, data_dir, tmp_path):
+    # A layer that carries its own FIPS field next to GEOID
+    layer = county_frame()
+    layer['FIPS'] = layer['GEOID']
+    layer.to_file(data_dir / 'fips_counties.json', driver='GeoJSON')
+    path = tmp_path / 'counts.csv'
+    pd.DataFrame({'FIPS': layer['GEOID'], 'value': range(12)}).to_csv(path, index=False)
+
+    plain = joiner.perform_join(str(path), 'fips_counties.json', 'FIPS', 'GEOID')
+    lean = joiner.perform_join(str(path), 'fips_counties.json', 'FIPS', 'GEOID', optimize_memory=True)
+
+    assert {'FIPS_x', 'FIPS_y'} <= set(plain.columns)
+    assert 'FIPS' in lean.columns and not {'FIPS_x', 'FIPS_y'} & set(lean.columns)
+    assert list(lean.columns) == [col.replace('FIPS_x', 'FIPS') for col in plain.columns if col != 'FIPS_y']
+    assert lean['FIPS'].astype(str).tolist() == plain['FIPS_x'].astype(str).tolist()
+    assert 'FIPS_x' not in lean.attrs['join_stats']['memory']['converted']
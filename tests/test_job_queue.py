@@ -0,0 +1,116 @@
+"""Background jobs: status transitions, failures and content-hash result reuse"""
+
+import threading
+import time
+
+import pytest
+
+from job_queue import JobQueue, QueueFullError
+
+CSV = 'GEOID,value\n01001,1\n01003,2\n36007,3\n'
+
+
+def wait_for(client, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f'/api/jobs/{job_id}').get_json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def submit(client, **overrides):
+    job = dict({'type': 'join', 'geography': 'counties', 'format': 'csv', 'csv': CSV,
+                'csv_field': 'GEOID', 'geo_field': 'GEOID'}, **overrides)
+    return client.post('/api/jobs', json=job)
+
+
+def test_join_job_runs_and_its_result_downloads(server):
+    client = server.app.test_client()
+    response = submit(client)
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['status'] in ('queued', 'running', 'done')
+
+    finished = wait_for(client, job['id'])
+    assert finished['status'] == 'done' and finished['progress'] == 1.0
+    assert finished['stats']['successful_joins'] == 3
+    result = client.get(finished['links']['result'])
+    assert result.status_code == 200
+    lines = result.data.decode().splitlines()
+    assert lines[0].startswith('GEOID') and len(lines) == 13
+    result.close()
+
+
+def test_identical_jobs_reuse_the_cached_result(server):
+    client = server.app.test_client()
+    first = submit(client).get_json()
+    wait_for(client, first['id'])
+
+    again = submit(client)
+    assert again.status_code == 200 and again.get_json()['id'] == first['id']
+    assert again.get_json()['status'] == 'done'
+
+    # A fresh queue over the same cache directory (a restarted server) finds it on disk
+    server.job_queue = JobQueue(server.job_queue.cache_dir)
+    restarted = submit(client)
+    assert restarted.status_code == 200 and restarted.get_json()['status'] == 'done'
+
+    other = submit(client, csv=CSV + '06001,4\n')
+    assert other.status_code == 202 and other.get_json()['id'] != first['id']
+    server.job_queue.shutdown(wait=True)
+
+
+def test_failed_job_reports_its_error_and_can_be_retried(server):
+    client = server.app.test_client()
+    job = submit(client, csv_field='MISSING').get_json()
+
+    failed = wait_for(client, job['id'])
+    assert failed['status'] == 'failed' and failed['error']
+    assert 'traceback' not in failed
+    assert client.get(failed['links']['result']).status_code == 409
+
+    retried = submit(client, csv_field='MISSING')
+    assert retried.status_code == 202 and retried.get_json()['id'] == job['id']
+    wait_for(client, job['id'])
+
+
+def test_invalid_submissions_are_rejected(server):
+    client = server.app.test_client()
+    assert submit(client, geography='atlantis').status_code == 404
+    assert submit(client, format='pdf').status_code == 400
+    assert submit(client, csv=None).status_code == 400
+    assert client.get('/api/jobs/0123abcd').status_code == 404
+
+
+def test_status_moves_from_queued_to_running_to_done(tmp_path):
+    queue = JobQueue(tmp_path, max_workers=1, max_pending=2)
+    started, release = threading.Event(), threading.Event()
+    seen = []
+
+    def work(workdir, payload, progress):
+        started.wait(10)
+        progress(0.5, 'halfway')
+        seen.append(queue.get(first['id'])['status'])
+        release.wait(10)
+        (workdir / 'out.txt').write_bytes(payload)
+        return workdir / 'out.txt', {'bytes': len(payload)}
+
+    first, created = queue.submit('test', {'n': 1}, work, b'abc')
+    assert created and first['status'] == 'queued'
+    started.set()
+    second, _ = queue.submit('test', {'n': 2}, work, b'')
+    with pytest.raises(QueueFullError):
+        queue.submit('test', {'n': 3}, work, b'')
+
+    release.set()
+    deadline = time.monotonic() + 10
+    while queue.get(second['id'])['status'] != 'done' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    queue.shutdown(wait=True)
+    assert seen[0] == 'running'
+    done = queue.get(first['id'])
+    assert done['status'] == 'done' and done['stats'] == {'bytes': 3}
+    assert queue.result_path(first['id']).read_bytes() == b'abc'
+    assert queue.get(second['id'])['status'] == 'done'
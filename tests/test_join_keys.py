@@ -0,0 +1,106 @@
+"""Key type detection, normalization and GEOID rollups on damaged, sorted input"""
+
+import logging
+
+import pandas as pd
+
+from conftest import county_frame
+from join_keys import detect_key_type, normalize_keys, rollup_keys
+
+
+def stripped_tracts(per_county: int) -> pd.Series:
+    """Tract GEOIDs of the synthetic counties, sorted, as integers would print them"""
+    geoids = [f'{county}{tract:06d}' for county in county_frame()['GEOID'] for tract in range(100, 100 + per_county)]
+    return pd.Series(sorted(geoids)).str.lstrip('0')
+
+
+def test_normalization_repairs_common_damage():
+    values = pd.Series([' 1001', '1001.0', '0500000US01001', '36061', None])
+    keys, repairs = normalize_keys(values, 'county')
+    assert keys.tolist()[:4] == ['01001', '01001', '01001', '36061'] and pd.isna(keys.iloc[4])
+    assert repairs['zero_pad'] == 2 and repairs['geoid_prefix'] == 1 and repairs['float_suffix'] == 1
+
+
+def test_state_names_and_abbreviations_become_fips():
+    keys, _ = normalize_keys(pd.Series(['AL', 'California', '6', 'ny']), 'state')
+    assert keys.tolist() == ['01', '06', '06', '36']
+
+
+def test_sorted_head_of_short_codes_is_not_misdetected(caplog):
+    # The first 1,600 codes (state 01) lost their zero and are 10 digits long
+    tracts = stripped_tracts(400)
+    assert (tracts.head(1000).str.len() == 10).all()
+    with caplog.at_level(logging.WARNING, logger='join_keys'):
+        assert detect_key_type(tracts, 'GEOID') == 'tract'
+    assert 'mixed widths' in caplog.text
+
+
+def test_rollup_pads_before_slicing():
+    keys = rollup_keys(pd.Series(['1001000100', '36061000100']), 'tract', 'county')
+    assert keys.tolist() == ['01001', '36061']
+
+
+def test_zero_stripped_sorted_tracts_roll_up_to_their_counties(joiner, tmp_path):
+    tracts = stripped_tracts(400)
+    path = tmp_path / 'tracts.csv'
+    pd.DataFrame({'GEOID': tracts, 'households': 1}).to_csv(path, index=False)
+
+    joined = joiner.perform_join(str(path), 'us_counties.json', 'GEOID', 'GEOID', chunksize=500)
+
+    stats = joined.attrs['join_stats']
+    assert stats['rollup'] == 'tract -> county'
+    assert stats['successful_joins'] == len(county_frame()) and stats['unmatched_csv'] == 0
+    assert (joined['households_sum'] == 400).all()
+    assert (joined['record_count'] == 400).all()
+
+
+def key_scans(monkeypatch):
+    """Calls that stream a CSV's key column alone, chunk by chunk"""
+    calls = []
+    read_csv = pd.read_csv
+
+    def spy(*args, **kwargs):
+        if kwargs.get('chunksize') and len(kwargs.get('usecols') or []) == 1:
+            calls.append(args[0])
+        return read_csv(*args, **kwargs)
+    monkeypatch.setattr(pd, 'read_csv', spy)
+    return calls
+
+
+def test_same_level_aggregate_join_reads_the_csv_once(joiner, tmp_path, monkeypatch):
+    path = tmp_path / 'records.csv'
+    geoids = county_frame()['GEOID'].astype(int).repeat(3)
+    pd.DataFrame({'FIPS': geoids, 'clients': 1}).to_csv(path, index=False)
+    scans = key_scans(monkeypatch)
+
+    joined = joiner.perform_join(str(path), 'us_counties.json', 'FIPS', 'GEOID',
+                                 aggregate={'clients': ['sum']}, chunksize=5)
+
+    assert scans == [] and 'rollup' not in joined.attrs['join_stats']
+    assert (joined['clients_sum'] == 3).all()
+
+
+def test_streamed_rollup_scans_keys_only_when_the_head_may_be_finer(joiner, tmp_path, monkeypatch):
+    path = tmp_path / 'tracts.csv'
+    pd.DataFrame({'GEOID': stripped_tracts(400), 'households': 2}).to_csv(path, index=False)
+    scans = key_scans(monkeypatch)
+
+    joined = joiner.perform_join(str(path), 'us_counties.json', 'GEOID', 'GEOID',
+                                 aggregate={'households': ['sum']}, chunksize=500)
+
+    assert scans == [str(path)]
+    assert joined.attrs['join_stats']['rollup'] == 'tract -> county'
+    assert (joined['households_sum'] == 800).all()
+
+
+def test_default_rollup_sums_columns_empty_in_the_head(joiner, tmp_path):
+    tracts = stripped_tracts(400)
+    late = pd.Series(1.0, index=tracts.index).where(tracts.index >= 1600)  # only states 06 and 36
+    path = tmp_path / 'tracts.csv'
+    pd.DataFrame({'GEOID': tracts, 'households': 1, 'late': late}).to_csv(path, index=False)
+
+    joined = joiner.perform_join(str(path), 'us_counties.json', 'GEOID', 'GEOID')
+
+    assert joined.attrs['join_stats']['rollup'] == 'tract -> county'
+    assert joined.set_index('GEOID')['late_sum'].to_dict() == {
+        geoid: (0.0 if geoid.startswith('01') else 400.0) for geoid in county_frame()['GEOID']}
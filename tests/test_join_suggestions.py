@@ -0,0 +1,39 @@
+"""Join suggestions: key columns outrank measures whose values happen to match keys"""
+
+import numpy as np
+import pandas as pd
+
+from conftest import county_frame
+from layer_keys import rank_join_fields
+
+
+def test_fips_column_outranks_small_integer_measure(joiner, tmp_path):
+    # 'pop' holds 1, 6 and 36: every value is also a state FIPS code
+    counties = county_frame()['GEOID']
+    frame = pd.DataFrame({'FIPS': np.repeat(counties.to_numpy(), 10),
+                          'pop': np.tile([1, 6, 36], 40)})
+    path = tmp_path / 'records.csv'
+    frame.to_csv(path, index=False)
+
+    suggestions = joiner.suggest_best_join(joiner.analyze_csv(str(path)))
+
+    assert suggestions[0]['layer'] == 'us_counties.json'
+    best = suggestions[0]['join_options'][0]
+    assert (best['csv_field'], best['geo_field']) == ('FIPS', 'GEOID')
+    options = [option['csv_field'] for suggestion in suggestions for option in suggestion['join_options']]
+    assert 'pop' not in options
+
+
+def test_name_hint_and_confidence_weight_the_score():
+    keys = np.array(['01', '06', '36'], dtype=object)
+    indexes = {'us_states.json': {'STATE': {'key_type': 'state', 'keys': keys}}}
+    samples = {
+        'value': {'type': 'state_fips', 'values': ['1', '6', '36'], 'confidence': 1.0},
+        'state_code': {'type': 'state_fips', 'values': ['1', '6', '36'], 'confidence': 0.9}
+    }
+
+    ranked = rank_join_fields(samples, indexes)
+
+    assert [r['csv_field'] for r in ranked] == ['state_code', 'value']
+    assert [r['overlap'] for r in ranked] == [1.0, 1.0]
+    assert ranked[0]['score'] == 0.9 and ranked[1]['score'] == 0.5
@@ -0,0 +1,36 @@
+"""Importing the joiner must not execute geopandas or shapely until a join needs them"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Prints, after importing the joiner and after running a join, whether each module has executed
+SCRIPT = '''
+import json, sys, types
+
+def loaded():
+    names = ['geopandas', 'shapely', 'geopandas.geodataframe', 'shapely.geometry']
+    # lazy_import registers a placeholder that only becomes a plain module once used
+    return {name: type(sys.modules.get(name)) is types.ModuleType for name in names}
+
+from csv_shapefile_joiner import CSVShapefileJoiner
+before = loaded()
+joiner = CSVShapefileJoiner(data_dir='data', metadata_db='gis_metadata.db')
+joined = joiner.perform_join('values.csv', 'us_counties.json', 'GEOID', 'GEOID', matched_only=True)
+print(json.dumps({'before': before, 'after': loaded(), 'joined': len(joined)}))
+'''
+
+
+def test_heavy_modules_load_only_when_a_join_runs(data_dir, tmp_path):
+    (tmp_path / 'values.csv').write_text('GEOID,value\n01001,1\n06003,2\n')
+    repo = Path(__file__).resolve().parent.parent
+    output = subprocess.run([sys.executable, '-c', SCRIPT], cwd=tmp_path, capture_output=True,
+                            text=True, env=dict(os.environ, PYTHONPATH=str(repo)))
+    assert output.returncode == 0, output.stderr
+    modules = json.loads(output.stdout.strip().splitlines()[-1])
+
+    assert not any(modules['before'].values()), modules['before']
+    assert all(modules['after'].values()), modules['after']
+    assert modules['joined'] == 2
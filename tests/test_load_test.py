@@ -0,0 +1,94 @@
+"""Load tester: percentile and summary math, and a run against a stub HTTP server"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from load_test import LoadTest, percentile, summarize
+
+# Each warmup request to the stub takes this long; measured requests return at once
+WARMUP_SECONDS = 0.3
+
+
+def result(latency, status=200, error=None, size=10):
+    return {'scenario': 's', 'latency_ms': latency, 'status': status, 'bytes': size, 'error': error}
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 11))
+    assert percentile(values, 50) == 5
+    assert percentile(values, 90) == 9
+    assert percentile(values, 95) == 10 and percentile(values, 100) == 10
+    assert percentile(values, 0) == 1
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+
+def test_summarize_counts_errors_and_throughput():
+    results = [result(10), result(30), result(20, status=500), result(40, status=0, error='timeout')]
+    summary = summarize(results, elapsed=2.0)
+    assert summary['requests'] == 4 and summary['errors'] == 2 and summary['error_rate'] == 0.5
+    assert summary['throughput_rps'] == 2.0 and summary['bytes'] == 40
+    assert summary['latency_ms'] == {'mean': 25.0, 'p50': 20, 'p95': 40, 'p99': 40, 'max': 40}
+
+    empty = summarize([], elapsed=0)
+    assert empty['requests'] == 0 and empty['error_rate'] == 0.0 and empty['throughput_rps'] == 0.0
+    assert empty['latency_ms']['p50'] is None and empty['latency_ms']['mean'] is None
+
+
+@pytest.fixture
+def stub_server():
+    """HTTP server whose first two requests are slow; /missing answers 404"""
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            calls.append(self.path)
+            if len(calls) <= 2:
+                time.sleep(WARMUP_SECONDS)
+            body = b'{"ok": true}'
+            self.send_response(404 if self.path.startswith('/missing') else 200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_port}', calls
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_run_measures_throughput_after_warmup(stub_server):
+    url, calls = stub_server
+    mix = [{'name': 'ok', 'path': '/api/ok', 'weight': 3},
+           {'name': 'missing', 'path': '/missing', 'params': {'state': ['01', '06']}, 'weight': 1}]
+    report = LoadTest(url, mix, concurrency=1, duration=0, max_requests=20, warmup=2, seed=1).run()
+
+    assert len(calls) == 22
+    summary = report['summary']
+    assert summary['requests'] == 20 and summary['bytes'] == 20 * 12
+    assert summary['errors'] == report['scenarios']['missing']['requests'] > 0
+    assert report['scenarios']['ok']['errors'] == 0
+
+    # The two slow warmup requests fall outside the measured window
+    assert report['warmup_s'] >= 2 * WARMUP_SECONDS
+    assert report['elapsed_s'] < WARMUP_SECONDS
+    assert summary['throughput_rps'] > 20 / WARMUP_SECONDS
+    assert all(r['latency_ms'] < WARMUP_SECONDS * 1000 for r in report['requests'])
+    assert min(r['offset_s'] for r in report['requests']) < 0.05
+
+
+def test_duration_counts_from_the_end_of_warmup(stub_server):
+    url, calls = stub_server
+    report = LoadTest(url, [{'name': 'ok', 'path': '/'}], concurrency=2, duration=0.5, warmup=2).run()
+    assert report['warmup_s'] >= WARMUP_SECONDS
+    assert 0.5 <= report['elapsed_s'] < 1.0
+    assert report['summary']['requests'] > 0 and report['summary']['errors'] == 0
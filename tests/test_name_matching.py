@@ -0,0 +1,52 @@
+"""Name normalization, alias matching and state blocking"""
+
+import pandas as pd
+
+from name_matching import NameMatcher, normalize_names, split_state
+
+LAYER = pd.DataFrame({
+    'NAME': ['St. Louis County', 'Washington County', 'Washington County', 'Jefferson Parish',
+             'Jefferson County', 'Orleans Parish'],
+    'STATEFP': ['29', '01', '06', '22', '01', '22']
+})
+
+
+def matched_rows(names, states=None, threshold=80):
+    """Layer row matched by each name (None when unmatched or not unique)"""
+    matcher = NameMatcher(LAYER['NAME'], LAYER['STATEFP'], threshold=threshold)
+    keys = matcher.match(pd.Series(names), pd.Series(states) if states is not None else None)
+    rows = matcher.lookup_table().groupby('key')['row'].agg(list)
+    return [rows[key][0] if pd.notna(key) and len(rows[key]) == 1 else None for key in keys]
+
+
+def test_aliases_and_suffixes_normalize_alike():
+    names = normalize_names(pd.Series(['St. Louis County', 'Saint Louis', 'ST LOUIS', 'Jefferson Parish',
+                                       'Jefferson County', 'Doña Ana County']))
+    assert names.tolist() == ['saint louis', 'saint louis', 'saint louis', 'jefferson', 'jefferson',
+                              'dona ana']
+
+
+def test_trailing_states_are_split_off():
+    names, states = split_state(pd.Series(['Washington County, Alabama', 'Orleans LA', 'Kings County']))
+    assert names.tolist() == ['Washington County', 'Orleans', 'Kings County']
+    assert states.fillna('').tolist() == ['01', '22', '']
+
+
+def test_same_names_match_only_within_their_state():
+    rows = matched_rows(['Saint Louis', 'Jefferson County', 'Jefferson', 'Washington', 'Washington'],
+                        ['MO', 'Louisiana', 'AL', 'CA', 'AL'])
+    assert rows == [0, 3, 4, 2, 1]
+
+
+def test_embedded_states_block_like_a_state_column():
+    assert matched_rows(['Washington County, California', 'Jefferson Parish LA']) == [2, 3]
+
+
+def test_names_without_a_candidate_in_their_state_stay_unmatched():
+    # Orleans exists, but only in Louisiana
+    assert matched_rows(['Orleans', 'St Louis'], ['AL', 'CA']) == [None, None]
+
+
+def test_below_threshold_names_stay_unmatched():
+    assert matched_rows(['Jeffersn', 'Zebulon'], ['AL', 'AL']) == [4, None]
+    assert matched_rows(['Jeffersn'], ['AL'], threshold=99) == [None]
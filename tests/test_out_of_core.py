@@ -0,0 +1,60 @@
+"""Out-of-core batched joins against the in-memory join"""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+
+import out_of_core
+from conftest import county_frame
+
+# Stats both joins report, which must agree
+SHARED_STATS = ['total_geographic_features', 'total_csv_records', 'successful_joins', 'join_rate',
+                'unmatched_geographic', 'unmatched_csv', 'key_type', 'key_repairs']
+
+
+@pytest.fixture
+def counts(tmp_path):
+    """Integer FIPS (zeros lost), one county listed twice, two missing, one unknown key"""
+    geoids = county_frame()['GEOID'].tolist()
+    fips = geoids[:-2] + [geoids[3], '99999']
+    path = tmp_path / 'counts.csv'
+    pd.DataFrame({'FIPS': [int(f) for f in fips], 'value': np.arange(len(fips)) * 1.5,
+                  'label': [f'row {i}' for i in range(len(fips))]}).to_csv(path, index=False)
+    return path
+
+
+def read_output(path, format_type):
+    if format_type == 'gpkg':
+        return gpd.read_file(path)
+    if format_type == 'geoparquet':
+        return gpd.read_parquet(path)
+    return pd.read_csv(path, dtype={'GEOID': str, 'STATE': str, 'FIPS': str})
+
+
+def comparable(frame, columns):
+    return frame[columns].sort_values(['GEOID', 'label'], na_position='first').reset_index(drop=True)
+
+
+@pytest.mark.parametrize('format_type', ['gpkg', 'geoparquet', 'csv'])
+@pytest.mark.parametrize('matched_only', [False, True])
+def test_batched_join_matches_in_memory_join(joiner, counts, tmp_path, monkeypatch, format_type, matched_only):
+    # A tiny cap with a 5-feature floor splits the 12 counties over three batches
+    monkeypatch.setattr(out_of_core, 'MIN_BATCH_FEATURES', 5)
+    expected = joiner.perform_join(str(counts), 'us_counties.json', 'FIPS', 'GEOID', matched_only=matched_only)
+    stats = joiner.out_of_core_join(str(counts), 'us_counties.json', 'FIPS', 'GEOID', str(tmp_path / 'out'),
+                                    format_type=format_type, matched_only=matched_only, memory_cap_mb=0.001)
+    result = read_output(stats['output'], format_type)
+
+    assert stats['out_of_core']['batch_features'] == 5 and stats['out_of_core']['batches'] == 3
+    assert stats['out_of_core']['rows_written'] == len(expected) == len(result)
+    assert {key: stats[key] for key in SHARED_STATS} == \
+        {key: expected.attrs['join_stats'][key] for key in SHARED_STATS}
+
+    columns = ['GEOID', 'STATE', 'NAME', 'AREA', 'value', 'label']
+    pd.testing.assert_frame_equal(comparable(result, columns), comparable(expected, columns),
+                                  check_dtype=False)
+    if format_type != 'csv':
+        order = result.sort_values(['GEOID', 'label'], na_position='first').geometry
+        reference = expected.sort_values(['GEOID', 'label'], na_position='first').geometry
+        assert order.reset_index(drop=True).geom_equals(reference.reset_index(drop=True)).all()
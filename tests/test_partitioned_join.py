@@ -0,0 +1,60 @@
+"""State-partitioned joins against the in-memory join"""
+
+import geopandas as gpd
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from conftest import county_frame
+
+# Stats both joins report, which must agree
+SHARED_STATS = ['total_geographic_features', 'total_csv_records', 'successful_joins', 'join_rate',
+                'unmatched_geographic', 'unmatched_csv', 'key_type', 'key_repairs']
+
+
+@pytest.fixture
+def counts(tmp_path):
+    """Integer FIPS sorted by state; 'note' is empty in the first chunks and text later
+
+    State 01 matches every county, the others miss one each, so a per-state
+    merge would give 'value' an integer type in one state and float in the rest.
+    """
+    geoids = [geoid for geoid in county_frame()['GEOID'] if geoid.startswith('01') or not geoid.endswith('7')]
+    frame = pd.DataFrame({'FIPS': [int(geoid) for geoid in geoids] + [99999],
+                          'value': range(len(geoids) + 1)})
+    frame['note'] = [None if geoid.startswith('01') else f'note {geoid}' for geoid in geoids] + ['x']
+    path = tmp_path / 'counts.csv'
+    frame.to_csv(path, index=False)
+    return path
+
+
+def comparable(frame):
+    columns = ['GEOID', 'STATE', 'NAME', 'AREA', 'value', 'note']
+    frame = pd.DataFrame(frame[columns]).sort_values('GEOID').reset_index(drop=True)
+    return frame.astype({'value': 'float64', 'note': 'object', 'GEOID': 'object', 'STATE': 'object',
+                         'NAME': 'object'}).fillna({'note': ''})
+
+
+@pytest.mark.parametrize('format_type', ['gpkg', 'geoparquet'])
+@pytest.mark.parametrize('matched_only', [False, True])
+def test_partitioned_join_matches_in_memory_join(joiner, counts, tmp_path, format_type, matched_only):
+    expected = joiner.perform_join(str(counts), 'us_counties.json', 'FIPS', 'GEOID', matched_only=matched_only)
+    stats = joiner.partitioned_join(str(counts), 'us_counties.json', 'FIPS', 'GEOID', str(tmp_path / 'out'),
+                                    format_type=format_type, matched_only=matched_only, workers=2,
+                                    chunksize=3)
+
+    if format_type == 'geoparquet':
+        parts = sorted((tmp_path / 'out').glob('*.parquet'))
+        assert len(parts) == 3
+        schemas = [pq.read_schema(part).remove_metadata() for part in parts]
+        assert all(schema.equals(schemas[0]) for schema in schemas)
+        result = gpd.read_parquet(tmp_path / 'out')
+    else:
+        result = gpd.read_file(stats['output'])
+
+    assert stats['partitions'] == 3
+    assert {key: stats[key] for key in SHARED_STATS} == \
+        {key: expected.attrs['join_stats'][key] for key in SHARED_STATS}
+    pd.testing.assert_frame_equal(comparable(result), comparable(expected))
+    order = result.sort_values('GEOID').geometry.reset_index(drop=True)
+    assert order.geom_equals(expected.sort_values('GEOID').geometry.reset_index(drop=True)).all()
@@ -0,0 +1,67 @@
+"""Point-in-polygon assignment and point-count joins"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import spatial_join
+from conftest import county_frame
+from spatial_join import PointLocator
+
+# Counties 0 and 1 of state 01 are the unit squares at x 0-1 and 1-2
+POINTS = pd.DataFrame([
+    (0.5, 0.5, '01001'),    # inside county 0
+    (0.2, 0.9, '01001'),
+    (1.5, 0.5, '01003'),    # inside county 1
+    (1.0, 0.5, '01001'),    # shared border: the polygon listed first
+    (0.5, 1.0, '01001'),    # outer edge of county 0
+    (5.0, 0.5, None),       # in the gap between states
+    (0.5, 50.0, None),      # north of every polygon
+    (np.nan, 0.5, None),    # invalid
+    (200.0, 0.5, None),     # longitude out of range
+    (0.5, -95.0, None),     # latitude out of range
+], columns=['lon', 'lat', 'expected'])
+
+
+@pytest.fixture
+def locator():
+    counties = county_frame()
+    with PointLocator(counties.geometry, counties['GEOID'], workers=1) as locator:
+        yield locator
+
+
+def test_points_take_the_key_of_their_polygon(locator):
+    keys = locator.locate(POINTS['lon'], POINTS['lat'])
+
+    assert keys.fillna('-').tolist() == POINTS['expected'].fillna('-').tolist()
+    assert dict(locator.stats) == {'points': 10, 'assigned': 5, 'outside_layer': 2, 'invalid_coordinates': 3}
+
+
+def test_text_coordinates_are_invalid_not_errors(locator):
+    keys = locator.locate(pd.Series(['0.5', 'n/a']), pd.Series(['0.5', '0.5']))
+    assert keys.fillna('-').tolist() == ['01001', '-'] and locator.stats['invalid_coordinates'] == 1
+
+
+def test_worker_pool_matches_in_process_assignment(monkeypatch):
+    monkeypatch.setattr(spatial_join, 'MIN_PARALLEL_POINTS', 1)
+    counties = county_frame()
+    with PointLocator(counties.geometry, counties['GEOID'], workers=2) as locator:
+        keys = locator.locate(POINTS['lon'], POINTS['lat'])
+        assert locator._pool is not None
+    assert keys.fillna('-').tolist() == POINTS['expected'].fillna('-').tolist()
+
+
+def test_point_join_counts_points_per_polygon(joiner, tmp_path):
+    path = tmp_path / 'points.csv'
+    POINTS.assign(visits=range(10)).drop(columns=['expected']).to_csv(path, index=False)
+
+    joined = joiner.perform_join(str(path), 'us_counties.json', 'GEOID', 'GEOID',
+                                 point_fields=('lat', 'lon'), aggregate={'visits': ['sum']}, chunksize=3)
+
+    counts = joined.set_index('GEOID')
+    assert counts.loc['01001', 'record_count'] == 4 and counts.loc['01001', 'visits_sum'] == 0 + 1 + 3 + 4
+    assert counts.loc['01003', 'record_count'] == 1 and counts.loc['01003', 'visits_sum'] == 2
+    assert counts.drop(index=['01001', '01003'])['record_count'].isna().all()
+    stats = joined.attrs['join_stats']
+    assert stats['points'] == {'points': 10, 'assigned': 5, 'outside_layer': 2, 'invalid_coordinates': 3}
+    assert stats['successful_joins'] == 2 and stats['unmatched_geographic'] == len(county_frame()) - 2
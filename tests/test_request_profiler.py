@@ -0,0 +1,81 @@
+"""Slow-request profiler: off unless configured, sampling rate, and untouched responses"""
+
+import json
+import time
+
+from flask import Flask, jsonify, request
+
+from request_profiler import SlowRequestProfiler
+
+SLOW_SECONDS = 0.3
+
+
+def make_app():
+    app = Flask(__name__)
+
+    @app.route('/slow/<geo_type>')
+    def slow(geo_type):
+        time.sleep(SLOW_SECONDS)
+        return jsonify({'geo_type': geo_type, 'state': request.args.get('state')})
+
+    @app.route('/fast')
+    def fast():
+        return 'ok', 201, {'X-Custom': 'yes'}
+
+    return app
+
+
+def test_server_profiler_is_off_by_default(server):
+    client = server.app.test_client()
+    assert client.get('/api/datasets').status_code == 200
+    assert not server.profiler.enabled
+    assert server.profiler.sampler is None and not server.profiler.active
+
+
+def test_zero_threshold_adds_no_hooks(tmp_path):
+    app = make_app()
+    profiler = SlowRequestProfiler(app, threshold_ms=0, log_dir=tmp_path)
+    assert not app.before_request_funcs and not app.teardown_request_funcs
+    app.test_client().get('/slow/counties')
+    assert profiler.sampler is None and not list(tmp_path.iterdir())
+
+
+def test_slow_requests_are_sampled_at_the_configured_interval(tmp_path):
+    app = make_app()
+    profiler = SlowRequestProfiler(app, threshold_ms=100, interval_ms=10, log_dir=tmp_path)
+    client = app.test_client()
+
+    assert client.get('/fast').status_code == 201
+    assert not list(tmp_path.iterdir())  # fast requests are never written
+
+    client.get('/slow/counties?state=06')
+    entries = [json.loads(line) for line in (tmp_path / 'slow_requests.jsonl').read_text().splitlines()]
+    assert len(entries) == 1
+    entry = entries[0]
+    assert entry['route'] == '/slow/<geo_type>' and entry['dataset'] == 'counties'
+    assert entry['params'] == {'state': '06'} and entry['sampled_after_ms'] == 25.0
+
+    # Sampling starts at 25ms and ticks every 10ms until the request ends
+    expected = (SLOW_SECONDS - profiler.delay) / profiler.interval
+    assert 0.5 * expected <= entry['samples'] <= 1.2 * expected
+
+    lines = (tmp_path / entry['profile']).read_text().splitlines()
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in lines) == entry['samples']
+    assert all(line.startswith('GET /slow/<geo_type> dataset=counties state=06;') for line in lines)
+    assert any('slow (test_request_profiler.py' in line for line in lines)
+    assert not profiler.active
+
+
+def test_profiling_does_not_change_responses(tmp_path):
+    plain = make_app().test_client()
+    profiled_app = make_app()
+    SlowRequestProfiler(profiled_app, threshold_ms=50, interval_ms=5, log_dir=tmp_path)
+    profiled = profiled_app.test_client()
+
+    for path in ('/fast', '/slow/states?state=01'):
+        expected, actual = plain.get(path), profiled.get(path)
+        assert actual.status_code == expected.status_code
+        assert actual.data == expected.data
+        assert actual.headers.get('X-Custom') == expected.headers.get('X-Custom')
+        assert actual.content_type == expected.content_type
+    assert (tmp_path / 'slow_requests.jsonl').exists()
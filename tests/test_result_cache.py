@@ -0,0 +1,74 @@
+"""Join result cache: hits, incremental re-joins and invalidation"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import county_frame
+from result_cache import changed_keys, key_digests
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'counts.csv'
+    pd.DataFrame({'FIPS': county_frame()['GEOID'].str.lstrip('0'), 'value': range(12)}).to_csv(path, index=False)
+    return path
+
+
+def comparable(frame):
+    """Attributes in a fixed row and column order, geometry as WKT"""
+    frame = pd.DataFrame(frame).assign(geometry=frame.geometry.to_wkt())
+    return frame.sort_values('GEOID').reset_index(drop=True)[sorted(frame.columns)]
+
+
+def test_changed_keys_covers_edits_additions_and_removals():
+    old = key_digests(pd.DataFrame({'k': ['a', 'b', 'c'], 'v': [1, 2, 3]}), 'k')
+    new = key_digests(pd.DataFrame({'k': ['a', 'b', 'd'], 'v': [1, 5, 4]}), 'k')
+    assert sorted(changed_keys(old, new)) == ['b', 'c', 'd']
+
+
+def test_identical_csv_is_a_hit(joiner, csv_path):
+    first = joiner.cached_join(str(csv_path), 'us_counties.json', 'FIPS', 'GEOID')
+    second = joiner.cached_join(str(csv_path), 'us_counties.json', 'FIPS', 'GEOID')
+    assert first.attrs['join_stats']['cache'] == 'miss'
+    assert second.attrs['join_stats']['cache'] == 'hit'
+    pd.testing.assert_frame_equal(comparable(first), comparable(second))
+
+
+def test_edited_rows_are_rejoined_incrementally(joiner, csv_path):
+    joiner.cached_join(str(csv_path), 'us_counties.json', 'FIPS', 'GEOID')
+    frame = pd.read_csv(csv_path, dtype=str)
+    frame.loc[0, 'value'] = '100'
+    frame = frame.drop(index=5)
+    frame.to_csv(csv_path, index=False)
+
+    result = joiner.cached_join(str(csv_path), 'us_counties.json', 'FIPS', 'GEOID')
+
+    assert result.attrs['join_stats']['cache'] == 'incremental'
+    fresh = joiner.perform_join(str(csv_path), 'us_counties.json', 'FIPS', 'GEOID')
+    pd.testing.assert_frame_equal(comparable(result), comparable(fresh), check_dtype=False)
+    assert result.attrs['join_stats']['successful_joins'] == fresh.attrs['join_stats']['successful_joins'] == 11
+
+
+def test_mostly_changed_csv_is_joined_in_full(joiner, csv_path):
+    joiner.cached_join(str(csv_path), 'us_counties.json', 'FIPS', 'GEOID')
+    frame = pd.read_csv(csv_path, dtype=str).assign(value='7')
+    frame.to_csv(csv_path, index=False)
+
+    result = joiner.cached_join(str(csv_path), 'us_counties.json', 'FIPS', 'GEOID')
+    assert result.attrs['join_stats']['cache'] == 'miss'
+    assert (result['value'] == 7).all()
+
+
+def test_layer_change_invalidates_the_entry(joiner, csv_path, data_dir):
+    joiner.cached_join(str(csv_path), 'us_counties.json', 'FIPS', 'GEOID')
+    layer = data_dir / 'us_counties.json'
+    counties = county_frame()
+    counties['NAME'] = counties['NAME'].str.upper()
+    counties.to_file(layer, driver='GeoJSON')
+    os.utime(layer, (layer.stat().st_atime, layer.stat().st_mtime + 10))
+
+    result = joiner.cached_join(str(csv_path), 'us_counties.json', 'FIPS', 'GEOID')
+    assert result.attrs['join_stats']['cache'] == 'miss'
+    assert result['NAME'].str.isupper().all()
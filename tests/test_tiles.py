@@ -0,0 +1,85 @@
+"""Choropleth classification, the tile rasterizer and the tile endpoint"""
+
+import math
+import struct
+import zlib
+
+import pytest
+
+from tile_renderer import (TILE_SIZE, TileRenderer, build_feature_colors, class_index, classify,
+                           lonlat_to_pixel)
+
+RED = (255, 0, 0, 255)
+
+
+def decode_png(png):
+    """RGBA rows of a PNG written by encode_png (one IDAT, filter type 0)"""
+    assert png[:8] == b'\x89PNG\r\n\x1a\n'
+    width, height = struct.unpack('>II', png[16:24])
+    length = struct.unpack('>I', png[33:37])[0]
+    raw = zlib.decompress(png[41:41 + length])
+    stride = width * 4 + 1
+    return width, height, [raw[row * stride + 1:(row + 1) * stride] for row in range(height)]
+
+
+def pixel(rows, x, y):
+    return tuple(rows[y][x * 4:x * 4 + 4])
+
+
+def square(lon0, lat0, lon1, lat1):
+    return [(lon0, lat0), (lon1, lat0), (lon1, lat1), (lon0, lat1), (lon0, lat0)]
+
+
+@pytest.mark.parametrize('method', ['quantile', 'equal_interval'])
+def test_equal_values_fall_in_one_class(method):
+    breaks = classify([3.0] * 6, method)
+    assert breaks == [3.0] * 5
+    assert class_index(3.0, breaks) == 0
+
+
+def test_nan_and_none_are_left_out_of_breaks():
+    assert classify([1.0, float('nan'), None, 2.0, 3.0, 4.0, 5.0]) == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert classify([float('nan'), None]) == []
+    assert class_index(5.0, [1.0, 2.0, 3.0, 4.0, 5.0]) == 4
+    assert class_index(99.0, [1.0, 2.0, 3.0, 4.0, 5.0]) == 4  # above the last break stays in it
+
+
+def test_features_without_a_number_get_no_color():
+    keys = {'a': [0], 'b': [1], 'c': [2], 'd': [3]}
+    colors, breaks = build_feature_colors(keys, {'a': 1, 'b': 'nan', 'c': 'n/a', 'd': 4}, classes=2)
+    assert breaks == [1.0, 4.0]
+    assert set(colors) == {0, 3} and colors[0] != colors[3]
+    assert build_feature_colors(keys, {'a': None}) == ({}, [])
+
+
+def test_polygon_pixels_are_filled_and_holes_left_empty():
+    outer, hole = square(-90, -40, 90, 40), square(-10, -10, 10, 10)
+    renderer = TileRenderer([{'geometry': {'type': 'Polygon', 'coordinates': [outer, hole]}}])
+    width, height, rows = decode_png(renderer.render_tile(0, 0, 0, {0: RED}))
+
+    assert (width, height) == (TILE_SIZE, TILE_SIZE)
+    left, top = (math.ceil(v) for v in lonlat_to_pixel(-90, 40, 0))
+    right, bottom = (math.floor(v) for v in lonlat_to_pixel(90, -40, 0))
+    assert pixel(rows, left + 1, top + 1) == RED and pixel(rows, right - 1, bottom - 1) == RED
+    assert pixel(rows, left - 2, top + 1)[3] == 0 and pixel(rows, left + 1, top - 2)[3] == 0
+    assert pixel(rows, TILE_SIZE // 2, TILE_SIZE // 2)[3] == 0  # inside the hole
+
+
+def test_tile_endpoint_renders_registered_values(server):
+    client = server.app.test_client()
+    registered = client.post('/api/tiles/counties', json={
+        'join_field': 'GEOID', 'values': {'01001': 1, '01003': 2, '06001': 3}})
+    assert registered.status_code == 200
+    url = registered.get_json()['tiles'].format(z=6, x=32, y=31)
+
+    response = client.get(url)
+    assert response.status_code == 200 and response.mimetype == 'image/png'
+    _, _, rows = decode_png(response.data)
+    # County 01001 is the 1 degree square east and north of (0, 0)
+    x, y = lonlat_to_pixel(0.5, 0.5, 6)
+    assert pixel(rows, int(x) - 32 * TILE_SIZE, int(y) - 31 * TILE_SIZE)[3] > 0
+
+    cached = client.get(url)
+    assert cached.status_code == 200 and cached.mimetype == 'image/png'
+    cached.close()
+    assert client.get('/api/tiles/counties/abc/20/0/0.png').status_code == 400
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+ChloraPleth Tile Renderer
+Pure-Python rasterizer that draws choropleth PNG tiles from GeoJSON features
+"""
+
+import math
+import struct
+import zlib
+from bisect import bisect_left
+
+TILE_SIZE = 256
+MAX_LATITUDE = 85.0511287798
+
+# Sequential ColorBrewer ramps (light -> dark)
+COLOR_RAMPS = {
+    'blues': ['#eff3ff', '#bdd7e7', '#6baed6', '#3182bd', '#08519c'],
+    'greens': ['#edf8e9', '#bae4b3', '#74c476', '#31a354', '#006d2c'],
+    'reds': ['#fee5d9', '#fcae91', '#fb6a4a', '#de2d26', '#a50f15'],
+    'oranges': ['#feedde', '#fdbe85', '#fd8d3c', '#e6550d', '#a63603'],
+    'purples': ['#f2f0f7', '#cbc9e2', '#9e9ac8', '#756bb1', '#54278f'],
+    'viridis': ['#440154', '#3b528b', '#21918c', '#5ec962', '#fde725']
+}
+
+CLASSIFICATION_METHODS = ['quantile', 'equal_interval']
+
+NO_DATA_COLOR = (204, 204, 204, 140)
+FILL_ALPHA = 210
+
+
+def hex_to_rgb(hex_color):
+    """Convert '#rrggbb' to an (r, g, b) tuple"""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def ramp_colors(ramp, classes):
+    """Interpolate a named ramp to the requested number of RGBA colors"""
+    if ramp not in COLOR_RAMPS:
+        raise ValueError(f"Unknown color ramp: {ramp}")
+    stops = [hex_to_rgb(color) for color in COLOR_RAMPS[ramp]]
+    if classes == 1:
+        return [stops[-1] + (FILL_ALPHA,)]
+
+    colors = []
+    for i in range(classes):
+        position = i * (len(stops) - 1) / (classes - 1)
+        lower = int(position)
+        upper = min(lower + 1, len(stops) - 1)
+        t = position - lower
+        rgb = tuple(round(a + (b - a) * t) for a, b in zip(stops[lower], stops[upper]))
+        colors.append(rgb + (FILL_ALPHA,))
+    return colors
+
+
+def classify(values, method='quantile', classes=5):
+    """Return the upper class breaks for a list of numeric values"""
+    if method not in CLASSIFICATION_METHODS:
+        raise ValueError(f"Unknown classification method: {method}")
+
+    data = sorted(v for v in values if v is not None and not math.isnan(v))
+    if not data:
+        return []
+
+    if method == 'equal_interval':
+        low, high = data[0], data[-1]
+        step = (high - low) / classes
+        return [low + step * (i + 1) for i in range(classes)]
+
+    breaks = []
+    for i in range(1, classes + 1):
+        index = min(len(data) - 1, math.ceil(i * len(data) / classes) - 1)
+        breaks.append(data[index])
+    return breaks
+
+
+def class_index(value, breaks):
+    """Find the class a value falls into given upper breaks"""
+    return min(bisect_left(breaks[:-1], value), len(breaks) - 1)
+
+
+def lonlat_to_pixel(lon, lat, zoom):
+    """Project lon/lat to global Web Mercator pixel coordinates"""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    scale = TILE_SIZE * (1 << zoom)
+    x = (lon + 180.0) / 360.0 * scale
+    sin_lat = math.sin(math.radians(lat))
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return x, y
+
+
+def tile_bounds(zoom, x, y):
+    """Return (minx, miny, maxx, maxy) in lon/lat for a tile"""
+    n = 1 << zoom
+
+    def lat_at(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return (x / n * 360.0 - 180.0, lat_at(y + 1),
+            (x + 1) / n * 360.0 - 180.0, lat_at(y))
+
+
+def geometry_polygons(geometry):
+    """Yield polygons (lists of rings) from a GeoJSON geometry"""
+    if not geometry:
+        return
+    if geometry['type'] == 'Polygon':
+        yield geometry['coordinates']
+    elif geometry['type'] == 'MultiPolygon':
+        yield from geometry['coordinates']
+    elif geometry['type'] == 'GeometryCollection':
+        for part in geometry.get('geometries', []):
+            yield from geometry_polygons(part)
+
+
+def feature_bbox(feature):
+    """Compute a (minx, miny, maxx, maxy) bbox for a GeoJSON feature"""
+    minx = miny = math.inf
+    maxx = maxy = -math.inf
+    for polygon in geometry_polygons(feature.get('geometry')):
+        for lon, lat, *_ in polygon[0]:
+            minx, maxx = min(minx, lon), max(maxx, lon)
+            miny, maxy = min(miny, lat), max(maxy, lat)
+    return minx, miny, maxx, maxy
+
+
+def bboxes_intersect(a, b):
+    """Check whether two (minx, miny, maxx, maxy) boxes overlap"""
+    return a[0] <= b[2] and a[2] >= b[0] and a[1] <= b[3] and a[3] >= b[1]
+
+
+def fill_polygon(buffer, rings, color):
+    """Scanline-fill a polygon (tile pixel coordinates) using the even-odd rule"""
+    edges = []
+    for ring in rings:
+        for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+            if y0 == y1:
+                continue
+            if y0 > y1:
+                x0, y0, x1, y1 = x1, y1, x0, y0
+            edges.append((y0, y1, x0, (x1 - x0) / (y1 - y0)))
+    if not edges:
+        return
+
+    edges.sort()
+    pixel = bytes(color)
+    first_row = max(0, math.floor(edges[0][0]))
+    last_row = min(TILE_SIZE - 1, math.ceil(max(edge[1] for edge in edges)))
+
+    active = []
+    next_edge = 0
+    for row in range(first_row, last_row + 1):
+        center = row + 0.5
+        while next_edge < len(edges) and edges[next_edge][0] <= center:
+            active.append(edges[next_edge])
+            next_edge += 1
+        active = [edge for edge in active if edge[1] > center]
+
+        crossings = sorted(x0 + (center - y0) * slope for y0, y1, x0, slope in active)
+        offset = row * TILE_SIZE
+        for start, end in zip(crossings[::2], crossings[1::2]):
+            left = max(0, math.ceil(start - 0.5))
+            right = min(TILE_SIZE, math.ceil(end - 0.5))
+            if right > left:
+                buffer[(offset + left) * 4:(offset + right) * 4] = pixel * (right - left)
+
+
+def encode_png(buffer, width=TILE_SIZE, height=TILE_SIZE):
+    """Encode an RGBA bytearray as a PNG image"""
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    stride = width * 4
+    raw = b''.join(b'\x00' + bytes(buffer[row * stride:(row + 1) * stride])
+                   for row in range(height))
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(raw, 6)) + chunk(b'IEND', b''))
+
+
+class TileRenderer:
+    """Renders choropleth tiles for one feature collection"""
+
+    def __init__(self, features, bboxes=None):
+        self.features = features
+        self.bboxes = bboxes if bboxes is not None else [feature_bbox(f) for f in features]
+
+    def render_tile(self, zoom, x, y, feature_colors, draw_no_data=True):
+        """Render a PNG tile; feature_colors maps feature index -> RGBA tuple"""
+        buffer = bytearray(TILE_SIZE * TILE_SIZE * 4)
+        bounds = tile_bounds(zoom, x, y)
+        origin_x, origin_y = x * TILE_SIZE, y * TILE_SIZE
+
+        for index, bbox in enumerate(self.bboxes):
+            if not bboxes_intersect(bbox, bounds):
+                continue
+            color = feature_colors.get(index)
+            if color is None:
+                if not draw_no_data:
+                    continue
+                color = NO_DATA_COLOR
+
+            for polygon in geometry_polygons(self.features[index].get('geometry')):
+                rings = []
+                for ring in polygon:
+                    points = []
+                    for lon, lat, *_ in ring:
+                        px, py = lonlat_to_pixel(lon, lat, zoom)
+                        point = (px - origin_x, py - origin_y)
+                        # Drop sub-pixel vertices; they cannot change the fill
+                        if points and abs(point[0] - points[-1][0]) < 0.5 \
+                                and abs(point[1] - points[-1][1]) < 0.5:
+                            continue
+                        points.append(point)
+                    if len(points) >= 3:
+                        rings.append(points)
+                if rings:
+                    fill_polygon(buffer, rings, color)
+
+        return encode_png(buffer)
+
+
+def build_feature_colors(feature_keys, values, ramp='blues', classes=5, method='quantile'):
+    """Map feature indices to RGBA colors from a {key: value} mapping
+
+    feature_keys maps a join key to the list of feature indices that carry it.
+    Returns (feature_colors, breaks).
+    """
+    numeric = {}
+    for key, value in values.items():
+        try:
+            numeric[str(key)] = float(value)
+        except (TypeError, ValueError):
+            continue
+
+    breaks = classify(numeric.values(), method, classes)
+    if not breaks:
+        return {}, []
+
+    colors = ramp_colors(ramp, len(breaks))
+    feature_colors = {}
+    for key, value in numeric.items():
+        if math.isnan(value):
+            continue
+        color = colors[class_index(value, breaks)]
+        for index in feature_keys.get(key, []):
+            feature_colors[index] = color
+    return feature_colors, breaks